@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app.core import auth_cache
 from app.core.deps import get_db, require_roles
-from app.db.models.user import Role
-from app.schemas.admin import UserCreateIn
-from app.crud.users import create_user, list_users
+from app.db.models.user import Role, User
+from app.schemas.admin import UserCreateIn, UserUpdateIn
+from app.crud.users import create_user, list_users, update_user
+from app.db.session import pool_stats
 
 router = APIRouter()
 
@@ -15,3 +17,17 @@ def users(db: Session = Depends(get_db), _user=Depends(require_roles(Role.admin)
 @router.post("/users")
 def create_user_endpoint(data: UserCreateIn, db: Session = Depends(get_db), _user=Depends(require_roles(Role.admin))):
     return create_user(db, data)
+
+@router.put("/users/{user_id}")
+def update_user_endpoint(user_id: int, data: UserUpdateIn, db: Session = Depends(get_db), _user=Depends(require_roles(Role.admin))):
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user = update_user(db, user, data)
+    # роль/активность проверяются по кэшу принципалов — сбрасываем записи логина
+    auth_cache.invalidate(user.login)
+    return user
+
+@router.get("/db-pools")
+def db_pools(_user=Depends(require_roles(Role.admin))):
+    return pool_stats()
@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.deps import get_db, require_roles
 from app.db.models.user import Role
-from app.schemas.entries import FactVolumeIn, ManhoursIn, PnLIn, CashflowIn
-from app.crud.entries import upsert_fact_volume, upsert_manhours, upsert_pnl, upsert_cashflow
+from app.schemas.entries import FactVolumeIn, ManhoursIn, PnLIn, CashflowIn, EntryBatchOut
+from app.crud.entries import (
+    CASHFLOW, FACT_VOLUME, MANHOURS, PNL, EntryTable,
+    upsert_batch, upsert_fact_volume, upsert_manhours, upsert_pnl, upsert_cashflow,
+)
 
 router = APIRouter()
 
+_BATCH_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "application/x-ndjson": {"schema": {"type": "string"}},
+        },
+    }
+}
+
 @router.post("/fact-volume")
 def post_fact_volume(data: FactVolumeIn, db: Session = Depends(get_db), _user=Depends(require_roles(Role.admin, Role.pto, Role.manager))):
     upsert_fact_volume(db, data)
@@ -27,3 +44,103 @@ def post_pnl(data: PnLIn, db: Session = Depends(get_db), _user=Depends(require_r
 def post_cashflow(data: CashflowIn, db: Session = Depends(get_db), _user=Depends(require_roles(Role.admin, Role.finance, Role.manager))):
     upsert_cashflow(db, data)
     return {"status": "ok"}
+
+
+async def batch_items(request: Request) -> list:
+    """Тело пакета: JSON-массив или NDJSON (по объекту в строке). Невалидная строка NDJSON — None."""
+    body = await request.body()
+    ctype = request.headers.get("content-type", "")
+    if "ndjson" in ctype or "jsonl" in ctype:
+        items = []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+    else:
+        try:
+            items = json.loads(body or b"null")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array")
+    if len(items) > settings.ENTRIES_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Too many rows (max {settings.ENTRIES_BATCH_MAX_ROWS})")
+    return items
+
+
+def _validation_message(e: ValidationError) -> str:
+    err = e.errors()[0]
+    loc = ".".join(str(x) for x in err.get("loc", ()))
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
+def _apply_batch(db: Session, table: EntryTable, schema, items: list, atomic: bool) -> EntryBatchOut:
+    results: list[dict] = []
+    rows: list[dict] = []
+    row_index: list[int] = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append(dict(index=i, status="error", error="invalid_json"))
+            continue
+        try:
+            rows.append(schema.model_validate(item).model_dump())
+        except ValidationError as e:
+            results.append(dict(index=i, status="error", error=_validation_message(e)))
+            continue
+        row_index.append(i)
+        results.append(None)
+
+    failed = len(items) - len(rows)
+    if failed and atomic:
+        raise HTTPException(status_code=422, detail=[r for r in results if r is not None])
+
+    if rows:
+        for i, status in zip(row_index, upsert_batch(db, table, rows)):
+            results[i] = dict(index=i, status=status)
+        db.commit()
+
+    out = EntryBatchOut(results=results, errors=failed)
+    for r in results:
+        if r["status"] in ("created", "updated", "superseded"):
+            setattr(out, r["status"], getattr(out, r["status"]) + 1)
+    return out
+
+
+@router.post("/fact-volume/batch", response_model=EntryBatchOut, openapi_extra=_BATCH_BODY)
+def post_fact_volume_batch(
+    _user=Depends(require_roles(Role.admin, Role.pto, Role.manager)),
+    items: list = Depends(batch_items),
+    atomic: bool = Query(False, description="Any invalid row rejects the whole batch (422)"),
+    db: Session = Depends(get_db),
+):
+    return _apply_batch(db, FACT_VOLUME, FactVolumeIn, items, atomic)
+
+@router.post("/manhours/batch", response_model=EntryBatchOut, openapi_extra=_BATCH_BODY)
+def post_manhours_batch(
+    _user=Depends(require_roles(Role.admin, Role.pto, Role.manager)),
+    items: list = Depends(batch_items),
+    atomic: bool = Query(False, description="Any invalid row rejects the whole batch (422)"),
+    db: Session = Depends(get_db),
+):
+    return _apply_batch(db, MANHOURS, ManhoursIn, items, atomic)
+
+@router.post("/pnl/batch", response_model=EntryBatchOut, openapi_extra=_BATCH_BODY)
+def post_pnl_batch(
+    _user=Depends(require_roles(Role.admin, Role.finance, Role.manager)),
+    items: list = Depends(batch_items),
+    atomic: bool = Query(False, description="Any invalid row rejects the whole batch (422)"),
+    db: Session = Depends(get_db),
+):
+    return _apply_batch(db, PNL, PnLIn, items, atomic)
+
+@router.post("/cashflow/batch", response_model=EntryBatchOut, openapi_extra=_BATCH_BODY)
+def post_cashflow_batch(
+    _user=Depends(require_roles(Role.admin, Role.finance, Role.manager)),
+    items: list = Depends(batch_items),
+    atomic: bool = Query(False, description="Any invalid row rejects the whole batch (422)"),
+    db: Session = Depends(get_db),
+):
+    return _apply_batch(db, CASHFLOW, CashflowIn, items, atomic)
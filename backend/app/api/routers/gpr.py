@@ -1,24 +1,31 @@
+import base64
 import datetime as dt
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.core.deps import get_db, require_roles
+from app.core.etag import sync_etag
+from app.core.responses import fast_json
 from app.db.models.user import Role
 from app.db.models.operation import Operation
 from app.db.models.operation_dependency import OperationDependency
-from app.db.models.facts import FactVolumeDaily
 from app.schemas.operations import (
     OperationOut,
     OperationCreate,
     OperationUpdate,
-    OperationGanttOut,
+    OperationUpdateOut,
     DependencyCreate,
     DependencyOut,
     GanttOut,
+    ScheduleBulkIn,
+    ScheduleBulkOut,
+    SearchOut,
 )
 from app.crud.operations import (
     list_operations,
+    search_operations,
+    search_resources,
     create_operation,
     update_operation,
     delete_operation,
@@ -26,7 +33,17 @@ from app.crud.operations import (
     create_dependency,
     delete_dependency,
 )
-from app.services.reports.service import _effective_import_run_id, _apply_import_run_filter
+from app.crud.imports import get_import_run
+from app.services.reports.service import _effective_import_run_id
+from app.services.exports.snapshot import drop_snapshot
+from app.services.schedule.bulk import BulkCycleError, BulkValidationError, apply_bulk
+from app.services.schedule.propagate import apply_operation_change
+from app.services.schedule.service import (
+    fact_qty_by_code,
+    invalidate as invalidate_schedule,
+    is_valid_wbs,
+    project_schedule,
+)
 
 router = APIRouter()
 
@@ -34,59 +51,127 @@ ALLOWED_ROLES_VIEW = (Role.admin, Role.pto, Role.finance, Role.manager, Role.vie
 ALLOWED_ROLES_EDIT = (Role.admin, Role.pto, Role.manager)
 
 
-def _is_valid_wbs(wbs_path: str | None, name: str | None) -> bool:
-    if not wbs_path or not wbs_path.strip():
-        return False
-    nm = (name or "").strip().lower()
-    if nm.startswith("иср"):
-        return False
-    return True
+def _encode_cursor(**values) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, *keys: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return [values[k] for k in keys]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _start_cursor(op: Operation) -> str:
+    return _encode_cursor(s=op.plan_start.isoformat() if op.plan_start else None, c=op.code)
+
+
+def _parse_start_cursor(cursor: str) -> tuple[dt.date | None, str]:
+    start, code = _decode_cursor(cursor, "s", "c")
+    try:
+        return (dt.date.fromisoformat(start) if start else None), str(code)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_rank_cursor(cursor: str) -> tuple[float, str]:
+    score, code = _decode_cursor(cursor, "r", "c")
+    try:
+        return float(score), str(code)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _operation_out(op: Operation, wbs_path: str | None) -> OperationOut:
+    return OperationOut(
+        id=op.id,
+        project_id=op.project_id,
+        code=op.code,
+        name=op.name,
+        wbs_path=wbs_path,
+        discipline=op.discipline,
+        block=op.block,
+        floor=op.floor,
+        ugpr=op.ugpr,
+        unit=op.unit,
+        plan_qty_total=op.plan_qty_total,
+        plan_start=op.plan_start,
+        plan_finish=op.plan_finish,
+    )
 
 
 @router.get("/operations", response_model=list[OperationOut])
 def get_operations(
+    response: Response,
     project_id: int = Query(...),
     date_from: dt.date | None = Query(None),
     date_to: dt.date | None = Query(None),
     q: str | None = Query(None),
     include_undated: bool = Query(True),
     limit: int = Query(500, ge=1, le=2000),
-    offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    offset: int = Query(0, ge=0, deprecated=True),
     db: Session = Depends(get_db),
     _user=Depends(require_roles(*ALLOWED_ROLES_VIEW)),
 ):
-    rows = list_operations(
-        db,
-        project_id=project_id,
-        date_from=date_from,
-        date_to=date_to,
-        q=q,
-        include_undated=include_undated,
-        limit=limit,
-        offset=offset,
-    )
-    out: list[OperationOut] = []
-    for op, wbs_path in rows:
-        if not _is_valid_wbs(wbs_path, op.name):
-            continue
-        out.append(
-            OperationOut(
-                id=op.id,
-                project_id=op.project_id,
-                code=op.code,
-                name=op.name,
-                wbs_path=wbs_path,
-                discipline=op.discipline,
-                block=op.block,
-                floor=op.floor,
-                ugpr=op.ugpr,
-                unit=op.unit,
-                plan_qty_total=op.plan_qty_total,
-                plan_start=op.plan_start,
-                plan_finish=op.plan_finish,
-            )
+    """
+    Без q — порядок (plan_start, code), с q — по релевантности pg_trgm (код, название, ИСР).
+    Следующая страница: cursor из заголовка X-Next-Cursor (offset оставлен для старых клиентов).
+    """
+    if q and q.strip():
+        rows = search_operations(
+            db,
+            project_id=project_id,
+            q=q,
+            date_from=date_from,
+            date_to=date_to,
+            include_undated=include_undated,
+            limit=limit,
+            after=_parse_rank_cursor(cursor) if cursor else None,
         )
-    return out
+        if len(rows) == limit:
+            response.headers["X-Next-Cursor"] = _encode_cursor(r=float(rows[-1][2]), c=rows[-1][0].code)
+        rows = [(op, wbs_path) for op, wbs_path, _ in rows]
+    else:
+        rows = list_operations(
+            db,
+            project_id=project_id,
+            date_from=date_from,
+            date_to=date_to,
+            include_undated=include_undated,
+            limit=limit,
+            offset=0 if cursor else offset,
+            after=_parse_start_cursor(cursor) if cursor else None,
+        )
+        if len(rows) == limit:
+            response.headers["X-Next-Cursor"] = _start_cursor(rows[-1][0])
+    return [_operation_out(op, wbs_path) for op, wbs_path in rows if is_valid_wbs(wbs_path, op.name)]
+
+
+@router.get("/search", response_model=SearchOut)
+def search(
+    project_id: int = Query(...),
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    _user=Depends(require_roles(*ALLOWED_ROLES_VIEW)),
+):
+    """Быстрый поиск (строка поиска ГПР): операции и ресурсы, по убыванию релевантности."""
+    ops = search_operations(db, project_id=project_id, q=q, limit=limit)
+    resources = search_resources(db, project_id=project_id, q=q, limit=limit)
+    return dict(
+        operations=[
+            dict(id=op.id, code=op.code, name=op.name, wbs_path=wbs_path, score=float(score))
+            for op, wbs_path, score in ops
+            if is_valid_wbs(wbs_path, op.name)
+        ],
+        resources=[
+            dict(id=r.id, name=r.name, category=r.category, score=float(score))
+            for r, score in resources
+        ],
+    )
 
 
 @router.post("/operations", response_model=OperationOut)
@@ -118,18 +203,32 @@ def post_operation(
     )
 
 
-@router.put("/operations/{operation_id}", response_model=OperationOut)
+@router.put("/operations/{operation_id}", response_model=OperationUpdateOut)
 def put_operation(
     operation_id: int,
     data: OperationUpdate,
+    dry_run: bool = Query(False),
     db: Session = Depends(get_db),
     _user=Depends(require_roles(*ALLOWED_ROLES_EDIT)),
 ):
+    """
+    Правка операции с переносом последователей и пересчётом помесячного плана
+    затронутых операций — одной транзакцией. dry_run=true — только набор изменений (what-if).
+    """
     op = db.query(Operation).filter(Operation.id == operation_id).one_or_none()
     if not op:
         raise HTTPException(status_code=404, detail="Operation not found")
-    op = update_operation(db, op, data)
-    return OperationOut(
+    old_code, old_dates, old_qty = op.code, (op.plan_start, op.plan_finish), op.plan_qty_total
+    op = update_operation(db, op, data, commit=False)
+    try:
+        result = apply_operation_change(db, op, old_code, old_dates, old_qty)
+    except ValueError as e:
+        db.rollback()
+        if str(e) == "dependency_cycle":
+            raise HTTPException(status_code=409, detail="Dependency cycle")
+        raise
+
+    out = dict(
         id=op.id,
         project_id=op.project_id,
         code=op.code,
@@ -143,7 +242,22 @@ def put_operation(
         plan_qty_total=op.plan_qty_total,
         plan_start=op.plan_start,
         plan_finish=op.plan_finish,
+        changes=result["changes"],
+        plan_rows=result["plan_rows"],
+        dry_run=dry_run,
     )
+    if dry_run:
+        db.rollback()
+        return out
+
+    db.commit()
+    invalidate_schedule(out["project_id"])
+    if result["plan_rows"] or result["changes"]:
+        run = get_import_run(db, result["import_run_id"]) if result["import_run_id"] else None
+        if run is not None:
+            # план версии изменён — parquet-снимок этой версии больше не актуален
+            drop_snapshot(run)
+    return out
 
 
 @router.delete("/operations/{operation_id}")
@@ -159,6 +273,30 @@ def delete_operation_endpoint(
     return {"status": "ok"}
 
 
+@router.post("/bulk", response_model=ScheduleBulkOut)
+def post_bulk(
+    data: ScheduleBulkIn,
+    db: Session = Depends(get_db),
+    _user=Depends(require_roles(*ALLOWED_ROLES_EDIT)),
+):
+    """Пакет: upsert операций по коду + создание/удаление связей, одной транзакцией."""
+    try:
+        result = apply_bulk(db, data)
+    except BulkValidationError as e:
+        db.rollback()
+        raise HTTPException(status_code=422, detail=e.errors)
+    except BulkCycleError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail={"message": "Dependency cycle", "cycle": e.cycle})
+    db.commit()
+    invalidate_schedule(data.project_id)
+    if result["import_run_id"]:
+        run = get_import_run(db, result["import_run_id"])
+        if run is not None:
+            drop_snapshot(run)
+    return result
+
+
 @router.get("/dependencies", response_model=list[DependencyOut])
 def get_dependencies(
     project_id: int = Query(...),
@@ -176,12 +314,13 @@ def post_dependency(
 ):
     if data.predecessor_id == data.successor_id:
         raise HTTPException(status_code=400, detail="predecessor_id and successor_id must differ")
-    dep = create_dependency(db, data.project_id, data.predecessor_id, data.successor_id)
+    dep = create_dependency(db, data.project_id, data.predecessor_id, data.successor_id, lag_days=data.lag_days)
     return DependencyOut(
         id=dep.id,
         project_id=dep.project_id,
         predecessor_id=dep.predecessor_id,
         successor_id=dep.successor_id,
+        lag_days=dep.lag_days,
     )
 
 
@@ -206,9 +345,17 @@ def gantt(
     q: str | None = Query(None),
     include_undated: bool = Query(True),
     import_run_id: int | None = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: str | None = Query(None),
     db: Session = Depends(get_db),
     _user=Depends(require_roles(*ALLOWED_ROLES_VIEW)),
+    _etag=Depends(sync_etag),
 ):
+    """
+    Окно графика: операции, пересекающие [date_from, date_to], страницами по (plan_start, code).
+    Следующая страница — cursor=next_cursor; связи — только касающиеся операций страницы.
+    CPM и накопленный факт берутся из кэша schedule/service.py.
+    """
     ops_rows = list_operations(
         db,
         project_id=project_id,
@@ -216,116 +363,44 @@ def gantt(
         date_to=date_to,
         q=q,
         include_undated=include_undated,
-        limit=2000,
-        offset=0,
+        limit=limit,
+        after=_parse_start_cursor(cursor) if cursor else None,
     )
+    next_cursor = _start_cursor(ops_rows[-1][0]) if len(ops_rows) == limit else None
     ops: list[Operation] = []
     wbs_map: dict[int, str | None] = {}
     for op, wbs_path in ops_rows:
-        if not _is_valid_wbs(wbs_path, op.name):
+        if not is_valid_wbs(wbs_path, op.name):
             continue
         ops.append(op)
         wbs_map[op.id] = wbs_path
 
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
-    fact_q = (
-        db.query(FactVolumeDaily.operation_code, func.coalesce(func.sum(FactVolumeDaily.qty), 0.0).label("qty"))
-        .filter(FactVolumeDaily.project_id == project_id)
-    )
-    if date_from:
-        fact_q = fact_q.filter(FactVolumeDaily.date >= date_from)
-    if date_to:
-        fact_q = fact_q.filter(FactVolumeDaily.date <= date_to)
-    fact_q = _apply_import_run_filter(fact_q, FactVolumeDaily, import_run_id).group_by(FactVolumeDaily.operation_code)
-    fact_rows = fact_q.all()
-    fact_by_code = {r.operation_code: float(r.qty or 0.0) for r in fact_rows}
-
-    deps = list_dependencies(db, project_id)
+    fact_by_code = fact_qty_by_code(db, project_id, import_run_id)
+    schedule = project_schedule(db, project_id)
+
+    deps = list_dependencies(db, project_id, operation_ids=[op.id for op in ops]) if ops else []
     deps_out = [
-        DependencyOut(
+        dict(
             id=d.id,
             project_id=d.project_id,
             predecessor_id=d.predecessor_id,
             successor_id=d.successor_id,
+            lag_days=d.lag_days,
         )
         for d in deps
     ]
 
-    op_by_id = {op.id: op for op in ops}
-    preds: dict[int, list[int]] = {}
-    for d in deps:
-        if d.predecessor_id not in op_by_id or d.successor_id not in op_by_id:
-            continue
-        preds.setdefault(d.successor_id, []).append(d.predecessor_id)
-
-    # Critical path (simple longest path on DAG)
-    nodes = [
-        op.id
-        for op in ops
-        if op.plan_start is not None and op.plan_finish is not None
-    ]
-    if nodes:
-        base_start = min(op_by_id[n].plan_start for n in nodes if op_by_id[n].plan_start is not None)
-    else:
-        base_start = None
-
-    indeg = {n: 0 for n in nodes}
-    succs: dict[int, list[int]] = {}
-    for s, ps in preds.items():
-        if s not in indeg:
-            continue
-        for p in ps:
-            if p not in indeg:
-                continue
-            indeg[s] += 1
-            succs.setdefault(p, []).append(s)
-
-    queue = [n for n in nodes if indeg[n] == 0]
-    topo = []
-    while queue:
-        n = queue.pop(0)
-        topo.append(n)
-        for s in succs.get(n, []):
-            indeg[s] -= 1
-            if indeg[s] == 0:
-                queue.append(s)
-
-    critical_path: list[int] = []
-    if len(topo) == len(nodes) and base_start:
-        es: dict[int, int] = {}
-        ef: dict[int, int] = {}
-        prev: dict[int, int | None] = {}
-        for n in topo:
-            op = op_by_id[n]
-            dur = (op.plan_finish - op.plan_start).days + 1 if op.plan_start and op.plan_finish else 0
-            planned_offset = (op.plan_start - base_start).days if op.plan_start else 0
-            best_pred = None
-            best_ef = planned_offset
-            for p in preds.get(n, []):
-                if p not in ef:
-                    continue
-                if ef[p] > best_ef:
-                    best_ef = ef[p]
-                    best_pred = p
-            es[n] = max(planned_offset, best_ef)
-            ef[n] = es[n] + dur
-            prev[n] = best_pred
-
-        end = max(ef, key=lambda k: ef[k])
-        while end is not None:
-            critical_path.append(end)
-            end = prev.get(end)
-        critical_path.reverse()
-
-    ops_out: list[OperationGanttOut] = []
-    critical_set = set(critical_path)
+    # большой ответ: собираем dict'ы и отдаём через orjson без повторной валидации
+    ops_out: list[dict] = []
+    critical_set = schedule.cpm.critical
     for op in ops:
         fact_qty = fact_by_code.get(op.code, 0.0)
         progress = None
         if op.plan_qty_total and op.plan_qty_total > 0:
             progress = float(fact_qty / op.plan_qty_total * 100.0)
         ops_out.append(
-            OperationGanttOut(
+            dict(
                 id=op.id,
                 project_id=op.project_id,
                 code=op.code,
@@ -341,7 +416,16 @@ def gantt(
                 plan_finish=op.plan_finish,
                 progress_pct=progress,
                 critical=op.id in critical_set,
+                **schedule.operation_fields(op.id),
             )
         )
 
-    return GanttOut(operations=ops_out, dependencies=deps_out, critical_path=critical_path)
+    return fast_json(
+        dict(
+            operations=ops_out,
+            dependencies=deps_out,
+            critical_path=schedule.cpm.critical_path,
+            cycle=schedule.cpm.cycle,
+            next_cursor=next_cursor,
+        )
+    )
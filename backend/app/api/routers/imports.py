@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from pathlib import Path
 import uuid
 import datetime as dt
 
-from app.core.deps import get_db, require_roles
+from app.core.deps import FINANCE_ROLES, get_db, require_roles
 from app.db.models.user import Role
 from app.db.models.import_run import ImportRun
 from app.db.models.import_error import ImportError
@@ -19,9 +20,17 @@ from app.db.models.facts import (
 )
 from app.schemas.imports import ImportRunOut, ImportErrorOut
 from app.services.etl.utils import file_sha256
-from app.services.reports.service import kpi as kpi_calc, plan_fact_table_by as pft_calc
+from app.services.reports.compare import compare_versions
+from app.services.exports.snapshot import (
+    FINANCE_TABLES,
+    SNAPSHOT_TABLES,
+    build_snapshot,
+    drop_snapshot,
+    snapshot_zip_name,
+)
 from app.services.files import ensure_dirs, save_upload
 from app.crud.imports import get_or_create_import_run, list_imports, list_import_errors
+from app.crud.projects import bump_data_version
 from app.worker.tasks import run_import_task
 from app.core.config import settings
 
@@ -56,6 +65,43 @@ def get_errors(
     return list_import_errors(db, import_run_id)
 
 
+def _snapshot_run(db: Session, import_run_id: int) -> ImportRun:
+    run = db.query(ImportRun).filter(ImportRun.id == import_run_id).one_or_none()
+    if not run:
+        raise HTTPException(status_code=404, detail="Import run not found")
+    if run.status not in ("success", "success_with_errors"):
+        raise HTTPException(status_code=409, detail="Snapshot is available only for finished imports")
+    return run
+
+
+@router.get("/{import_run_id}/snapshot.zip")
+def get_snapshot_zip(
+    import_run_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(*ALLOWED_ROLES_VIEW)),
+):
+    run = _snapshot_run(db, import_run_id)
+    # без доступа к финансовым отчётам — архив без БДР/БДДС
+    path = build_snapshot(db, run) / snapshot_zip_name(user.role in FINANCE_ROLES)
+    return FileResponse(str(path), media_type="application/zip", filename=f"import_{run.id}_snapshot.zip")
+
+
+@router.get("/{import_run_id}/snapshot/{table}.parquet")
+def get_snapshot_table(
+    import_run_id: int,
+    table: str,
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(*ALLOWED_ROLES_VIEW)),
+):
+    if table not in SNAPSHOT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table {table}")
+    if table in FINANCE_TABLES and user.role not in FINANCE_ROLES:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    run = _snapshot_run(db, import_run_id)
+    path = build_snapshot(db, run) / f"{table}.parquet"
+    return FileResponse(str(path), media_type="application/vnd.apache.parquet", filename=f"import_{run.id}_{table}.parquet")
+
+
 @router.delete("/{import_run_id}")
 def delete_import_run(
     import_run_id: int,
@@ -81,11 +127,13 @@ def delete_import_run(
 
     db.query(ImportError).filter(ImportError.import_run_id == run.id).delete(synchronize_session=False)
     db.query(ImportRun).filter(ImportRun.id == run.id).delete(synchronize_session=False)
+    bump_data_version(db, run.project_id)
     db.commit()
 
     file_path = Path(settings.UPLOAD_DIR) / f"{run.project_id}_{run.file_hash}.xlsx"
     if file_path.exists():
         file_path.unlink()
+    drop_snapshot(run)
 
     return {"status": "ok"}
 
@@ -128,6 +176,16 @@ def upload_excel(
     return run
 
 
+def _check_runs(db: Session, project_id: int, run_ids: list[int]):
+    found = {
+        rid
+        for (rid,) in db.query(ImportRun.id).filter(ImportRun.project_id == project_id, ImportRun.id.in_(run_ids)).all()
+    }
+    for run_id in run_ids:
+        if run_id not in found:
+            raise HTTPException(status_code=404, detail=f"Import run {run_id} not found")
+
+
 @router.get("/compare")
 def compare_imports(
     project_id: int = Query(...),
@@ -147,78 +205,71 @@ def compare_imports(
 
     dt_from = dt.datetime.strptime(date_from, "%Y-%m-%d").date()
     dt_to = dt.datetime.strptime(date_to, "%Y-%m-%d").date()
+    _check_runs(db, project_id, [run_a, run_b])
 
-    def _check_run(run_id: int):
-        run = db.query(ImportRun).filter(ImportRun.id == run_id, ImportRun.project_id == project_id).one_or_none()
-        if not run:
-            raise HTTPException(status_code=404, detail=f"Import run {run_id} not found")
-        return run
-
-    _check_run(run_a)
-    _check_run(run_b)
-
-    kpi_a = kpi_calc(db, project_id, dt_from, dt_to, wbs_path=wbs_path, import_run_id=run_a)
-    kpi_b = kpi_calc(db, project_id, dt_from, dt_to, wbs_path=wbs_path, import_run_id=run_b)
-
-    table_a = pft_calc(
+    res = compare_versions(
         db,
         project_id,
+        [run_a, run_b],
         dt_from,
         dt_to,
+        reference_run_id=run_a,
         by=by,
         scenario=scenario,
         wbs_path=wbs_path,
-        import_run_id=run_a,
-    )
-    table_b = pft_calc(
-        db,
-        project_id,
-        dt_from,
-        dt_to,
-        by=by,
-        scenario=scenario,
-        wbs_path=wbs_path,
-        import_run_id=run_b,
     )
 
-    map_a = {r["key"]: r for r in table_a.get("rows", [])}
-    map_b = {r["key"]: r for r in table_b.get("rows", [])}
-    keys = sorted(set(map_a.keys()) | set(map_b.keys()))
+    # прежний формат ответа: a / b / delta (b - a)
+    def _plain(item: dict) -> dict:
+        return {k: v for k, v in item.items() if k not in ("import_run_id", "delta")}
+
     rows = []
-    for key in keys:
-        a = map_a.get(key, {"fact": 0.0, "plan": 0.0, "variance": 0.0, "progress_pct": 0.0})
-        b = map_b.get(key, {"fact": 0.0, "plan": 0.0, "variance": 0.0, "progress_pct": 0.0})
-        rows.append(
-            {
-                "key": key,
-                "a": a,
-                "b": b,
-                "delta": {
-                    "fact": float(b["fact"]) - float(a["fact"]),
-                    "plan": float(b["plan"]) - float(a["plan"]),
-                    "variance": float(b["variance"]) - float(a["variance"]),
-                    "progress_pct": float(b["progress_pct"]) - float(a["progress_pct"]),
-                },
-            }
-        )
+    for row in res["table"]["rows"]:
+        a, b = row["runs"]
+        rows.append({"key": row["key"], "a": _plain(a), "b": _plain(b), "delta": b["delta"]})
 
+    kpi_a, kpi_b = res["kpi"]
     return {
         "project_id": project_id,
         "run_a": run_a,
         "run_b": run_b,
-        "period": {"date_from": dt_from.isoformat(), "date_to": dt_to.isoformat()},
-        "kpi": {
-            "a": kpi_a,
-            "b": kpi_b,
-            "delta": {
-                "fact_qty": kpi_b["fact_qty"] - kpi_a["fact_qty"],
-                "plan_qty": kpi_b["plan_qty"] - kpi_a["plan_qty"],
-                "progress_pct": kpi_b["progress_pct"] - kpi_a["progress_pct"],
-                "manhours": kpi_b["manhours"] - kpi_a["manhours"],
-                "productivity": (
-                    (kpi_b["productivity"] or 0.0) - (kpi_a["productivity"] or 0.0)
-                ),
-            },
-        },
+        "period": res["period"],
+        "kpi": {"a": _plain(kpi_a), "b": _plain(kpi_b), "delta": kpi_b["delta"]},
         "table": {"by": by, "scenario": scenario, "rows": rows},
     }
+
+
+@router.get("/compare/versions")
+def compare_import_versions(
+    project_id: int = Query(...),
+    run_ids: list[int] = Query(..., description="Import run ids in display order"),
+    reference_run_id: int | None = Query(None, description="Deltas are computed against this run (default: first)"),
+    date_from: dt.date = Query(...),
+    date_to: dt.date = Query(...),
+    by: str = Query("wbs", pattern="^(wbs|discipline|block|floor|ugpr)$"),
+    scenario: str = Query("plan", pattern="^(plan|forecast|actual)$"),
+    wbs_path: str | None = Query(None),
+    db: Session = Depends(get_db),
+    _user=Depends(require_roles(*ALLOWED_ROLES_VIEW)),
+):
+    _ensure_project_exists(db, project_id)
+    run_ids = list(dict.fromkeys(run_ids))
+    if len(run_ids) < 2:
+        raise HTTPException(status_code=400, detail="At least two different run_ids are required")
+    if len(run_ids) > settings.COMPARE_MAX_RUNS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.COMPARE_MAX_RUNS} runs can be compared")
+    if reference_run_id is not None and reference_run_id not in run_ids:
+        raise HTTPException(status_code=400, detail="reference_run_id must be one of run_ids")
+    _check_runs(db, project_id, run_ids)
+
+    return compare_versions(
+        db,
+        project_id,
+        run_ids,
+        date_from,
+        date_to,
+        reference_run_id=reference_run_id,
+        by=by,
+        scenario=scenario,
+        wbs_path=wbs_path,
+    )
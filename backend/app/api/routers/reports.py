@@ -1,12 +1,18 @@
 import datetime as dt
-from fastapi import APIRouter, Depends, Query
+import time
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import FileResponse
 
-from app.core.deps import get_db, require_roles
+from app.core.concurrency import concurrency_limit
+from app.core.deps import FINANCE_ROLES, get_async_db, get_report_db, require_roles
+from app.core.etag import report_etag
+from app.core.responses import fast_json
 from app.db.models.user import Role
 from app.schemas.reports import (
     KPIOut,
+    PortfolioKPIOut,
     PlanFactSeries,
     PlanFactTable,
     MoneySeriesOut,
@@ -15,8 +21,12 @@ from app.schemas.reports import (
     FloorSummaryOut,
     FloorOperationOut,
     FloorSeriesOut,
+    ReportBatchIn,
+    ReportBatchOut,
+    ExportJobIn,
+    ExportJobOut,
 )
-from app.services.reports.service import (
+from app.services.reports.aio import (
     kpi as kpi_calc,
     plan_fact_series as pfs_calc,
     plan_fact_table_by as pft_calc,
@@ -31,41 +41,91 @@ from app.services.reports.service import (
     floor_operations as floor_operations_calc,
     floor_series as floor_series_calc,
 )
-from app.services.exports.exporter import export_plan_fact_xlsx, export_kpi_pdf, default_export_path
+from app.services.reports.aio import portfolio_kpi as portfolio_kpi_calc, run_batch
+from app.services.reports.batch import spec_key
+from app.services.reports import service
+from app.services.reports.forecast import FORECAST_MODELS
+from app.services.exports.exporter import export_kpi_pdf, default_export_path
+from app.services.exports.jobs import (
+    FINANCE_SHEETS,
+    enqueue_pending,
+    export_enqueued_at,
+    export_file,
+    export_params,
+    params_hash,
+    read_export_meta,
+    ready_file,
+    write_export_meta,
+)
+from app.worker.tasks import build_export_task
 from app.core.config import settings
 
 router = APIRouter()
 
+FORECAST_MODEL_PATTERN = "^(" + "|".join(FORECAST_MODELS) + ")$"
+
 def _parse_date(s: str) -> dt.date:
     return dt.datetime.strptime(s, "%Y-%m-%d").date()
 
 @router.get("/kpi", response_model=KPIOut)
-def kpi(
+async def kpi(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("kpi")),
 ):
-    return kpi_calc(db, project_id, date_from, date_to, wbs_path=wbs_path, import_run_id=import_run_id)
+    return await kpi_calc(db, project_id, date_from, date_to, wbs_path=wbs_path, import_run_id=import_run_id)
+
+@router.get("/portfolio/kpi", response_model=PortfolioKPIOut)
+async def portfolio_kpi(
+    date_from: dt.date = Query(...),
+    date_to: dt.date = Query(...),
+    sort: str = Query("code", pattern="^(code|name|fact_qty|plan_qty|progress_pct|manhours|productivity)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _slot=Depends(concurrency_limit("portfolio_kpi")),
+):
+    """KPI всех проектов в их последних версиях импорта; сортировка и страницы — по показателям."""
+    return await portfolio_kpi_calc(db, date_from, date_to, sort=sort, order=order, limit=limit, offset=offset)
 
 @router.get("/plan-fact/series", response_model=PlanFactSeries)
-def plan_fact_series(
+async def plan_fact_series(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     granularity: str = Query("month", pattern="^(day|week|month)$"),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    forecast_model: str = Query("linear", pattern=FORECAST_MODEL_PATTERN),
+    max_points: int | None = Query(None, ge=3),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("plan_fact_series")),
 ):
-    return pfs_calc(db, project_id, date_from, date_to, granularity=granularity, wbs_path=wbs_path, import_run_id=import_run_id)
+    data = await pfs_calc(
+        db,
+        project_id,
+        date_from,
+        date_to,
+        granularity=granularity,
+        wbs_path=wbs_path,
+        import_run_id=import_run_id,
+        forecast_model=forecast_model,
+        max_points=max_points,
+    )
+    return fast_json(data)
 
 @router.get("/plan-fact/table", response_model=PlanFactTable)
-def plan_fact_table(
+async def plan_fact_table(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
@@ -73,115 +133,167 @@ def plan_fact_table(
     scenario: str = Query("plan", pattern="^(plan|forecast|actual)$"),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    forecast_model: str = Query("linear", pattern=FORECAST_MODEL_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("plan_fact_table")),
 ):
-    return pft_calc(db, project_id, date_from, date_to, by=by, scenario=scenario, wbs_path=wbs_path, import_run_id=import_run_id)
+    data = await pft_calc(
+        db,
+        project_id,
+        date_from,
+        date_to,
+        by=by,
+        scenario=scenario,
+        wbs_path=wbs_path,
+        import_run_id=import_run_id,
+        forecast_model=forecast_model,
+    )
+    return fast_json(data)
 
 @router.get("/pnl")
-def pnl(
+async def pnl(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     scenario: str = Query("plan"),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("pnl")),
 ):
-    return pnl_calc(db, project_id, date_from, date_to, scenario=scenario, import_run_id=import_run_id)
+    return await pnl_calc(db, project_id, date_from, date_to, scenario=scenario, import_run_id=import_run_id)
 
 @router.get("/cashflow")
-def cashflow(
+async def cashflow(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     scenario: str = Query("plan"),
     opening_balance: float = Query(settings.OPENING_CASH_BALANCE),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("cashflow")),
 ):
-    return cf_calc(db, project_id, date_from, date_to, scenario=scenario, opening_balance=opening_balance, import_run_id=import_run_id)
+    return await cf_calc(db, project_id, date_from, date_to, scenario=scenario, opening_balance=opening_balance, import_run_id=import_run_id)
 
 @router.get("/ugpr/series", response_model=MoneySeriesOut)
-def ugpr_series(
+async def ugpr_series(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     granularity: str = Query("month", pattern="^(day|week|month)$"),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    max_points: int | None = Query(None, ge=3),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("ugpr_series")),
 ):
-    return ugpr_calc(db, project_id, date_from, date_to, granularity=granularity, wbs_path=wbs_path, import_run_id=import_run_id)
+    data = await ugpr_calc(
+        db,
+        project_id,
+        date_from,
+        date_to,
+        granularity=granularity,
+        wbs_path=wbs_path,
+        import_run_id=import_run_id,
+        max_points=max_points,
+    )
+    return fast_json(data)
 
 
 @router.get("/ugpr/table", response_model=UgprTableOut)
-def ugpr_table(
+async def ugpr_table(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("ugpr_table")),
 ):
-    return ugpr_table_calc(db, project_id, date_from, date_to, wbs_path=wbs_path, import_run_id=import_run_id)
+    data = await ugpr_table_calc(db, project_id, date_from, date_to, wbs_path=wbs_path, import_run_id=import_run_id)
+    return fast_json(data)
 
 
 @router.get("/manhours/series", response_model=PlanFactSeries)
-def manhours_series(
+async def manhours_series(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     granularity: str = Query("month", pattern="^(day|week|month)$"),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    max_points: int | None = Query(None, ge=3),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("manhours_series")),
 ):
-    return manhours_series_calc(db, project_id, date_from, date_to, granularity=granularity, import_run_id=import_run_id)
+    data = await manhours_series_calc(
+        db,
+        project_id,
+        date_from,
+        date_to,
+        granularity=granularity,
+        import_run_id=import_run_id,
+        max_points=max_points,
+    )
+    return fast_json(data)
 
 
 @router.get("/sales/kpi", response_model=SalesKPIOut)
-def sales_kpi(
+async def sales_kpi(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("sales_kpi")),
 ):
-    return sales_kpi_calc(db, project_id, date_from, date_to, import_run_id=import_run_id)
+    return await sales_kpi_calc(db, project_id, date_from, date_to, import_run_id=import_run_id)
 
 
 @router.get("/sales/series", response_model=PlanFactSeries)
-def sales_series(
+async def sales_series(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("sales_series")),
 ):
-    return sales_series_calc(db, project_id, date_from, date_to, import_run_id=import_run_id)
+    return await sales_series_calc(db, project_id, date_from, date_to, import_run_id=import_run_id)
 
 
 @router.get("/floors/summary", response_model=FloorSummaryOut)
-def floors_summary(
+async def floors_summary(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("floors_summary")),
 ):
-    return floor_summary_calc(db, project_id, date_from, date_to, wbs_path=wbs_path, import_run_id=import_run_id)
+    return await floor_summary_calc(db, project_id, date_from, date_to, wbs_path=wbs_path, import_run_id=import_run_id)
 
 
 @router.get("/floors/operations", response_model=FloorOperationOut)
-def floor_operations(
+async def floor_operations(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
@@ -189,10 +301,12 @@ def floor_operations(
     block: str | None = Query(None),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("floor_operations")),
 ):
-    return floor_operations_calc(
+    return await floor_operations_calc(
         db,
         project_id,
         date_from,
@@ -205,7 +319,7 @@ def floor_operations(
 
 
 @router.get("/floors/series", response_model=FloorSeriesOut)
-def floor_series(
+async def floor_series(
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
@@ -213,10 +327,12 @@ def floor_series(
     block: str | None = Query(None),
     wbs_path: str | None = Query(None),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+    _etag=Depends(report_etag),
+    _slot=Depends(concurrency_limit("floor_series")),
 ):
-    return floor_series_calc(
+    return await floor_series_calc(
         db,
         project_id,
         date_from,
@@ -227,19 +343,68 @@ def floor_series(
         import_run_id=import_run_id,
     )
 
+# Финансовые отчёты доступны не всем ролям (см. /pnl и /cashflow)
+_BATCH_REPORT_ROLES = {
+    "pnl": FINANCE_ROLES,
+    "cashflow": FINANCE_ROLES,
+}
+
+
+@router.post("/batch", response_model=ReportBatchOut)
+async def reports_batch(
+    payload: ReportBatchIn,
+    db: AsyncSession = Depends(get_async_db),
+    _slot=Depends(concurrency_limit("reports_batch")),
+    user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager, Role.viewer)),
+):
+    specs = [s.model_dump() for s in payload.reports]
+    seen: set[str] = set()
+    for spec in specs:
+        key = spec_key(spec)
+        if key in seen:
+            raise HTTPException(status_code=422, detail=f"duplicate_report_id:{key}")
+        seen.add(key)
+        roles = _BATCH_REPORT_ROLES.get(spec["report"])
+        if roles and user.role not in roles:
+            raise HTTPException(status_code=403, detail="Forbidden")
+        if spec["report"] in ("floor_operations", "floor_series") and not spec.get("floor"):
+            raise HTTPException(status_code=422, detail=f"floor_required:{key}")
+    data = await run_batch(
+        db,
+        payload.project_id,
+        payload.date_from,
+        payload.date_to,
+        specs,
+        wbs_path=payload.wbs_path,
+        import_run_id=payload.import_run_id,
+    )
+    return fast_json(data)
+
+EXPORT_ROLES = (Role.admin, Role.pto, Role.finance, Role.manager)
+_JOB_ID_PATTERN = "^[0-9a-f]{32}$"
+
+
 @router.get("/export/plan-fact.xlsx")
 def export_plan_fact(
+    response: Response,
     project_id: int = Query(...),
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
-    _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager)),
+    db: Session = Depends(get_report_db),
+    _user=Depends(require_roles(*EXPORT_ROLES)),
 ):
-    data = pfs_calc(db, project_id, date_from, date_to, granularity="month", import_run_id=import_run_id)
-    out = default_export_path(f"plan_fact_{project_id}", "xlsx")
-    export_plan_fact_xlsx(data, out)
-    return FileResponse(str(out), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", filename=out.name)
+    """
+    Обёртка над фоновой выгрузкой листа plan_fact: готовый файл отдаётся сразу,
+    иначе задача ставится в очередь и возвращается 202 со статусом (как POST /exports).
+    """
+    params = export_params(db, project_id, date_from, date_to, ["plan_fact"], import_run_id=import_run_id)
+    job_id, status = _enqueue_export(params)
+    if status == "ready":
+        return _export_response(job_id)
+    response.status_code = 202
+    response.headers["Location"] = f"/reports/exports/{job_id}"
+    return _export_job_out(job_id, status)
 
 @router.get("/export/kpi.pdf")
 def export_kpi(
@@ -247,10 +412,105 @@ def export_kpi(
     date_from: dt.date = Query(...),
     date_to: dt.date = Query(...),
     import_run_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     _user=Depends(require_roles(Role.admin, Role.pto, Role.finance, Role.manager)),
 ):
-    data = kpi_calc(db, project_id, date_from, date_to, import_run_id=import_run_id)
+    data = service.kpi(db, project_id, date_from, date_to, import_run_id=import_run_id)
     out = default_export_path(f"kpi_{project_id}", "pdf")
     export_kpi_pdf(data, out)
     return FileResponse(str(out), media_type="application/pdf", filename=out.name)
+
+
+
+
+def _export_job_out(job_id: str, status: str) -> dict:
+    url = f"/reports/exports/{job_id}/download" if status == "ready" else None
+    return {"job_id": job_id, "status": status, "download_url": url}
+
+
+def _enqueue_export(params: dict) -> tuple[str, str]:
+    """
+    (job_id, статус); готовый свежий файл переиспользуется, иначе задача ставится в очередь —
+    один раз: повторно только после FAILURE или если отметка постановки устарела.
+    """
+    job_id = params_hash(params)
+    enqueued_at = export_enqueued_at(job_id)
+    if ready_file(job_id):
+        status = "ready"
+    else:
+        status = _export_job_status(job_id)
+        if status != "running" and (status == "failed" or not enqueue_pending(job_id, enqueued_at)):
+            if status == "failed":
+                # иначе FAILURE держится до конца нового запуска и каждый запрос ставил бы задачу снова
+                build_export_task.AsyncResult(f"export-{job_id}").forget()
+            build_export_task.apply_async(args=[job_id, params], task_id=f"export-{job_id}")
+            enqueued_at = time.time()
+        if status != "running":
+            status = "queued"
+    write_export_meta(job_id, params, enqueued_at)
+    return job_id, status
+
+
+def _export_access(job_id: str, user) -> None:
+    """job_id предсказуем — доступ к финансовым листам проверяется по сохранённым параметрам."""
+    params = read_export_meta(job_id)
+    if params is None:
+        raise HTTPException(status_code=404, detail="Export not found or expired")
+    if user.role not in FINANCE_ROLES and set(params["sheets"]) & set(FINANCE_SHEETS):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def _export_response(job_id: str) -> FileResponse:
+    out = export_file(job_id)
+    return FileResponse(str(out), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", filename=out.name)
+
+
+def _export_job_status(job_id: str) -> str:
+    if export_file(job_id).exists():
+        return "ready"
+    state = build_export_task.AsyncResult(f"export-{job_id}").state
+    if state in ("STARTED", "RETRY"):
+        return "running"
+    if state == "FAILURE":
+        return "failed"
+    return "queued"
+
+
+@router.post("/exports", response_model=ExportJobOut)
+def create_export(
+    payload: ExportJobIn,
+    db: Session = Depends(get_report_db),
+    user=Depends(require_roles(*EXPORT_ROLES)),
+):
+    if user.role not in FINANCE_ROLES and set(payload.sheets) & set(FINANCE_SHEETS):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    params = export_params(
+        db,
+        payload.project_id,
+        payload.date_from,
+        payload.date_to,
+        payload.sheets,
+        scenario=payload.scenario,
+        import_run_id=payload.import_run_id,
+    )
+    return _export_job_out(*_enqueue_export(params))
+
+
+@router.get("/exports/{job_id}", response_model=ExportJobOut)
+def get_export(
+    job_id: str = Path(..., pattern=_JOB_ID_PATTERN),
+    user=Depends(require_roles(*EXPORT_ROLES)),
+):
+    _export_access(job_id, user)
+    return _export_job_out(job_id, _export_job_status(job_id))
+
+
+@router.get("/exports/{job_id}/download")
+def download_export(
+    job_id: str = Path(..., pattern=_JOB_ID_PATTERN),
+    user=Depends(require_roles(*EXPORT_ROLES)),
+):
+    _export_access(job_id, user)
+    if not export_file(job_id).exists():
+        raise HTTPException(status_code=404, detail="Export not found or expired")
+    return _export_response(job_id)
@@ -0,0 +1,69 @@
+"""
+Кэш текущего пользователя в процессе: (login, iat токена) -> Principal, TTL + LRU.
+
+Параллельные запросы дашборда с одним токеном не ходят в БД за пользователем.
+Изменение роли/активности через /admin/users сбрасывает записи логина в этом процессе;
+в остальных процессах устаревшая запись живёт не дольше AUTH_CACHE_TTL_SECONDS.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.metrics import cache_lookup
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Снимок пользователя, не привязанный к сессии БД."""
+    id: int
+    login: str
+    full_name: str | None
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        role = user.role.value if hasattr(user.role, "value") else str(user.role)
+        return cls(id=user.id, login=user.login, full_name=user.full_name, role=role, is_active=bool(user.is_active))
+
+
+# (login, iat) -> (истекает, Principal)
+_cache: OrderedDict[tuple[str, int | None], tuple[float, Principal]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def get(login: str, iat: int | None) -> Principal | None:
+    key = (login, iat)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] < time.monotonic():
+            del _cache[key]
+            hit = None
+        if hit is not None:
+            _cache.move_to_end(key)
+    cache_lookup("auth", hit is not None)
+    return hit[1] if hit is not None else None
+
+
+def put(iat: int | None, principal: Principal) -> None:
+    if settings.AUTH_CACHE_TTL_SECONDS <= 0:
+        return
+    key = (principal.login, iat)
+    with _lock:
+        _cache[key] = (time.monotonic() + settings.AUTH_CACHE_TTL_SECONDS, principal)
+        _cache.move_to_end(key)
+        while len(_cache) > settings.AUTH_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate(login: str) -> None:
+    with _lock:
+        for key in [k for k in _cache if k[0] == login]:
+            del _cache[key]
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,115 @@
+"""
+Сжатие ответов (brotli / gzip) + метрики размера и сериализации.
+
+Сжимаются только текстовые типы (JSON, text/*, csv) больше COMPRESSION_MIN_SIZE;
+файлы (xlsx, zip, parquet, pdf) и ответы с уже заданным Content-Encoding проходят как есть.
+"""
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+from app.core.metrics import RESPONSE_BODY_BYTES, RESPONSE_SERIALIZE_SECONDS, RESPONSE_WIRE_BYTES, route_label
+from app.core.responses import SERIALIZE_TIMING_HEADER
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него остаётся gzip
+    brotli = None
+
+_COMPRESSIBLE = ("application/json", "text/", "application/csv", "application/javascript")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(token.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message = None
+        chunks: list[bytes] = []
+        passthrough = False
+        passthrough_bytes = 0
+
+        async def _send(message):
+            nonlocal start_message, passthrough, passthrough_bytes
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                serialize_ms = headers.get(SERIALIZE_TIMING_HEADER)
+                if serialize_ms is not None:
+                    del headers[SERIALIZE_TIMING_HEADER]
+                    RESPONSE_SERIALIZE_SECONDS.labels(route_label(scope)).observe(float(serialize_ms) / 1000.0)
+                message["headers"] = headers.raw
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    encoding is None
+                    or "content-encoding" in headers
+                    or not content_type.startswith(_COMPRESSIBLE)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                passthrough_bytes += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    RESPONSE_WIRE_BYTES.labels(route_label(scope), "identity").observe(passthrough_bytes)
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            route = route_label(scope)
+            RESPONSE_BODY_BYTES.labels(route).observe(len(body))
+            headers = MutableHeaders(raw=start_message["headers"])
+            used = "identity"
+            if len(body) >= self.minimum_size:
+                body = compress(body, encoding)
+                used = encoding
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and etag.endswith('"'):
+                    # сильный ETag различается по представлению (ср. Apache mod_deflate)
+                    headers["etag"] = f'{etag[:-1]}-{encoding}"'
+
+            RESPONSE_WIRE_BYTES.labels(route, used).observe(len(body))
+            start_message["headers"] = headers.raw
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, _send)
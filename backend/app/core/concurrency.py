@@ -0,0 +1,65 @@
+import asyncio
+from functools import partial
+
+import anyio
+from fastapi import HTTPException
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+from app.core.config import settings
+
+_semaphores: dict[str, asyncio.Semaphore] = {}
+_cpu_limiter: anyio.CapacityLimiter | None = None
+
+
+def _parse_limits(raw: str) -> dict[str, int]:
+    out = {}
+    for part in raw.split(","):
+        name, sep, value = part.partition("=")
+        if sep and name.strip() and value.strip():
+            out[name.strip()] = int(value)
+    return out
+
+
+_LIMITS = _parse_limits(settings.REPORT_CONCURRENCY_LIMITS)
+
+
+def limit_for(name: str) -> int:
+    return _LIMITS.get(name, settings.REPORT_CONCURRENCY_DEFAULT)
+
+
+def concurrency_limit(name: str):
+    """
+    Dependency: не больше N одновременных выполнений эндпоинта `name`.
+    Лишние запросы ждут слот до REPORT_QUEUE_TIMEOUT секунд, затем 503.
+    """
+    async def _dep():
+        sem = _semaphores.get(name)
+        if sem is None:
+            sem = _semaphores[name] = asyncio.Semaphore(max(limit_for(name), 1))
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=settings.REPORT_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Too many concurrent report requests", headers={"Retry-After": "1"})
+        try:
+            yield
+        finally:
+            sem.release()
+    return _dep
+
+
+def run_cpu(fn, *args, **kwargs):
+    """
+    CPU-часть отчёта (распределение по дням, прогноз, свёртки, LTTB).
+
+    Под AsyncSession.run_sync код отчёта идёт в greenlet на потоке цикла событий: здесь он
+    ждёт (await_only) выполнения fn в отдельном потоке, и цикл тем временем обслуживает
+    другие запросы. Вне greenlet (Celery, прогрев, выгрузки) fn выполняется на месте.
+    fn не должна обращаться к сессии БД.
+    """
+    global _cpu_limiter
+    if not in_greenlet():
+        return fn(*args, **kwargs)
+    if _cpu_limiter is None:
+        _cpu_limiter = anyio.CapacityLimiter(max(settings.REPORT_CPU_THREADS, 1))
+    return await_only(anyio.to_thread.run_sync(partial(fn, *args, **kwargs), limiter=_cpu_limiter))
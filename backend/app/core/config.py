@@ -12,24 +12,91 @@ class Settings(BaseSettings):
     JWT_SECRET: str = Field(default="change-me")
     JWT_ALG: str = Field(default="HS256")
     JWT_EXPIRES_MIN: int = Field(default=60 * 12)
+    # in-process cache of the current user per (login, token iat); 0 disables
+    AUTH_CACHE_TTL_SECONDS: float = Field(default=60.0)
+    AUTH_CACHE_SIZE: int = Field(default=1024)
 
     # DB
     DATABASE_URL: str = Field(default="postgresql+psycopg://app:app@db:5432/app")
+    # pools per workload: oltp (API writes, auth), reports (read-only), import (Celery bulk load)
+    DB_POOL_SIZE: int = Field(default=5)
+    DB_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_TIMEOUT: float = Field(default=30.0)
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=15000)  # 0 = no limit
+    # read replica for report queries; empty = primary (still a separate pool)
+    REPORT_DATABASE_URL: str = Field(default="")
+    REPORT_DB_POOL_SIZE: int = Field(default=5)
+    REPORT_DB_MAX_OVERFLOW: int = Field(default=5)
+    REPORT_DB_POOL_TIMEOUT: float = Field(default=10.0)
+    REPORT_STATEMENT_TIMEOUT_MS: int = Field(default=60000)
+    IMPORT_DB_POOL_SIZE: int = Field(default=2)
+    IMPORT_DB_MAX_OVERFLOW: int = Field(default=2)
+    IMPORT_STATEMENT_TIMEOUT_MS: int = Field(default=0)
+    # async driver for read-only reports; empty = REPORT_DATABASE_URL or DATABASE_URL with psycopg (v3)
+    ASYNC_DATABASE_URL: str = Field(default="")
+    ASYNC_DB_POOL_SIZE: int = Field(default=10)
+    ASYNC_DB_MAX_OVERFLOW: int = Field(default=10)
 
     # CORS
     CORS_ORIGINS: str = Field(default="http://localhost:3000,http://localhost")
 
     # Celery / Redis
     REDIS_URL: str = Field(default="redis://redis:6379/0")
+    # queues whose length /metrics reports; worker metrics HTTP port (0 = off)
+    CELERY_METRICS_QUEUES: str = Field(default="celery")
+    WORKER_METRICS_PORT: int = Field(default=0)
+
+    # HTTP responses
+    FAST_JSON_ENABLED: bool = Field(default=True)  # orjson fast path for large report payloads
+    COMPRESSION_MIN_SIZE: int = Field(default=1024)
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6)
+    COMPRESSION_BROTLI_QUALITY: int = Field(default=4)
+    SCHEDULE_CACHE_SIZE: int = Field(default=64)  # projects with cached CPM per process
+    ETAG_ENABLED: bool = Field(default=True)  # conditional GET for /reports/* and /gpr/gantt
+    # shared report cache in Redis, keyed by data_version + effective import run
+    REPORT_CACHE_ENABLED: bool = Field(default=True)
+    REPORT_CACHE_TTL_SECONDS: int = Field(default=3600)
+    REPORT_CACHE_MAX_BYTES: int = Field(default=4 * 1024 * 1024)  # larger results are not cached
+    REPORT_WARMUP_ENABLED: bool = Field(default=True)  # precompute dashboard reports after import
 
     # Files
     UPLOAD_DIR: str = Field(default="/app/data/uploads")
     EXPORT_DIR: str = Field(default="/app/data/exports")
+    EXPORT_RETENTION_HOURS: float = Field(default=24.0)
+    # identical export requests reuse a file that is younger than this
+    EXPORT_REUSE_MINUTES: float = Field(default=10.0)
+    # a queued export is re-sent to Celery only after this long without a file (lost task)
+    EXPORT_REQUEUE_MINUTES: float = Field(default=30.0)
+    EXPORT_STREAM_BATCH: int = Field(default=2000)
+    SNAPSHOT_BATCH_ROWS: int = Field(default=50000)
+    # import: parse sheets in parallel Celery tasks, staging Parquet on storage shared by workers
+    IMPORT_PARALLEL_PARSE: bool = Field(default=True)
+    IMPORT_STAGING_DIR: str = Field(default="/app/data/staging")
+    # max rows in one POST /entries/*/batch (JSON array or NDJSON)
+    ENTRIES_BATCH_MAX_ROWS: int = Field(default=10000)
 
     # Business defaults
     SHIFT_HOURS: float = Field(default=8.0)
     OPENING_CASH_BALANCE: float = Field(default=0.0)
 
+    # SQL profiler (app/db/instrument.py): fingerprints + N+1 per request/task, slow-query log
+    SQL_PROFILER_ENABLED: bool = Field(default=True)
+    SQL_N_PLUS_ONE_THRESHOLD: int = Field(default=20)  # same fingerprint more than N times
+    SQL_SLOW_QUERY_MS: float = Field(default=1000.0)  # 0 = off
+    SQL_EXPLAIN_SLOW: bool = Field(default=False)  # EXPLAIN (no ANALYZE) of slow SELECTs
+    SQL_EXPLAIN_MAX_PER_REQUEST: int = Field(default=3)
+    SQL_SERVER_TIMING: bool = Field(default=False)  # Server-Timing: db;dur=..
+
+    # Reports
+    COMPARE_MAX_RUNS: int = Field(default=12)
+    # max concurrent executions per report endpoint: default + overrides "kpi=8,plan_fact_table=4"
+    REPORT_CONCURRENCY_DEFAULT: int = Field(default=8)
+    REPORT_CONCURRENCY_LIMITS: str = Field(default="")
+    # seconds a request may wait for a free slot before 503
+    REPORT_QUEUE_TIMEOUT: float = Field(default=30.0)
+    # threads for report post-processing (run_cpu) so it never runs on the event loop
+    REPORT_CPU_THREADS: int = Field(default=4)
+
     # Seed (dev)
     SEED_DEMO: bool = Field(default=True)
     DEMO_ADMIN_LOGIN: str = Field(default="admin")
@@ -2,13 +2,18 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, ReportSessionLocal, AsyncSessionLocal
+from app.core import auth_cache
+from app.core.auth_cache import Principal
 from app.core.security import decode_token
-from app.db.models.user import User, Role
+from app.db.models.user import Role
 from app.crud.users import get_user_by_login
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Финансовые данные (БДР/БДДС): отчёты, выгрузки и снимки — без ПТО
+FINANCE_ROLES = (Role.admin, Role.finance, Role.manager, Role.viewer)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -16,20 +21,40 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def get_report_db():
+    """Read-only сессия пула отчётов (реплика, если задан REPORT_DATABASE_URL)."""
+    db = ReportSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Principal:
     try:
         payload = decode_token(token)
         login = payload.get("sub")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    iat = payload.get("iat")
+    principal = auth_cache.get(login, iat)
+    if principal is not None:
+        return principal
+    # сессия get_db ленивая: соединение берётся из пула только здесь, при промахе кэша
     user = get_user_by_login(db, login)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found/disabled")
-    return user
+    principal = Principal.from_user(user)
+    auth_cache.put(iat, principal)
+    return principal
 
 def require_roles(*roles: Role):
-    def _dep(user: User = Depends(get_current_user)) -> User:
+    def _dep(user: Principal = Depends(get_current_user)) -> Principal:
         if user.role not in roles:
             raise HTTPException(status_code=403, detail="Forbidden")
         return user
     return _dep
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,118 @@
+"""
+Условные GET для отчётов и Ганта (ETag / If-None-Match).
+
+ETag = sha256(путь, параметры запроса, эффективная версия импорта, project.data_version, сегодня).
+Дата — как `_today` в ключе кэша (cache.call_key): колонки «сегодня / неделя / месяц» таблицы УГПР,
+прогноз и просрочка меняются со сменой дня без изменения данных.
+Состояние читается лёгкими запросами по первичному ключу / последней версии импорта
+до расчёта отчёта, поэтому 304 отдаётся без агрегатных запросов.
+data_version увеличивается в той же транзакции, что и изменение ручных данных,
+операций/связей и версий импорта (crud.projects.bump_data_version).
+"""
+import datetime as dt
+import hashlib
+from urllib.parse import urlencode
+
+from fastapi import Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.deps import get_async_db, get_db
+from app.core.metrics import cache_lookup
+from app.services.reports.cache import report_state
+
+CACHE_CONTROL = "private, no-cache"
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def etag_state(db: Session, project_id: int, import_run_id: int | None) -> tuple[int, int | None]:
+    """(data_version проекта, эффективная версия импорта); тем же состоянием строится ключ кэша отчёта."""
+    version, run_id = report_state(db, project_id, import_run_id)
+    return version or 0, run_id
+
+
+def compute_etag(path: str, query_items, data_version: int, import_run_id: int | None, today: dt.date) -> str:
+    raw = "|".join([path, urlencode(sorted(query_items)), str(import_run_id), str(data_version), today.isoformat()])
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    # CompressionMiddleware дописывает кодировку к тегу сжатого ответа
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)]
+    return tag
+
+
+def if_none_match(header: str | None, etag: str) -> bool:
+    """Слабое сравнение по RFC 9110 (для If-None-Match)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = _opaque(etag)
+    return any(_opaque(part) == wanted for part in header.split(",") if part.strip())
+
+
+def _check(request: Request, state: tuple[int, int | None]) -> None:
+    version, run_id = state
+    etag = compute_etag(request.url.path, request.query_params.multi_items(), version, run_id, dt.date.today())
+    matched = if_none_match(request.headers.get("if-none-match"), etag)
+    cache_lookup("etag", matched)
+    if matched:
+        raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    request.state.etag = etag
+
+
+async def report_etag(
+    request: Request,
+    project_id: int = Query(...),
+    import_run_id: int | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Dependency для async-отчётов: 304 до расчёта, иначе ETag ставит ETagMiddleware."""
+    if not settings.ETAG_ENABLED:
+        return
+    _check(request, await db.run_sync(lambda s: etag_state(s, project_id, import_run_id)))
+
+
+def sync_etag(
+    request: Request,
+    project_id: int = Query(...),
+    import_run_id: int | None = Query(None),
+    db: Session = Depends(get_db),
+):
+    """То же для синхронных эндпоинтов (Гант)."""
+    if not settings.ETAG_ENABLED:
+        return
+    _check(request, etag_state(db, project_id, import_run_id))
+
+
+class ETagMiddleware:
+    """Добавляет ETag, рассчитанный dependency, к успешному ответу."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def _send(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = scope.get("state", {}).get("etag")
+                if etag:
+                    headers = MutableHeaders(raw=list(message.get("headers", [])))
+                    headers["etag"] = etag
+                    headers["cache-control"] = CACHE_CONTROL
+                    message["headers"] = headers.raw
+            await send(message)
+
+        await self.app(scope, receive, _send)
@@ -0,0 +1,204 @@
+"""
+Prometheus-метрики приложения (экспорт — GET /metrics).
+
+HTTP: латентность по шаблону маршрута, запросы в работе, SQL на запрос (app/db/instrument.py).
+Состояние пулов соединений и длина очередей Celery снимаются в момент scrape.
+При PROMETHEUS_MULTIPROC_DIR метрики процессов (воркеры Celery, несколько uvicorn) собираются
+через multiprocess-режим prometheus_client.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from app.core.config import settings
+
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+RESPONSE_SERIALIZE_SECONDS = Histogram(
+    "http_response_serialize_seconds",
+    "Time spent serializing a JSON response body",
+    ["route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+RESPONSE_BODY_BYTES = Histogram(
+    "http_response_body_bytes",
+    "Response body size before compression",
+    ["route"],
+    buckets=_SIZE_BUCKETS,
+)
+RESPONSE_WIRE_BYTES = Histogram(
+    "http_response_wire_bytes",
+    "Response body size on the wire (after compression)",
+    ["route", "encoding"],
+    buckets=_SIZE_BUCKETS,
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    multiprocess_mode="livesum",
+)
+HTTP_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+HTTP_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["route"],
+    buckets=_LATENCY_BUCKETS,
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time by connection pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+
+# hit ratio: rate(cache_lookups_total{result="hit"}) / rate(cache_lookups_total)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "In-process and HTTP cache lookups",
+    ["cache", "result"],
+)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class PoolCollector:
+    """Соединения пулов по видам нагрузки (app/db/session.pool_stats)."""
+
+    def describe(self):
+        # без describe() регистрация вызывает collect() — т.е. импорт session при импорте metrics
+        yield GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["pool"])
+        yield GaugeMetricFamily("db_pool_connections", "Pool connections by state", labels=["pool", "state"])
+
+    def collect(self):
+        from app.db.session import pool_stats
+
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["pool"])
+        conns = GaugeMetricFamily("db_pool_connections", "Pool connections by state", labels=["pool", "state"])
+        for name, stats in pool_stats().items():
+            if "size" in stats:
+                size.add_metric([name], stats["size"])
+            for state in ("checkedin", "checkedout", "overflow"):
+                if state in stats:
+                    conns.add_metric([name, state], stats[state])
+        yield size
+        yield conns
+
+
+class CeleryQueueCollector:
+    """Длина очередей Celery в брокере (Redis LLEN); брокер недоступен — метрика пропускается."""
+
+    def __init__(self):
+        self._client = None
+
+    def describe(self):
+        yield GaugeMetricFamily("celery_queue_length", "Messages waiting in a Celery queue", labels=["queue"])
+
+    def collect(self):
+        family = GaugeMetricFamily("celery_queue_length", "Messages waiting in a Celery queue", labels=["queue"])
+        queues = [q.strip() for q in settings.CELERY_METRICS_QUEUES.split(",") if q.strip()]
+        if queues:
+            try:
+                if self._client is None:
+                    import redis
+
+                    self._client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+                for queue in queues:
+                    family.add_metric([queue], self._client.llen(queue))
+            except Exception:
+                self._client = None
+        yield family
+
+
+_COLLECTORS = (PoolCollector(), CeleryQueueCollector())
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    for _collector in _COLLECTORS:
+        REGISTRY.register(_collector)
+
+
+def registry():
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    from prometheus_client import multiprocess
+
+    reg = CollectorRegistry()
+    multiprocess.MultiProcessCollector(reg)
+    for collector in _COLLECTORS:
+        reg.register(collector)
+    return reg
+
+
+def render_latest() -> tuple[bytes, str]:
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Латентность и SQL на запрос по шаблону маршрута (route известен после роутинга)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        from app.db import instrument
+
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = instrument.begin()
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            stats = instrument.current()
+            instrument.end(token)
+            route = route_label(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+            HTTP_DB_STATEMENTS.labels(route).observe(stats.count)
+            HTTP_DB_SECONDS.labels(route).observe(stats.seconds)
@@ -0,0 +1,45 @@
+"""
+Профилирование SQL на HTTP-запрос: N+1 по отпечаткам в лог и (опционально) заголовок
+Server-Timing с временем в БД. Счётчики собирает app/db/instrument.py.
+"""
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.metrics import route_label
+from app.db import instrument
+
+
+def server_timing(stats: instrument.QueryStats) -> str:
+    return f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+
+
+class SQLProfilerMiddleware:
+    """Использует учёт, открытый MetricsMiddleware; без него открывает свой."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = instrument.current()
+        token = None
+        if stats is None:
+            stats = instrument.QueryStats()
+            token = instrument.begin(stats)
+
+        async def _send(message):
+            if message["type"] == "http.response.start" and settings.SQL_SERVER_TIMING:
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                headers.append("server-timing", server_timing(stats))
+                message["headers"] = headers.raw
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            if token is not None:
+                instrument.end(token)
+            instrument.report(stats, method=scope["method"], route=route_label(scope), path=scope["path"])
@@ -0,0 +1,34 @@
+import time
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+SERIALIZE_TIMING_HEADER = "x-serialize-ms"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Быстрый путь для больших отчётов: dict, уже собранный сервисом, сериализуется orjson
+    без повторной валидации через response_model. Время сериализации передаётся
+    в заголовке, его снимает CompressionMiddleware в метрики.
+    """
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        self.serialize_ms = (time.perf_counter() - started) * 1000.0
+        return body
+
+    def init_headers(self, headers=None) -> None:
+        super().init_headers(headers)
+        self.raw_headers.append((SERIALIZE_TIMING_HEADER.encode(), f"{self.serialize_ms:.3f}".encode()))
+
+
+def fast_json(content: Any):
+    """Ответ эндпоинта: orjson-путь (если включён) или обычный путь через response_model."""
+    if settings.FAST_JSON_ENABLED:
+        return FastJSONResponse(content)
+    return content
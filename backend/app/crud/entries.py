@@ -1,105 +1,115 @@
+from dataclasses import dataclass
+
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 from app.db.models.facts import FactVolumeDaily, FactResourceDaily, FactPnLMonthly, FactCashflowMonthly, PlanVolumeMonthly
+from app.crud.projects import bump_data_version
 from app.schemas.entries import FactVolumeIn, ManhoursIn, PnLIn, CashflowIn
 
-def upsert_fact_volume(db: Session, data: FactVolumeIn):
-    stmt = insert(FactVolumeDaily).values(
-        project_id=data.project_id,
-        import_run_id=None,
-        operation_code=data.operation_code,
-        operation_name=data.operation_name,
-        wbs=data.wbs,
-        discipline=data.discipline,
-        block=data.block,
-        floor=data.floor,
-        ugpr=data.ugpr,
-        category=data.category,
-        item_name=data.item_name,
-        unit=data.unit,
-        date=data.date,
-        qty=data.qty,
-        amount=data.amount,
-    ).on_conflict_do_update(
-        index_elements=[
-            FactVolumeDaily.project_id,
-            FactVolumeDaily.operation_code,
-            FactVolumeDaily.category,
-            FactVolumeDaily.item_name,
-            FactVolumeDaily.date,
-        ],
-        index_where=FactVolumeDaily.import_run_id.is_(None),
-        set_=dict(qty=data.qty, amount=data.amount, operation_name=data.operation_name, wbs=data.wbs,
-                  discipline=data.discipline, block=data.block, floor=data.floor, ugpr=data.ugpr, unit=data.unit),
+# строк в одном INSERT: ~15 колонок * 1000 строк укладывается в лимит параметров PostgreSQL
+_CHUNK_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class EntryTable:
+    model: type
+    key: tuple[str, ...]  # колонки частичного уникального индекса ручных строк (кроме project_id)
+    update: tuple[str, ...]
+
+
+FACT_VOLUME = EntryTable(
+    FactVolumeDaily,
+    key=("operation_code", "category", "item_name", "date"),
+    update=("qty", "amount", "operation_name", "wbs", "discipline", "block", "floor", "ugpr", "unit"),
+)
+MANHOURS = EntryTable(
+    FactResourceDaily,
+    key=("resource_name", "category", "date", "scenario"),
+    update=("qty", "manhours"),
+)
+PNL = EntryTable(
+    FactPnLMonthly,
+    key=("account_name", "month", "scenario"),
+    update=("amount", "parent_name"),
+)
+CASHFLOW = EntryTable(
+    FactCashflowMonthly,
+    key=("account_name", "month", "scenario"),
+    update=("amount", "parent_name", "direction"),
+)
+
+
+def _upsert_stmt(table: EntryTable, rows: list[dict]):
+    model = table.model
+    stmt = insert(model).values([{**r, "import_run_id": None} for r in rows])
+    return stmt.on_conflict_do_update(
+        index_elements=[model.project_id, *(getattr(model, c) for c in table.key)],
+        index_where=model.import_run_id.is_(None),
+        set_={c: stmt.excluded[c] for c in table.update},
     )
-    db.execute(stmt)
+
+
+def _row_key(table: EntryTable, row: dict) -> tuple:
+    return (row["project_id"], *(row[c] for c in table.key))
+
+
+def _existing_keys(db: Session, table: EntryTable, keys: list[tuple]) -> set[tuple]:
+    model = table.model
+    cols = [model.project_id, *(getattr(model, c) for c in table.key)]
+    found: set[tuple] = set()
+    for i in range(0, len(keys), _CHUNK_ROWS):
+        chunk = keys[i:i + _CHUNK_ROWS]
+        found.update(
+            tuple(r)
+            for r in db.query(*cols).filter(model.import_run_id.is_(None), tuple_(*cols).in_(chunk))
+        )
+    return found
+
+
+def upsert_batch(db: Session, table: EntryTable, rows: list[dict]) -> list[str]:
+    """
+    Многострочный upsert ручных строк (import_run_id IS NULL) одной таблицы без коммита.
+    Возвращает исход по каждой строке: created / updated / superseded (тот же ключ ниже в пакете —
+    один INSERT ... ON CONFLICT не может обновить строку дважды, побеждает последняя).
+    Строка с NULL в ключе всегда created: для уникального индекса NULL не равны друг другу,
+    ON CONFLICT на ней не срабатывает.
+    data_version проектов увеличивается один раз на пакет.
+    """
+    keys = [_row_key(table, r) for r in rows]
+    last = {k: i for i, k in enumerate(keys) if None not in k}
+    existing = _existing_keys(db, table, list(last))
+
+    outcomes = []
+    for i, k in enumerate(keys):
+        if None in k:
+            outcomes.append("created")
+        elif last[k] != i:
+            outcomes.append("superseded")
+        else:
+            outcomes.append("updated" if k in existing else "created")
+
+    unique_rows = [r for r, status in zip(rows, outcomes) if status != "superseded"]
+    for i in range(0, len(unique_rows), _CHUNK_ROWS):
+        db.execute(_upsert_stmt(table, unique_rows[i:i + _CHUNK_ROWS]))
+    for project_id in sorted({r["project_id"] for r in unique_rows}):
+        bump_data_version(db, project_id)
+    return outcomes
+
+
+def _upsert_one(db: Session, table: EntryTable, data):
+    db.execute(_upsert_stmt(table, [data.model_dump()]))
+    bump_data_version(db, data.project_id)
     db.commit()
 
+def upsert_fact_volume(db: Session, data: FactVolumeIn):
+    _upsert_one(db, FACT_VOLUME, data)
+
 def upsert_manhours(db: Session, data: ManhoursIn):
-    stmt = insert(FactResourceDaily).values(
-        project_id=data.project_id,
-        import_run_id=None,
-        resource_name=data.resource_name,
-        category=data.category,
-        date=data.date,
-        scenario=data.scenario,
-        qty=data.qty,
-        manhours=data.manhours,
-    ).on_conflict_do_update(
-        index_elements=[
-            FactResourceDaily.project_id,
-            FactResourceDaily.resource_name,
-            FactResourceDaily.category,
-            FactResourceDaily.date,
-            FactResourceDaily.scenario,
-        ],
-        index_where=FactResourceDaily.import_run_id.is_(None),
-        set_=dict(qty=data.qty, manhours=data.manhours),
-    )
-    db.execute(stmt)
-    db.commit()
+    _upsert_one(db, MANHOURS, data)
 
 def upsert_pnl(db: Session, data: PnLIn):
-    stmt = insert(FactPnLMonthly).values(
-        project_id=data.project_id,
-        import_run_id=None,
-        account_name=data.account_name,
-        parent_name=data.parent_name,
-        month=data.month,
-        scenario=data.scenario,
-        amount=data.amount,
-    ).on_conflict_do_update(
-        index_elements=[
-            FactPnLMonthly.project_id,
-            FactPnLMonthly.account_name,
-            FactPnLMonthly.month,
-            FactPnLMonthly.scenario,
-        ],
-        index_where=FactPnLMonthly.import_run_id.is_(None),
-        set_=dict(amount=data.amount, parent_name=data.parent_name),
-    )
-    db.execute(stmt)
-    db.commit()
+    _upsert_one(db, PNL, data)
 
 def upsert_cashflow(db: Session, data: CashflowIn):
-    stmt = insert(FactCashflowMonthly).values(
-        project_id=data.project_id,
-        import_run_id=None,
-        account_name=data.account_name,
-        parent_name=data.parent_name,
-        month=data.month,
-        scenario=data.scenario,
-        direction=data.direction,
-        amount=data.amount,
-    ).on_conflict_do_update(
-        index_elements=[
-            FactCashflowMonthly.project_id,
-            FactCashflowMonthly.account_name,
-            FactCashflowMonthly.month,
-            FactCashflowMonthly.scenario,
-        ],
-        index_where=FactCashflowMonthly.import_run_id.is_(None),
-        set_=dict(amount=data.amount, parent_name=data.parent_name, direction=data.direction),
-    )
-    db.execute(stmt)
-    db.commit()
+    _upsert_one(db, CASHFLOW, data)
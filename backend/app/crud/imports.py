@@ -2,6 +2,7 @@ import datetime as dt
 from sqlalchemy.orm import Session
 from app.db.models.import_run import ImportRun
 from app.db.models.import_error import ImportError
+from app.crud.projects import bump_data_version
 from app.services.etl.validators import ValidationError
 
 def get_import_run(db: Session, import_run_id: int) -> ImportRun | None:
@@ -33,6 +34,9 @@ def set_import_status(
         run.finished_at = finished_at
     if rows_loaded is not None:
         run.rows_loaded = rows_loaded
+    if finished_at is not None:
+        # импорт завершён (в т.ч. с ошибкой): эффективная версия и график могли измениться
+        bump_data_version(db, run.project_id)
     db.commit()
 
 def list_imports(db: Session, project_id: int):
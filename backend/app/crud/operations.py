@@ -1,14 +1,18 @@
 import datetime as dt
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import Float, and_, cast, func, or_, select, tuple_, union
 
 from app.db.models.operation import Operation
 from app.db.models.operation_dependency import OperationDependency
 from app.db.models.wbs import WBS
+from app.db.models.resource import Resource
+from app.crud.projects import bump_data_version
+from app.services.schedule.service import invalidate as invalidate_schedule
 from app.schemas.operations import OperationCreate, OperationUpdate
 
 
-def _get_or_create_wbs(db: Session, project_id: int, path: str | None) -> int | None:
+def _get_or_create_wbs(db: Session, project_id: int, path: str | None, commit: bool = True) -> int | None:
+    """commit=False — новая ИСР только сбрасывается в транзакцию вызывающего (откатится вместе с ней)."""
     if not path:
         return None
     p = path.strip()
@@ -19,11 +23,40 @@ def _get_or_create_wbs(db: Session, project_id: int, path: str | None) -> int |
         return existing.id
     w = WBS(project_id=project_id, path=p)
     db.add(w)
+    if not commit:
+        db.flush()
+        return w.id
     db.commit()
     db.refresh(w)
     return w.id
 
 
+def _search_filter(project_id: int, q: str):
+    """
+    ILIKE '%q%' по коду, названию и пути ИСР. Каждая ветка UNION идёт по своему GIN-индексу
+    gin_trgm_ops (миграция 0009_trgm_search); OR через outer join с wbs индексы не использует.
+    """
+    q_like = f"%{q.strip()}%"
+    ids = union(
+        select(Operation.id).where(Operation.project_id == project_id, Operation.code.ilike(q_like)),
+        select(Operation.id).where(Operation.project_id == project_id, Operation.name.ilike(q_like)),
+        select(Operation.id)
+        .join(WBS, Operation.wbs_id == WBS.id)
+        .where(WBS.project_id == project_id, Operation.project_id == project_id, WBS.path.ilike(q_like)),
+    )
+    return Operation.id.in_(ids)
+
+
+def _date_filter(qry, date_from: dt.date | None, date_to: dt.date | None, include_undated: bool):
+    if date_from and date_to:
+        overlap = and_(Operation.plan_start <= date_to, Operation.plan_finish >= date_from)
+        if include_undated:
+            qry = qry.filter(or_(overlap, Operation.plan_start.is_(None), Operation.plan_finish.is_(None)))
+        else:
+            qry = qry.filter(overlap)
+    return qry
+
+
 def list_operations(
     db: Session,
     project_id: int,
@@ -33,22 +66,30 @@ def list_operations(
     include_undated: bool = True,
     limit: int = 500,
     offset: int = 0,
+    after: tuple[dt.date | None, str] | None = None,
 ):
+    """after — keyset-курсор (plan_start, code) последней строки предыдущей страницы."""
     qry = db.query(Operation, WBS.path).outerjoin(WBS, Operation.wbs_id == WBS.id)
     qry = qry.filter(Operation.project_id == project_id)
 
-    if q:
-        q_like = f"%{q.strip()}%"
-        qry = qry.filter(or_(Operation.code.ilike(q_like), Operation.name.ilike(q_like)))
+    if q and q.strip():
+        qry = qry.filter(_search_filter(project_id, q))
+    qry = _date_filter(qry, date_from, date_to, include_undated)
 
-    if date_from and date_to:
-        overlap = and_(Operation.plan_start <= date_to, Operation.plan_finish >= date_from)
-        if include_undated:
-            qry = qry.filter(or_(overlap, Operation.plan_start.is_(None), Operation.plan_finish.is_(None)))
+    if after is not None:
+        after_start, after_code = after
+        if after_start is None:
+            qry = qry.filter(Operation.plan_start.is_(None), Operation.code > after_code)
         else:
-            qry = qry.filter(overlap)
+            qry = qry.filter(
+                or_(
+                    tuple_(Operation.plan_start, Operation.code) > tuple_(after_start, after_code),
+                    Operation.plan_start.is_(None),
+                )
+            )
 
-    qry = qry.order_by(Operation.plan_start.is_(None), Operation.plan_start, Operation.code)
+    # порядок совпадает с индексом ix_operation_project_start_code (NULL в конце)
+    qry = qry.order_by(Operation.plan_start.asc().nulls_last(), Operation.code)
     if offset:
         qry = qry.offset(offset)
     if limit:
@@ -57,6 +98,59 @@ def list_operations(
     return qry.all()
 
 
+def operation_rank(q: str):
+    """
+    Релевантность pg_trgm: лучшее word_similarity по коду, названию и пути ИСР.
+    word_similarity — real; приводим к double, чтобы значение в курсоре (float) совпадало
+    с тем, что сравнивает keyset (real 0.4 против параметра 0.4 в double не равны).
+    """
+    q = q.strip()
+    return cast(
+        func.greatest(
+            func.word_similarity(q, Operation.code),
+            func.word_similarity(q, Operation.name),
+            func.coalesce(func.word_similarity(q, WBS.path), 0.0),
+        ),
+        Float(53),
+    )
+
+
+def search_operations(
+    db: Session,
+    project_id: int,
+    q: str,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    include_undated: bool = True,
+    limit: int = 50,
+    after: tuple[float, str] | None = None,
+):
+    """Поиск с ранжированием: строки (Operation, wbs_path, score), keyset по (score desc, code)."""
+    rank = operation_rank(q).label("score")
+    qry = (
+        db.query(Operation, WBS.path, rank)
+        .outerjoin(WBS, Operation.wbs_id == WBS.id)
+        .filter(Operation.project_id == project_id, _search_filter(project_id, q))
+    )
+    qry = _date_filter(qry, date_from, date_to, include_undated)
+    if after is not None:
+        after_score, after_code = after
+        qry = qry.filter(or_(rank < after_score, and_(rank == after_score, Operation.code > after_code)))
+    return qry.order_by(rank.desc(), Operation.code).limit(limit).all()
+
+
+def search_resources(db: Session, project_id: int, q: str, limit: int = 20):
+    q = q.strip()
+    rank = func.word_similarity(q, Resource.name).label("score")
+    return (
+        db.query(Resource, rank)
+        .filter(Resource.project_id == project_id, Resource.name.ilike(f"%{q}%"))
+        .order_by(rank.desc(), Resource.name)
+        .limit(limit)
+        .all()
+    )
+
+
 def create_operation(db: Session, data: OperationCreate) -> Operation:
     existing = (
         db.query(Operation)
@@ -82,12 +176,20 @@ def create_operation(db: Session, data: OperationCreate) -> Operation:
         plan_finish=data.plan_finish,
     )
     db.add(op)
+    bump_data_version(db, op.project_id)
     db.commit()
+    invalidate_schedule(op.project_id)
     db.refresh(op)
     return op
 
 
-def update_operation(db: Session, op: Operation, data: OperationUpdate) -> Operation:
+def update_operation(db: Session, op: Operation, data: OperationUpdate, commit: bool = True) -> Operation:
+    """commit=False — изменения только сбрасываются в транзакцию (перенос графика коммитит сам)."""
+    # ИСР создаётся до изменения операции, чтобы её коммит не зафиксировал операцию частично;
+    # при commit=False — в той же транзакции (dry_run и откат её не оставляют)
+    if data.wbs_path is not None:
+        op_wbs_id = _get_or_create_wbs(db, data.project_id or op.project_id, data.wbs_path, commit=commit)
+
     if data.project_id and data.project_id != op.project_id:
         op.project_id = data.project_id
 
@@ -97,7 +199,7 @@ def update_operation(db: Session, op: Operation, data: OperationUpdate) -> Opera
         op.name = data.name.strip()
 
     if data.wbs_path is not None:
-        op.wbs_id = _get_or_create_wbs(db, op.project_id, data.wbs_path)
+        op.wbs_id = op_wbs_id
 
     for field in ("discipline", "block", "floor", "ugpr", "unit"):
         v = getattr(data, field)
@@ -111,37 +213,57 @@ def update_operation(db: Session, op: Operation, data: OperationUpdate) -> Opera
     if data.plan_finish is not None:
         op.plan_finish = data.plan_finish
 
+    bump_data_version(db, op.project_id)
+    if not commit:
+        db.flush()
+        return op
     db.commit()
+    invalidate_schedule(op.project_id)
     db.refresh(op)
     return op
 
 
 def delete_operation(db: Session, op: Operation) -> None:
+    project_id = op.project_id
     db.delete(op)
+    bump_data_version(db, project_id)
     db.commit()
+    invalidate_schedule(project_id)
 
 
-def list_dependencies(db: Session, project_id: int):
-    return (
-        db.query(OperationDependency)
-        .filter(OperationDependency.project_id == project_id)
-        .order_by(OperationDependency.id)
-        .all()
-    )
+def list_dependencies(db: Session, project_id: int, operation_ids: list[int] | None = None):
+    """operation_ids — только связи, у которых хотя бы один конец в этом наборе."""
+    qry = db.query(OperationDependency).filter(OperationDependency.project_id == project_id)
+    if operation_ids is not None:
+        qry = qry.filter(
+            or_(
+                OperationDependency.predecessor_id.in_(operation_ids),
+                OperationDependency.successor_id.in_(operation_ids),
+            )
+        )
+    return qry.order_by(OperationDependency.id).all()
 
 
-def create_dependency(db: Session, project_id: int, predecessor_id: int, successor_id: int) -> OperationDependency:
+def create_dependency(
+    db: Session, project_id: int, predecessor_id: int, successor_id: int, lag_days: int = 0
+) -> OperationDependency:
     dep = OperationDependency(
         project_id=project_id,
         predecessor_id=predecessor_id,
         successor_id=successor_id,
+        lag_days=lag_days,
     )
     db.add(dep)
+    bump_data_version(db, project_id)
     db.commit()
+    invalidate_schedule(project_id)
     db.refresh(dep)
     return dep
 
 
 def delete_dependency(db: Session, dep: OperationDependency) -> None:
+    project_id = dep.project_id
     db.delete(dep)
+    bump_data_version(db, project_id)
     db.commit()
+    invalidate_schedule(project_id)
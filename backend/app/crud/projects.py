@@ -1,3 +1,4 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.db.models.project import Project
 from app.schemas.project import ProjectCreate, ProjectUpdate
@@ -8,6 +9,15 @@ def list_projects(db: Session):
 def get_project(db: Session, project_id: int) -> Project | None:
     return db.query(Project).filter(Project.id == project_id).one_or_none()
 
+def bump_data_version(db: Session, project_id: int) -> None:
+    """Отмечает изменение данных проекта; коммитит вызывающий (в той же транзакции, что и изменение)."""
+    db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(data_version=Project.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
 def create_project(db: Session, data: ProjectCreate) -> Project:
     p = Project(
         code=data.code,
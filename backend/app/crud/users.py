@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from app.db.models.user import User
 from app.core.security import hash_password
-from app.schemas.admin import UserCreateIn
+from app.schemas.admin import UserCreateIn, UserUpdateIn
 
 def get_user_by_login(db: Session, login: str) -> User | None:
     return db.query(User).filter(User.login == login).one_or_none()
@@ -15,3 +15,14 @@ def create_user(db: Session, data: UserCreateIn) -> User:
     db.commit()
     db.refresh(u)
     return u
+
+def update_user(db: Session, user: User, data: UserUpdateIn) -> User:
+    fields = data.model_dump(exclude_unset=True)
+    password = fields.pop("password", None)
+    for k, v in fields.items():
+        setattr(user, k, v)
+    if password:
+        user.password_hash = hash_password(password)
+    db.commit()
+    db.refresh(user)
+    return user
@@ -1,4 +1,13 @@
+from sqlalchemy import DDL, event
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
     pass
+
+# GIN-индексы gin_trgm_ops (поиск по операциям/ИСР/ресурсам) требуют расширения pg_trgm;
+# для create_all в dev, в проде его создаёт миграция 0009_trgm_search
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,175 @@
+"""
+Учёт и профилирование SQL-запросов через события SQLAlchemy.
+
+На каждый engine из app/db/session.py вешаются before/after_cursor_execute: время и число
+запросов уходят в метрики по пулу и — если открыт контекст — в QueryStats текущего запроса
+или Celery-задачи (contextvar; sync-эндпоинты в threadpool и run_sync видят тот же объект).
+
+При SQL_PROFILER_ENABLED запросы группируются по отпечатку (текст без литералов и параметров):
+в конце запроса/задачи отпечаток, выполненный больше SQL_N_PLUS_ONE_THRESHOLD раз, логируется
+как N+1. Запросы дольше SQL_SLOW_QUERY_MS логируются всегда, при SQL_EXPLAIN_SLOW — с планом
+(EXPLAIN без ANALYZE: запрос повторно не выполняется).
+"""
+import hashlib
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import DB_STATEMENT_SECONDS
+
+_TIMER_KEY = "instrument_started"
+_EXPLAIN_KEY = "instrument_explaining"
+_SAMPLE_CHARS = 2000
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Текст запроса без литералов/параметров; списки IN (...) и VALUES (...), (...) схлопнуты."""
+    sql = _COMMENTS.sub(" ", statement)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PARAMS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _LISTS.sub("(?+)", sql)
+    sql = _ROWS.sub("(?+)", sql)
+    return _SPACES.sub(" ", sql).strip().lower()
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_sql(statement).encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class StatementGroup:
+    count: int = 0
+    seconds: float = 0.0
+    sample: str = ""
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    groups: dict[str, StatementGroup] = field(default_factory=dict)
+    explained: int = 0
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if not settings.SQL_PROFILER_ENABLED:
+            return
+        fp = fingerprint(statement)
+        group = self.groups.get(fp)
+        if group is None:
+            group = self.groups[fp] = StatementGroup(sample=statement[:_SAMPLE_CHARS])
+        group.count += 1
+        group.seconds += seconds
+
+    def repeated(self, threshold: int) -> list[tuple[str, StatementGroup]]:
+        """Отпечатки, выполненные больше threshold раз (кандидаты N+1), по убыванию числа."""
+        hits = [(fp, g) for fp, g in self.groups.items() if g.count > threshold]
+        return sorted(hits, key=lambda x: -x[1].count)
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current() -> QueryStats | None:
+    return _current.get()
+
+
+def begin(stats: QueryStats | None = None):
+    """Открывает учёт для запроса/задачи; вернуть токен в end()."""
+    return _current.set(stats if stats is not None else QueryStats())
+
+
+def end(token) -> None:
+    _current.reset(token)
+
+
+def report(stats: QueryStats, **context) -> None:
+    """Итог по запросу/задаче: N+1 в лог."""
+    if not settings.SQL_PROFILER_ENABLED:
+        return
+    for fp, group in stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            "sql_n_plus_one",
+            fingerprint=fp,
+            count=group.count,
+            db_ms=round(group.seconds * 1000, 1),
+            statement=group.sample,
+            total_statements=stats.count,
+            **context,
+        )
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    conn.info[_EXPLAIN_KEY] = True
+    try:
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+        return "\n".join(str(r[0]) for r in rows)
+    except Exception as e:
+        return f"explain failed: {e}"
+    finally:
+        conn.info.pop(_EXPLAIN_KEY, None)
+
+
+def _slow_query(conn, statement: str, parameters, seconds: float, executemany: bool, stats: QueryStats | None):
+    plan = None
+    explainable = (
+        settings.SQL_EXPLAIN_SLOW
+        and not executemany
+        and conn.dialect.name == "postgresql"
+        and statement.lstrip()[:6].lower() in ("select", "with")
+        and (stats is None or stats.explained < settings.SQL_EXPLAIN_MAX_PER_REQUEST)
+    )
+    if explainable:
+        plan = _explain(conn, statement, parameters)
+        if stats is not None:
+            stats.explained += 1
+    logger.warning(
+        "sql_slow_query",
+        ms=round(seconds * 1000, 1),
+        fingerprint=fingerprint(statement),
+        statement=statement[:_SAMPLE_CHARS],
+        plan=plan,
+    )
+
+
+def install(engine: Engine, pool_name: str) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_TIMER_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timers = conn.info.get(_TIMER_KEY)
+        if not timers:
+            return
+        seconds = time.perf_counter() - timers.pop()
+        if conn.info.get(_EXPLAIN_KEY):
+            return
+        DB_STATEMENT_SECONDS.labels(pool_name).observe(seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, seconds)
+        if settings.SQL_SLOW_QUERY_MS > 0 and seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            _slow_query(conn, statement, parameters, seconds, executemany, stats)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get(_TIMER_KEY):
+            conn.info[_TIMER_KEY].pop()
@@ -0,0 +1,49 @@
+"""effective facts indexes
+
+Revision ID: 0005_effective_indexes
+Revises: 0004_sales_monthly
+Create Date: 2026-01-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_effective_indexes"
+down_revision = "0004_sales_monthly"
+branch_labels = None
+depends_on = None
+
+
+# (table, index prefix, key columns after project_id/import_run_id, INCLUDE columns)
+_INDEXES = [
+    ("fact_volume_daily", "ix_fact_volume_day", ["date"], ["qty", "amount"]),
+    ("plan_volume_monthly", "ix_plan_volume_month", ["scenario", "month"], ["operation_code", "qty"]),
+    ("fact_resource_daily", "ix_res_day", ["scenario", "date"], ["qty", "manhours"]),
+    ("fact_pnl_monthly", "ix_pnl_month", ["scenario", "month"], ["amount"]),
+    ("fact_cashflow_monthly", "ix_cf_month", ["scenario", "month"], ["amount"]),
+    ("sales_monthly", "ix_sales_month", ["scenario", "month"], ["area_m2"]),
+]
+
+
+def upgrade():
+    for table, prefix, cols, include in _INDEXES:
+        op.create_index(
+            f"{prefix}_run_eff",
+            table,
+            ["project_id", "import_run_id", *cols],
+            postgresql_include=include,
+            postgresql_where=sa.text("import_run_id IS NOT NULL"),
+        )
+        op.create_index(
+            f"{prefix}_manual_eff",
+            table,
+            ["project_id", *cols],
+            postgresql_include=include,
+            postgresql_where=sa.text("import_run_id IS NULL"),
+        )
+
+
+def downgrade():
+    for table, prefix, _cols, _include in reversed(_INDEXES):
+        op.drop_index(f"{prefix}_manual_eff", table_name=table)
+        op.drop_index(f"{prefix}_run_eff", table_name=table)
@@ -0,0 +1,22 @@
+"""project data version
+
+Revision ID: 0006_project_data_version
+Revises: 0005_effective_indexes
+Create Date: 2026-01-20
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_project_data_version"
+down_revision = "0005_effective_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("project", sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("project", "data_version")
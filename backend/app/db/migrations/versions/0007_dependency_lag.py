@@ -0,0 +1,22 @@
+"""operation dependency lag
+
+Revision ID: 0007_dependency_lag
+Revises: 0006_project_data_version
+Create Date: 2026-01-22
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_dependency_lag"
+down_revision = "0006_project_data_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("operation_dependency", sa.Column("lag_days", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("operation_dependency", "lag_days")
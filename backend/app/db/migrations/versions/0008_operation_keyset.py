@@ -0,0 +1,22 @@
+"""operation keyset index
+
+Revision ID: 0008_operation_keyset
+Revises: 0007_dependency_lag
+Create Date: 2026-01-26
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_operation_keyset"
+down_revision = "0007_dependency_lag"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_operation_project_start_code", "operation", ["project_id", "plan_start", "code"])
+
+
+def downgrade():
+    op.drop_index("ix_operation_project_start_code", table_name="operation")
@@ -0,0 +1,40 @@
+"""trigram search indexes
+
+Revision ID: 0009_trgm_search
+Revises: 0008_operation_keyset
+Create Date: 2026-01-28
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_trgm_search"
+down_revision = "0008_operation_keyset"
+branch_labels = None
+depends_on = None
+
+
+# (index, table, column)
+_INDEXES = [
+    ("ix_operation_code_trgm", "operation", "code"),
+    ("ix_operation_name_trgm", "operation", "name"),
+    ("ix_wbs_path_trgm", "wbs", "path"),
+    ("ix_resource_name_trgm", "resource", "name"),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in _INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    for name, table, _ in _INDEXES:
+        op.drop_index(name, table_name=table)
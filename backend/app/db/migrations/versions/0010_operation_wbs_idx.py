@@ -0,0 +1,22 @@
+"""operation wbs_id index
+
+Revision ID: 0010_operation_wbs_idx
+Revises: 0009_trgm_search
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_operation_wbs_idx"
+down_revision = "0009_trgm_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_operation_wbs_id", "operation", ["wbs_id"])
+
+
+def downgrade():
+    op.drop_index("ix_operation_wbs_id", table_name="operation")
@@ -29,6 +29,21 @@ class FactVolumeDaily(Base, TimestampMixin):
             unique=True,
             postgresql_where="import_run_id IS NOT NULL",
         ),
+        Index(
+            "ix_fact_volume_day_run_eff",
+            "project_id",
+            "import_run_id",
+            "date",
+            postgresql_include=["qty", "amount"],
+            postgresql_where="import_run_id IS NOT NULL",
+        ),
+        Index(
+            "ix_fact_volume_day_manual_eff",
+            "project_id",
+            "date",
+            postgresql_include=["qty", "amount"],
+            postgresql_where="import_run_id IS NULL",
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -73,6 +88,23 @@ class PlanVolumeMonthly(Base, TimestampMixin):
             unique=True,
             postgresql_where="import_run_id IS NOT NULL",
         ),
+        Index(
+            "ix_plan_volume_month_run_eff",
+            "project_id",
+            "import_run_id",
+            "scenario",
+            "month",
+            postgresql_include=["operation_code", "qty"],
+            postgresql_where="import_run_id IS NOT NULL",
+        ),
+        Index(
+            "ix_plan_volume_month_manual_eff",
+            "project_id",
+            "scenario",
+            "month",
+            postgresql_include=["operation_code", "qty"],
+            postgresql_where="import_run_id IS NULL",
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -110,6 +142,23 @@ class FactResourceDaily(Base, TimestampMixin):
             unique=True,
             postgresql_where="import_run_id IS NOT NULL",
         ),
+        Index(
+            "ix_res_day_run_eff",
+            "project_id",
+            "import_run_id",
+            "scenario",
+            "date",
+            postgresql_include=["qty", "manhours"],
+            postgresql_where="import_run_id IS NOT NULL",
+        ),
+        Index(
+            "ix_res_day_manual_eff",
+            "project_id",
+            "scenario",
+            "date",
+            postgresql_include=["qty", "manhours"],
+            postgresql_where="import_run_id IS NULL",
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -145,6 +194,23 @@ class FactPnLMonthly(Base, TimestampMixin):
             unique=True,
             postgresql_where="import_run_id IS NOT NULL",
         ),
+        Index(
+            "ix_pnl_month_run_eff",
+            "project_id",
+            "import_run_id",
+            "scenario",
+            "month",
+            postgresql_include=["amount"],
+            postgresql_where="import_run_id IS NOT NULL",
+        ),
+        Index(
+            "ix_pnl_month_manual_eff",
+            "project_id",
+            "scenario",
+            "month",
+            postgresql_include=["amount"],
+            postgresql_where="import_run_id IS NULL",
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -179,6 +245,23 @@ class FactCashflowMonthly(Base, TimestampMixin):
             unique=True,
             postgresql_where="import_run_id IS NOT NULL",
         ),
+        Index(
+            "ix_cf_month_run_eff",
+            "project_id",
+            "import_run_id",
+            "scenario",
+            "month",
+            postgresql_include=["amount"],
+            postgresql_where="import_run_id IS NOT NULL",
+        ),
+        Index(
+            "ix_cf_month_manual_eff",
+            "project_id",
+            "scenario",
+            "month",
+            postgresql_include=["amount"],
+            postgresql_where="import_run_id IS NULL",
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -1,5 +1,5 @@
 import datetime as dt
-from sqlalchemy import String, ForeignKey, Date, Float, UniqueConstraint
+from sqlalchemy import String, ForeignKey, Date, Float, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -7,7 +7,16 @@ from app.db.models._mixins import TimestampMixin
 
 class Operation(Base, TimestampMixin):
     __tablename__ = "operation"
-    __table_args__ = (UniqueConstraint("project_id", "code", name="uq_operation_project_code"),)
+    __table_args__ = (
+        UniqueConstraint("project_id", "code", name="uq_operation_project_code"),
+        # keyset-пагинация Ганта по (plan_start, code)
+        Index("ix_operation_project_start_code", "project_id", "plan_start", "code"),
+        # поиск ILIKE '%q%' / word_similarity (pg_trgm)
+        Index("ix_operation_code_trgm", "code", postgresql_using="gin", postgresql_ops={"code": "gin_trgm_ops"}),
+        Index("ix_operation_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # ветка поиска по пути ИСР: wbs (ix_wbs_path_trgm) -> operation
+        Index("ix_operation_wbs_id", "wbs_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("project.id", ondelete="CASCADE"), index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text
+from sqlalchemy import Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -11,6 +11,8 @@ class Project(Base, TimestampMixin):
     code: Mapped[str] = mapped_column(String(64), unique=True, index=True)
     name: Mapped[str] = mapped_column(String(256))
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # счётчик изменений ручных данных / графика / версий импорта (для ETag отчётов)
+    data_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     wbs_items = relationship("WBS", back_populates="project")
     operations = relationship("Operation", back_populates="project")
@@ -1,11 +1,14 @@
-from sqlalchemy import String, ForeignKey, UniqueConstraint
+from sqlalchemy import String, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 from app.db.models._mixins import TimestampMixin
 
 class Resource(Base, TimestampMixin):
     __tablename__ = "resource"
-    __table_args__ = (UniqueConstraint("project_id", "name", "category", name="uq_resource_project_name_cat"),)
+    __table_args__ = (
+        UniqueConstraint("project_id", "name", "category", name="uq_resource_project_name_cat"),
+        Index("ix_resource_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("project.id", ondelete="CASCADE"), index=True)
@@ -27,6 +27,23 @@ class SalesMonthly(Base, TimestampMixin):
             unique=True,
             postgresql_where="import_run_id IS NOT NULL",
         ),
+        Index(
+            "ix_sales_month_run_eff",
+            "project_id",
+            "import_run_id",
+            "scenario",
+            "month",
+            postgresql_include=["area_m2"],
+            postgresql_where="import_run_id IS NOT NULL",
+        ),
+        Index(
+            "ix_sales_month_manual_eff",
+            "project_id",
+            "scenario",
+            "month",
+            postgresql_include=["area_m2"],
+            postgresql_where="import_run_id IS NULL",
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, UniqueConstraint
+from sqlalchemy import String, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -6,7 +6,10 @@ from app.db.models._mixins import TimestampMixin
 
 class WBS(Base, TimestampMixin):
     __tablename__ = "wbs"
-    __table_args__ = (UniqueConstraint("project_id", "path", name="uq_wbs_project_path"),)
+    __table_args__ = (
+        UniqueConstraint("project_id", "path", name="uq_wbs_project_path"),
+        Index("ix_wbs_path_trgm", "path", postgresql_using="gin", postgresql_ops={"path": "gin_trgm_ops"}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("project.id", ondelete="CASCADE"), index=True)
@@ -1,8 +1,130 @@
+"""
+Engines и фабрики сессий по видам нагрузки — у каждой свой пул и statement_timeout:
+- oltp (engine / SessionLocal) — запись из API, авторизация;
+- reports (report_engine / ReportSessionLocal, async_engine / AsyncSessionLocal) — read-only отчёты
+  и выгрузки, при заданном REPORT_DATABASE_URL идут на реплику;
+- import (import_engine / ImportSessionLocal) — загрузка импорта в Celery.
+Тяжёлый импорт не выбирает соединения из пула дашбордов и наоборот.
+"""
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db import instrument
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+def _engine_kwargs(
+    url: str,
+    workload: str,
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: float,
+    statement_timeout_ms: int,
+) -> dict:
+    kwargs: dict = dict(pool_pre_ping=True)
+    if make_url(url).get_backend_name() != "postgresql":
+        return kwargs
+    options = f"-c application_name=excel2web-{workload}"
+    if statement_timeout_ms > 0:
+        options += f" -c statement_timeout={statement_timeout_ms}"
+    kwargs.update(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        connect_args={"options": options},
+    )
+    return kwargs
+
+
+REPORT_DATABASE_URL = settings.REPORT_DATABASE_URL or settings.DATABASE_URL
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    **_engine_kwargs(
+        settings.DATABASE_URL,
+        "oltp",
+        settings.DB_POOL_SIZE,
+        settings.DB_MAX_OVERFLOW,
+        settings.DB_POOL_TIMEOUT,
+        settings.DB_STATEMENT_TIMEOUT_MS,
+    ),
+)
+report_engine = create_engine(
+    REPORT_DATABASE_URL,
+    **_engine_kwargs(
+        REPORT_DATABASE_URL,
+        "reports",
+        settings.REPORT_DB_POOL_SIZE,
+        settings.REPORT_DB_MAX_OVERFLOW,
+        settings.REPORT_DB_POOL_TIMEOUT,
+        settings.REPORT_STATEMENT_TIMEOUT_MS,
+    ),
+)
+import_engine = create_engine(
+    settings.DATABASE_URL,
+    **_engine_kwargs(
+        settings.DATABASE_URL,
+        "import",
+        settings.IMPORT_DB_POOL_SIZE,
+        settings.IMPORT_DB_MAX_OVERFLOW,
+        settings.DB_POOL_TIMEOUT,
+        settings.IMPORT_STATEMENT_TIMEOUT_MS,
+    ),
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=report_engine)
+ImportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=import_engine)
+
+
+
+def _async_url(url: str):
+    # psycopg2 не умеет async — для async-пути берём psycopg3 с теми же реквизитами
+    u = make_url(url)
+    if u.drivername in ("postgresql", "postgresql+psycopg2"):
+        u = u.set(drivername="postgresql+psycopg")
+    return u
+
+
+# Async-путь для read-only отчётов (psycopg3 async); отдельный пул соединений.
+_ASYNC_URL = settings.ASYNC_DATABASE_URL or REPORT_DATABASE_URL
+async_engine = create_async_engine(
+    _async_url(_ASYNC_URL),
+    **_engine_kwargs(
+        _ASYNC_URL,
+        "reports-async",
+        settings.ASYNC_DB_POOL_SIZE,
+        settings.ASYNC_DB_MAX_OVERFLOW,
+        settings.REPORT_DB_POOL_TIMEOUT,
+        settings.REPORT_STATEMENT_TIMEOUT_MS,
+    ),
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+ENGINES = {
+    "oltp": engine,
+    "reports": report_engine,
+    "reports_async": async_engine.sync_engine,
+    "import": import_engine,
+}
+
+for _name, _engine in ENGINES.items():
+    instrument.install(_engine, _name)
+
+
+def pool_stats() -> dict[str, dict]:
+    """Состояние пулов соединений по видам нагрузки (для /admin/db-pools и метрик)."""
+    out = {}
+    for name, eng in ENGINES.items():
+        pool = eng.pool
+        stats = {"pool": type(pool).__name__}
+        for key in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, key, None)
+            if callable(fn):
+                stats[key] = fn()
+        out[name] = stats
+    return out
@@ -1,7 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.logging import configure_logging, logger
+from app.core.compression import CompressionMiddleware
+from app.core.etag import ETagMiddleware
+from app.core.metrics import MetricsMiddleware, render_latest
+from app.core.profiler import SQLProfilerMiddleware
 from app.api.router import api_router
 from app.db.session import engine
 from app.db.base import Base
@@ -18,12 +22,22 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(SQLProfilerMiddleware)
+    app.add_middleware(MetricsMiddleware)
 
     @app.get("/healthz")
     def healthz():
         return {"status": "ok"}
 
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        body, content_type = render_latest()
+        return Response(content=body, media_type=content_type)
+
     @app.on_event("startup")
     def _startup():
         # Ensure tables exist for dev-only convenience; in prod rely on alembic
@@ -5,3 +5,9 @@ class UserCreateIn(BaseModel):
     password: str = Field(..., min_length=6, max_length=128)
     role: str
     full_name: str | None = None
+
+class UserUpdateIn(BaseModel):
+    role: str | None = None
+    is_active: bool | None = None
+    full_name: str | None = None
+    password: str | None = Field(None, min_length=6, max_length=128)
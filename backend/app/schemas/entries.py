@@ -42,3 +42,15 @@ class CashflowIn(BaseModel):
     scenario: str = "plan"
     direction: str | None = None
     amount: float = 0.0
+
+class EntryBatchRow(BaseModel):
+    index: int
+    status: str  # created | updated | superseded | error
+    error: str | None = None
+
+class EntryBatchOut(BaseModel):
+    created: int = 0
+    updated: int = 0
+    superseded: int = 0
+    errors: int = 0
+    results: list[EntryBatchRow] = []
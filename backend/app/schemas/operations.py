@@ -1,5 +1,5 @@
 import datetime as dt
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class OperationBase(BaseModel):
@@ -43,15 +43,37 @@ class OperationOut(BaseModel):
     plan_finish: dt.date | None = None
 
 
+class ScheduleChange(BaseModel):
+    id: int
+    code: str
+    old_start: dt.date | None = None
+    old_finish: dt.date | None = None
+    plan_start: dt.date | None = None
+    plan_finish: dt.date | None = None
+
+
+class OperationUpdateOut(OperationOut):
+    changes: list[ScheduleChange] = []
+    plan_rows: int = 0
+    dry_run: bool = False
+
+
 class OperationGanttOut(OperationOut):
     progress_pct: float | None = None
     critical: bool = False
+    early_start: dt.date | None = None
+    early_finish: dt.date | None = None
+    late_start: dt.date | None = None
+    late_finish: dt.date | None = None
+    total_float: int | None = None
+    free_float: int | None = None
 
 
 class DependencyCreate(BaseModel):
     project_id: int
     predecessor_id: int
     successor_id: int
+    lag_days: int = 0
 
 
 class DependencyOut(BaseModel):
@@ -59,9 +81,65 @@ class DependencyOut(BaseModel):
     project_id: int
     predecessor_id: int
     successor_id: int
+    lag_days: int = 0
 
 
 class GanttOut(BaseModel):
     operations: list[OperationGanttOut]
     dependencies: list[DependencyOut]
     critical_path: list[int]
+    cycle: list[int] = []
+    next_cursor: str | None = None
+
+
+class OperationUpsert(OperationBase):
+    code: str
+
+
+class DependencyBulkItem(BaseModel):
+    # операции задаются id или кодом (в т.ч. созданные в этом же пакете)
+    predecessor_id: int | None = None
+    successor_id: int | None = None
+    predecessor_code: str | None = None
+    successor_code: str | None = None
+    lag_days: int = 0
+
+
+class ScheduleBulkIn(BaseModel):
+    project_id: int
+    operations: list[OperationUpsert] = Field(default_factory=list, max_length=5000)
+    create_dependencies: list[DependencyBulkItem] = Field(default_factory=list, max_length=20000)
+    delete_dependencies: list[int] = Field(default_factory=list, max_length=20000)
+
+
+class BulkOperationResult(BaseModel):
+    id: int
+    code: str
+    created: bool
+
+
+class ScheduleBulkOut(BaseModel):
+    operations: list[BulkOperationResult]
+    dependencies_created: int
+    dependencies_deleted: int
+    plan_rows: int
+
+
+class OperationSearchHit(BaseModel):
+    id: int
+    code: str
+    name: str
+    wbs_path: str | None = None
+    score: float
+
+
+class ResourceSearchHit(BaseModel):
+    id: int
+    name: str
+    category: str
+    score: float
+
+
+class SearchOut(BaseModel):
+    operations: list[OperationSearchHit]
+    resources: list[ResourceSearchHit]
@@ -1,5 +1,7 @@
 import datetime as dt
-from pydantic import BaseModel
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
 
 class KPIOut(BaseModel):
     project_id: int
@@ -11,9 +13,29 @@ class KPIOut(BaseModel):
     manhours: float
     productivity: float | None
 
+class PortfolioKPIItem(BaseModel):
+    project_id: int
+    code: str
+    name: str
+    import_run_id: int | None
+    fact_qty: float
+    plan_qty: float
+    progress_pct: float
+    manhours: float
+    productivity: float | None
+
+class PortfolioKPIOut(BaseModel):
+    date_from: dt.date
+    date_to: dt.date
+    total: int
+    items: list[PortfolioKPIItem]
+
 class SeriesPoint(BaseModel):
     period: dt.date
     value: float
+    # при max_points: точка представляет `points` исходных (см. services/reports/downsample.py)
+    aggregated: bool | None = None
+    points: int | None = None
 
 class PlanFactSeries(BaseModel):
     fact: list[SeriesPoint]
@@ -34,6 +56,8 @@ class PlanFactTable(BaseModel):
 class MoneySeriesPoint(BaseModel):
     period: dt.date
     value: float
+    aggregated: bool | None = None
+    points: int | None = None
 
 
 class MoneySeriesOut(BaseModel):
@@ -97,3 +121,66 @@ class FloorSeriesOut(BaseModel):
     plan: list[SeriesPoint]
     fact: list[SeriesPoint]
     forecast: list[SeriesPoint] | None = None
+
+
+ReportName = Literal[
+    "kpi",
+    "plan_fact_series",
+    "plan_fact_table",
+    "ugpr_series",
+    "ugpr_table",
+    "manhours_series",
+    "sales_kpi",
+    "sales_series",
+    "floor_summary",
+    "floor_operations",
+    "floor_series",
+    "pnl",
+    "cashflow",
+]
+
+
+class ReportSpec(BaseModel):
+    report: ReportName
+    id: str | None = None
+    granularity: Literal["day", "week", "month"] | None = None
+    by: Literal["wbs", "discipline", "block", "floor", "ugpr"] | None = None
+    scenario: str | None = None
+    wbs_path: str | None = None
+    floor: str | None = None
+    block: str | None = None
+    opening_balance: float | None = None
+    forecast_model: Literal["linear", "moving_average", "exp_smoothing"] | None = None
+    max_points: int | None = Field(None, ge=3)
+
+
+class ReportBatchIn(BaseModel):
+    project_id: int
+    date_from: dt.date
+    date_to: dt.date
+    wbs_path: str | None = None
+    import_run_id: int | None = None
+    reports: list[ReportSpec] = Field(min_length=1, max_length=50)
+
+
+class ReportBatchOut(BaseModel):
+    import_run_id: int | None = None
+    results: dict[str, Any]
+
+
+ExportSheet = Literal["plan_fact", "plan_fact_wbs", "ugpr", "pnl", "cashflow", "fact_rows"]
+
+
+class ExportJobIn(BaseModel):
+    project_id: int
+    date_from: dt.date
+    date_to: dt.date
+    sheets: list[ExportSheet] = Field(default_factory=lambda: ["plan_fact"], min_length=1)
+    scenario: str = "plan"
+    import_run_id: int | None = None
+
+
+class ExportJobOut(BaseModel):
+    job_id: str
+    status: str  # queued|running|ready|failed
+    download_url: str | None = None
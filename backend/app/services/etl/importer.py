@@ -942,8 +942,75 @@ def _load_sales_monthly(db: Session, project_id: int, import_run_id: int, sales_
     return inserted
 
 
+# лист -> (парсер, имена возвращаемых датафреймов); в пайплайне каждый лист — отдельная задача
+SHEET_PARSERS = {
+    "vdc": (parse_vdc, ("baseline", "fact")),
+    "gpr": (parse_gpr, ("gpr",)),
+    "people": (parse_people_tech, ("people",)),
+    "bdr": (parse_bdr, ("bdr",)),
+    "bdds": (parse_bdds, ("bdds",)),
+    "sales": (parse_sales, ("sales",)),
+}
+
+
+class ImportStageError(Exception):
+    """Ошибка этапа загрузки (stage: cleanup / dims / facts / finance)."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+
+
+def parse_sheet(path: Path, sheet: str) -> tuple[dict[str, Any], list[ValidationError]]:
+    parser, names = SHEET_PARSERS[sheet]
+    *frames, errors = parser(str(path))
+    return dict(zip(names, frames)), errors
+
+
+def _upsert_dims(db: Session, project_id: int, import_run_id: int, gpr_df) -> int:
+    _upsert_operations(db, project_id, gpr_df)
+    return 0
+
+
+# этапы загрузки по порядку: (этап, [(датафрейм, загрузчик)])
+_LOAD_STAGES = (
+    ("dims", (("gpr", _upsert_dims),)),
+    (
+        "facts",
+        (
+            ("baseline", _load_baseline),
+            ("fact", _load_fact_volume),
+            ("gpr", _load_plan_monthly),
+            ("people", _load_manhours),
+        ),
+    ),
+    ("finance", (("bdr", _load_bdr), ("bdds", _load_bdds), ("sales", _load_sales_monthly))),
+)
+
+
+def load_frames(db: Session, run: ImportRun, frames: dict[str, Any]) -> int:
+    """Загрузка разобранных листов по этапам. Ошибка этапа — ImportStageError."""
+    try:
+        # Cleanup old imported snapshot for this project
+        _cleanup_imported(db, run.project_id, run.id)
+    except Exception as e:
+        raise ImportStageError("cleanup", e) from e
+
+    rows_loaded = 0
+    for stage, steps in _LOAD_STAGES:
+        try:
+            for name, loader in steps:
+                df = frames.get(name)
+                if df is not None and not df.empty:
+                    rows_loaded += loader(db, run.project_id, run.id, df)
+        except Exception as e:
+            raise ImportStageError(stage, e) from e
+        logger.info("import_stage_done", import_run_id=run.id, stage=stage, rows_loaded=rows_loaded)
+    return rows_loaded
+
+
 def run_import(db: Session, run: ImportRun) -> tuple[list[ValidationError], int]:
-    """Main import. Returns (errors, rows_loaded)."""
+    """Main import (все листы в одном процессе). Returns (errors, rows_loaded)."""
     errors: list[ValidationError] = []
     path = _file_path(run)
     if not path.exists():
@@ -951,41 +1018,10 @@ def run_import(db: Session, run: ImportRun) -> tuple[list[ValidationError], int]
 
     logger.info("import_start", import_run_id=run.id, path=str(path))
 
-    # Cleanup old imported snapshot for this project
-    _cleanup_imported(db, run.project_id, run.id)
-
-    baseline_df, fact_df, e1 = parse_vdc(str(path))
-    gpr_df, e2 = parse_gpr(str(path))
-    people_df, e3 = parse_people_tech(str(path))
-    bdr_df, e4 = parse_bdr(str(path))
-    bdds_df, e5 = parse_bdds(str(path))
-    sales_df, e6 = parse_sales(str(path))
-
-    errors.extend(e1)
-    errors.extend(e2)
-    errors.extend(e3)
-    errors.extend(e4)
-    errors.extend(e5)
-    errors.extend(e6)
+    frames: dict[str, Any] = {}
+    for sheet in SHEET_PARSERS:
+        sheet_frames, sheet_errors = parse_sheet(path, sheet)
+        frames.update(sheet_frames)
+        errors.extend(sheet_errors)
 
-    # Upsert dims first
-    if not gpr_df.empty:
-        _upsert_operations(db, run.project_id, gpr_df)
-
-    rows_loaded = 0
-    if not baseline_df.empty:
-        rows_loaded += _load_baseline(db, run.project_id, run.id, baseline_df)
-    if not fact_df.empty:
-        rows_loaded += _load_fact_volume(db, run.project_id, run.id, fact_df)
-    if not gpr_df.empty:
-        rows_loaded += _load_plan_monthly(db, run.project_id, run.id, gpr_df)
-    if not people_df.empty:
-        rows_loaded += _load_manhours(db, run.project_id, run.id, people_df)
-    if not bdr_df.empty:
-        rows_loaded += _load_bdr(db, run.project_id, run.id, bdr_df)
-    if not bdds_df.empty:
-        rows_loaded += _load_bdds(db, run.project_id, run.id, bdds_df)
-    if not sales_df.empty:
-        rows_loaded += _load_sales_monthly(db, run.project_id, run.id, sales_df)
-
-    return errors, rows_loaded
+    return errors, load_frames(db, run, frames)
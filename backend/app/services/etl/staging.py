@@ -0,0 +1,56 @@
+"""
+Промежуточное хранение разобранных листов импорта (Parquet) для пайплайна Celery.
+
+Задачи разбора пишут датафреймы в IMPORT_STAGING_DIR/<import_run_id>/<имя>.parquet
+(каталог должен быть общим для воркеров), задача загрузки читает их и удаляет каталог.
+"""
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from app.core.config import settings
+
+
+def staging_dir(import_run_id: int) -> Path:
+    return Path(settings.IMPORT_STAGING_DIR) / str(import_run_id)
+
+
+def _mixed_to_str(df: pd.DataFrame) -> pd.DataFrame:
+    # object-колонки со значениями разных типов (число и текст в одной колонке Excel)
+    # Arrow не сериализует — приводим такие колонки к строкам, пустые оставляем пустыми
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        types = {type(v) for v in df[col] if v is not None and not (isinstance(v, float) and pd.isna(v))}
+        if len(types) > 1:
+            df[col] = [None if v is None or (isinstance(v, float) and pd.isna(v)) else str(v) for v in df[col]]
+    return df
+
+
+def write_frame(df: pd.DataFrame, path: Path) -> None:
+    try:
+        df.to_parquet(path, index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        _mixed_to_str(df).to_parquet(path, index=False)
+
+
+def write_frames(import_run_id: int, frames: dict[str, pd.DataFrame]) -> dict[str, str]:
+    """Пишет датафреймы листа; возвращает манифест имя -> файл."""
+    out_dir = staging_dir(import_run_id)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for name, df in frames.items():
+        path = out_dir / f"{name}.parquet"
+        write_frame(df, path)
+        manifest[name] = path.name
+    return manifest
+
+
+def read_frames(import_run_id: int, manifest: dict[str, str]) -> dict[str, pd.DataFrame]:
+    base = staging_dir(import_run_id)
+    return {name: pd.read_parquet(base / file) for name, file in manifest.items()}
+
+
+def drop_staging(import_run_id: int) -> None:
+    shutil.rmtree(staging_dir(import_run_id), ignore_errors=True)
@@ -1,6 +1,6 @@
 import datetime as dt
 from pathlib import Path
-import pandas as pd
+import xlsxwriter
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
@@ -9,13 +9,18 @@ from app.core.config import settings
 
 def export_plan_fact_xlsx(data: dict, out_path: Path):
     # data: {"fact": [{"period":..., "value":...}], "plan": [...]}
-    df_fact = pd.DataFrame(data["fact"]).rename(columns={"period":"period","value":"fact"})
-    df_plan = pd.DataFrame(data["plan"]).rename(columns={"period":"period","value":"plan"})
-    df = pd.merge(df_plan, df_fact, on="period", how="outer").fillna(0)
-    df["variance"]=df["fact"]-df["plan"]
+    plan = {x["period"]: float(x["value"] or 0.0) for x in data["plan"]}
+    fact = {x["period"]: float(x["value"] or 0.0) for x in data["fact"]}
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with pd.ExcelWriter(out_path, engine="xlsxwriter") as w:
-        df.to_excel(w, index=False, sheet_name="plan_fact")
+    wb = xlsxwriter.Workbook(str(out_path), {"constant_memory": True})
+    try:
+        ws = wb.add_worksheet("plan_fact")
+        ws.write_row(0, 0, ["period", "plan", "fact", "variance"])
+        for i, period in enumerate(sorted(set(plan) | set(fact)), start=1):
+            pv, fv = plan.get(period, 0.0), fact.get(period, 0.0)
+            ws.write_row(i, 0, [str(period), pv, fv, fv - pv])
+    finally:
+        wb.close()
     return out_path
 
 def export_kpi_pdf(kpi: dict, out_path: Path):
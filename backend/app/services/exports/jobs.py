@@ -0,0 +1,263 @@
+"""
+Фоновые выгрузки Excel (Celery, см. worker/tasks.py).
+
+- Файл пишется xlsxwriter в режиме constant_memory: строки уходят на диск сразу,
+  поэтому крупные листы читаются из БД потоково (server-side cursor + yield_per).
+- Одинаковые параметры → один и тот же файл: имя файла = хэш параметров
+  (вместе с эффективной версией импорта и data_version проекта), свежий файл переиспользуется.
+- Рядом с файлом лежит export_<id>.json с параметрами: по ним статус и скачивание
+  проверяют доступ к финансовым листам (job_id предсказуем). Там же — время постановки
+  в очередь: Celery не отличает ожидающую задачу от неизвестной (PENDING), поэтому повторный
+  запрос не ставит задачу ещё раз, пока отметка свежая (EXPORT_REQUEUE_MINUTES).
+- Старые файлы удаляются по EXPORT_RETENTION_HOURS (periodic task exports.cleanup).
+"""
+import datetime as dt
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import xlsxwriter
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.facts import FactVolumeDaily, FactPnLMonthly, FactCashflowMonthly
+from app.services.reports import service
+from app.services.reports.cache import report_state
+from app.services.reports.effective import effective_rows
+
+SHEETS = ("plan_fact", "plan_fact_wbs", "ugpr", "pnl", "cashflow", "fact_rows")
+FINANCE_SHEETS = ("pnl", "cashflow")
+
+
+def export_params(
+    db: Session,
+    project_id: int,
+    date_from: dt.date,
+    date_to: dt.date,
+    sheets: list[str],
+    scenario: str = "plan",
+    import_run_id: int | None = None,
+) -> dict:
+    """
+    Нормализованные параметры выгрузки: версия импорта фиксируется сразу,
+    data_version отделяет файл до и после ручных правок / изменений ГПР.
+    """
+    version, run_id = report_state(db, project_id, import_run_id)
+    return {
+        "project_id": project_id,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "sheets": [s for s in SHEETS if s in set(sheets)],
+        "scenario": scenario,
+        "import_run_id": run_id,
+        "data_version": version or 0,
+    }
+
+
+def params_hash(params: dict) -> str:
+    raw = json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def export_file(job_id: str) -> Path:
+    return Path(settings.EXPORT_DIR) / f"export_{job_id}.xlsx"
+
+
+def _meta_file(job_id: str) -> Path:
+    return Path(settings.EXPORT_DIR) / f"export_{job_id}.json"
+
+
+def write_export_meta(job_id: str, params: dict, enqueued_at: float | None = None) -> None:
+    path = _meta_file(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps({"params": params, "enqueued_at": enqueued_at}, ensure_ascii=False))
+    tmp_path.replace(path)
+
+
+def _read_meta(job_id: str) -> dict | None:
+    try:
+        return json.loads(_meta_file(job_id).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def read_export_meta(job_id: str) -> dict | None:
+    """Параметры выгрузки; None — выгрузку не заказывали или она удалена."""
+    meta = _read_meta(job_id)
+    return meta["params"] if meta is not None else None
+
+
+def export_enqueued_at(job_id: str) -> float | None:
+    meta = _read_meta(job_id)
+    return meta.get("enqueued_at") if meta is not None else None
+
+
+def enqueue_pending(job_id: str, enqueued_at: float | None) -> bool:
+    """Задача уже в очереди: отметка моложе EXPORT_REQUEUE_MINUTES и новее готового файла."""
+    if enqueued_at is None or time.time() - enqueued_at > settings.EXPORT_REQUEUE_MINUTES * 60:
+        return False
+    try:
+        built_at = export_file(job_id).stat().st_mtime
+    except FileNotFoundError:
+        return True
+    return enqueued_at > built_at
+
+
+def ready_file(job_id: str) -> Path | None:
+    """Готовый файл, если он ещё не устарел для переиспользования."""
+    path = export_file(job_id)
+    try:
+        age = time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    return path if age <= settings.EXPORT_REUSE_MINUTES * 60 else None
+
+
+class _SheetWriter:
+    def __init__(self, wb, name: str, header: list[str]):
+        self.ws = wb.add_worksheet(name)
+        self.ws.write_row(0, 0, header, wb.add_format({"bold": True}))
+        self.row = 1
+
+    def write(self, values):
+        self.ws.write_row(self.row, 0, values)
+        self.row += 1
+
+
+def _stream(qry):
+    return qry.execution_options(stream_results=True).yield_per(settings.EXPORT_STREAM_BATCH)
+
+
+def _sheet_plan_fact(wb, db: Session, p: dict, d1: dt.date, d2: dt.date):
+    data = service.plan_fact_series(db, p["project_id"], d1, d2, granularity="month", import_run_id=p["import_run_id"])
+    plan = {x["period"]: x["value"] for x in data["plan"]}
+    fact = {x["period"]: x["value"] for x in data["fact"]}
+    w = _SheetWriter(wb, "plan_fact", ["period", "plan", "fact", "variance"])
+    for period in sorted(set(plan) | set(fact)):
+        pv, fv = plan.get(period, 0.0), fact.get(period, 0.0)
+        w.write([period, pv, fv, fv - pv])
+
+
+def _sheet_plan_fact_wbs(wb, db: Session, p: dict, d1: dt.date, d2: dt.date):
+    data = service.plan_fact_table_by(
+        db, p["project_id"], d1, d2, by="wbs", scenario=p["scenario"], import_run_id=p["import_run_id"]
+    )
+    w = _SheetWriter(wb, "plan_fact_wbs", ["wbs", "plan", "fact", "variance", "progress_pct"])
+    for r in sorted(data["rows"], key=lambda x: x["key"]):
+        w.write([r["key"], r["plan"], r["fact"], r["variance"], r["progress_pct"]])
+
+
+def _sheet_ugpr(wb, db: Session, p: dict, d1: dt.date, d2: dt.date):
+    data = service.ugpr_operation_table(db, p["project_id"], d1, d2, import_run_id=p["import_run_id"])
+    cols = [
+        "operation_code", "operation_name", "plan_lcp", "fact_lcp", "plan_period", "fact_period",
+        "plan_month", "fact_month", "plan_week", "fact_week", "plan_day", "fact_day",
+    ]
+    w = _SheetWriter(wb, "ugpr", cols)
+    for r in data["rows"]:
+        w.write([r[c] for c in cols])
+
+
+def _sheet_pnl(wb, db: Session, p: dict, d1: dt.date, d2: dt.date):
+    pl = effective_rows(FactPnLMonthly, p["project_id"], p["import_run_id"])
+    qry = (
+        db.query(pl.month, pl.parent_name, pl.account_name, func.sum(pl.amount))
+        .filter(
+            pl.month >= dt.date(d1.year, d1.month, 1),
+            pl.month <= dt.date(d2.year, d2.month, 1),
+            pl.scenario == p["scenario"],
+        )
+        .group_by(pl.month, pl.parent_name, pl.account_name)
+        .order_by(pl.month, pl.parent_name, pl.account_name)
+    )
+    w = _SheetWriter(wb, "pnl", ["month", "parent_name", "account", "amount"])
+    for m, parent, account, amount in _stream(qry):
+        w.write([m.isoformat(), parent or "", account, float(amount or 0.0)])
+
+
+def _sheet_cashflow(wb, db: Session, p: dict, d1: dt.date, d2: dt.date):
+    cf = effective_rows(FactCashflowMonthly, p["project_id"], p["import_run_id"])
+    qry = (
+        db.query(cf.month, cf.account_name, cf.direction, func.sum(cf.amount))
+        .filter(
+            cf.month >= dt.date(d1.year, d1.month, 1),
+            cf.month <= dt.date(d2.year, d2.month, 1),
+            cf.scenario == p["scenario"],
+        )
+        .group_by(cf.month, cf.account_name, cf.direction)
+        .order_by(cf.month, cf.account_name)
+    )
+    w = _SheetWriter(wb, "cashflow", ["month", "account", "direction", "amount"])
+    for m, account, direction, amount in _stream(qry):
+        w.write([m.isoformat(), account, direction or "", float(amount or 0.0)])
+
+
+def _sheet_fact_rows(wb, db: Session, p: dict, d1: dt.date, d2: dt.date):
+    fv = effective_rows(FactVolumeDaily, p["project_id"], p["import_run_id"])
+    qry = (
+        db.query(
+            fv.date, fv.operation_code, fv.operation_name, fv.wbs, fv.discipline, fv.block, fv.floor,
+            fv.category, fv.item_name, fv.unit, fv.qty, fv.amount,
+        )
+        .filter(fv.date >= d1, fv.date <= d2)
+        .order_by(fv.date, fv.operation_code)
+    )
+    w = _SheetWriter(
+        wb,
+        "fact_rows",
+        ["date", "operation_code", "operation_name", "wbs", "discipline", "block", "floor",
+         "category", "item_name", "unit", "qty", "amount"],
+    )
+    for r in _stream(qry):
+        w.write([r[0].isoformat(), *[v if v is not None else "" for v in r[1:]]])
+
+
+_BUILDERS = {
+    "plan_fact": _sheet_plan_fact,
+    "plan_fact_wbs": _sheet_plan_fact_wbs,
+    "ugpr": _sheet_ugpr,
+    "pnl": _sheet_pnl,
+    "cashflow": _sheet_cashflow,
+    "fact_rows": _sheet_fact_rows,
+}
+
+
+def build_export(db: Session, params: dict, out_path: Path) -> Path:
+    d1 = dt.date.fromisoformat(params["date_from"])
+    d2 = dt.date.fromisoformat(params["date_to"])
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # пишем во временный файл и переименовываем — читатель не увидит недописанный xlsx
+    tmp_path = out_path.with_suffix(f".{os.getpid()}.tmp")
+    wb = xlsxwriter.Workbook(str(tmp_path), {"constant_memory": True})
+    try:
+        for sheet in params["sheets"]:
+            _BUILDERS[sheet](wb, db, params, d1, d2)
+    finally:
+        wb.close()
+    tmp_path.replace(out_path)
+    return out_path
+
+
+def cleanup_exports(max_age_hours: float | None = None) -> int:
+    """Удаляет файлы выгрузок старше срока хранения. Возвращает число удалённых файлов."""
+    if max_age_hours is None:
+        max_age_hours = settings.EXPORT_RETENTION_HOURS
+    root = Path(settings.EXPORT_DIR)
+    if not root.exists():
+        return 0
+    border = time.time() - max_age_hours * 3600
+    removed = 0
+    for path in root.iterdir():
+        if not path.is_file():
+            continue
+        try:
+            if path.stat().st_mtime < border:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
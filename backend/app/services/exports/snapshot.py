@@ -0,0 +1,123 @@
+"""
+Снимок версии импорта в Parquet (для BI): по файлу на таблицу + zip со всеми таблицами.
+
+Строки читаются server-side курсором пачками и сразу уходят в ParquetWriter
+как Arrow record batch, поэтому память не зависит от размера версии.
+Версия импорта неизменна, так что снимок строится один раз и кэшируется на диске
+(EXPORT_DIR/snapshots/run_<id>_<hash>/); удаляется вместе с версией.
+Zip собирается в двух вариантах: полный и без финансовых таблиц (для ролей без доступа к БДР/БДДС).
+"""
+import os
+import shutil
+import uuid
+import zipfile
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Date, DateTime, Float, Integer, String, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.baseline import BaselineVolume
+from app.db.models.facts import (
+    FactVolumeDaily,
+    PlanVolumeMonthly,
+    FactResourceDaily,
+    FactPnLMonthly,
+    FactCashflowMonthly,
+)
+from app.db.models.import_run import ImportRun
+from app.db.models.sales import SalesMonthly
+
+SNAPSHOT_TABLES = {
+    "fact_volume_daily": FactVolumeDaily,
+    "plan_volume_monthly": PlanVolumeMonthly,
+    "fact_resource_daily": FactResourceDaily,
+    "fact_pnl_monthly": FactPnLMonthly,
+    "fact_cashflow_monthly": FactCashflowMonthly,
+    "baseline_volume": BaselineVolume,
+    "sales_monthly": SalesMonthly,
+}
+FINANCE_TABLES = ("fact_pnl_monthly", "fact_cashflow_monthly")
+
+
+def snapshot_tables(include_finance: bool) -> list[str]:
+    return [name for name in SNAPSHOT_TABLES if include_finance or name not in FINANCE_TABLES]
+
+
+def snapshot_zip_name(include_finance: bool) -> str:
+    return "snapshot.zip" if include_finance else "snapshot_no_finance.zip"
+
+
+def _arrow_type(col_type):
+    if isinstance(col_type, Integer):
+        return pa.int64()
+    if isinstance(col_type, Float):
+        return pa.float64()
+    if isinstance(col_type, DateTime):
+        return pa.timestamp("us", tz="UTC") if col_type.timezone else pa.timestamp("us")
+    if isinstance(col_type, Date):
+        return pa.date32()
+    if isinstance(col_type, String):
+        return pa.string()
+    return pa.string()
+
+
+def arrow_schema(model) -> pa.Schema:
+    return pa.schema([pa.field(c.name, _arrow_type(c.type), nullable=c.nullable) for c in model.__table__.columns])
+
+
+def snapshot_dir(run: ImportRun) -> Path:
+    return Path(settings.EXPORT_DIR) / "snapshots" / f"run_{run.id}_{run.file_hash[:12]}"
+
+
+def _write_table(db: Session, model, import_run_id: int, out_path: Path) -> int:
+    table = model.__table__
+    schema = arrow_schema(model)
+    stmt = select(*table.columns).where(table.c.import_run_id == import_run_id).order_by(table.c.id)
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=settings.SNAPSHOT_BATCH_ROWS))
+    rows_written = 0
+    with pq.ParquetWriter(str(out_path), schema, compression="zstd") as writer:
+        for part in result.partitions():
+            columns = list(zip(*part))
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(columns[i], type=f.type) for i, f in enumerate(schema)],
+                schema=schema,
+            )
+            writer.write_batch(batch)
+            rows_written += len(part)
+    return rows_written
+
+
+def build_snapshot(db: Session, run: ImportRun) -> Path:
+    """Строит (или отдаёт из кэша) каталог снимка с parquet-файлами и zip-архивами."""
+    target = snapshot_dir(run)
+    ready = snapshot_zip_name(include_finance=False)  # пишется последним
+    if (target / ready).exists():
+        return target
+    # сборка во временный каталог и атомарное переименование: параллельный запрос
+    # либо увидит готовый снимок, либо соберёт свой и проиграет гонку за rename
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.mkdir(parents=True)
+    try:
+        for name, model in SNAPSHOT_TABLES.items():
+            _write_table(db, model, run.id, tmp / f"{name}.parquet")
+        for include_finance in (True, False):
+            with zipfile.ZipFile(tmp / snapshot_zip_name(include_finance), "w", compression=zipfile.ZIP_STORED) as zf:
+                for name in snapshot_tables(include_finance):
+                    zf.write(tmp / f"{name}.parquet", arcname=f"{name}.parquet")
+        try:
+            tmp.rename(target)
+        except OSError:
+            if not (target / ready).exists():
+                # снимок прежнего формата (только полный zip) — заменяем
+                shutil.rmtree(target, ignore_errors=True)
+                tmp.rename(target)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def drop_snapshot(run: ImportRun) -> None:
+    shutil.rmtree(snapshot_dir(run), ignore_errors=True)
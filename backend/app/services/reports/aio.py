@@ -0,0 +1,50 @@
+"""
+Async-версии отчётов для AsyncSession.
+
+Расчёт остаётся в service.py; AsyncSession.run_sync выполняет его на async-соединении
+(через greenlet), поэтому долгие запросы не занимают потоки threadpool. Сам greenlet
+работает на потоке цикла событий, поэтому CPU-часть отчётов (свёртки, прогноз, LTTB)
+вынесена в чистые функции и вызывается через concurrency.run_cpu — в отдельном потоке.
+Отчёты с именем идут через общий кэш (cache.py): ключ строится на том же соединении,
+обращения к Redis — через redis.asyncio, цикл событий не блокируется.
+"""
+from functools import wraps
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.reports import batch, cache, portfolio, service
+
+
+def _async(fn, name: str | None = None):
+    @wraps(fn)
+    async def _run(db: AsyncSession, *args, **kwargs):
+        if name is None or not cache.enabled():
+            return await db.run_sync(fn, *args, **kwargs)
+        key = await db.run_sync(lambda s: cache.call_key(s, name, fn, *args, **kwargs))
+        if key is not None:
+            hit = await cache.aget(key)
+            if hit is not None:
+                return hit
+        value = await db.run_sync(fn, *args, **kwargs)
+        if key is not None:
+            await cache.aput(key, value)
+        return value
+    return _run
+
+
+# имена — ключи общего кэша; те же отчёты прогревает Celery после импорта (warmup.py)
+kpi = _async(service.kpi, "kpi")
+plan_fact_series = _async(service.plan_fact_series, "plan_fact_series")
+plan_fact_table_by = _async(service.plan_fact_table_by, "plan_fact_table")
+ugpr_series = _async(service.ugpr_series, "ugpr_series")
+ugpr_operation_table = _async(service.ugpr_operation_table, "ugpr_table")
+manhours_series = _async(service.manhours_series, "manhours_series")
+sales_series = _async(service.sales_series)
+sales_kpi = _async(service.sales_kpi)
+floor_summary = _async(service.floor_summary)
+floor_operations = _async(service.floor_operations)
+floor_series = _async(service.floor_series)
+pnl = _async(service.pnl)
+cashflow = _async(service.cashflow)
+run_batch = _async(batch.run_batch)
+portfolio_kpi = _async(portfolio.portfolio_kpi)
@@ -0,0 +1,69 @@
+"""
+Пакетный расчёт отчётов дашборда (POST /reports/batch).
+
+Все отчёты пакета считаются в одной сессии с общим контекстом (проект/период/версия):
+эффективная версия импорта определяется один раз, а промежуточные агрегаты
+(факт по дням, план по месяцам) кэшируются в Session.info и переиспользуются.
+"""
+from contextlib import contextmanager
+import datetime as dt
+
+from sqlalchemy.orm import Session
+
+from app.services.reports import service
+from app.services.reports.service import _BATCH_MEMO_KEY, _effective_import_run_id
+
+# report -> (функция, параметры спецификации, которые она принимает)
+REPORTS = {
+    "kpi": (service.kpi, ("wbs_path",)),
+    "plan_fact_series": (service.plan_fact_series, ("granularity", "wbs_path", "forecast_model", "max_points")),
+    "plan_fact_table": (service.plan_fact_table_by, ("by", "scenario", "wbs_path", "forecast_model")),
+    "ugpr_series": (service.ugpr_series, ("granularity", "wbs_path", "max_points")),
+    "ugpr_table": (service.ugpr_operation_table, ("wbs_path",)),
+    "manhours_series": (service.manhours_series, ("granularity", "max_points")),
+    "sales_kpi": (service.sales_kpi, ()),
+    "sales_series": (service.sales_series, ()),
+    "floor_summary": (service.floor_summary, ("wbs_path",)),
+    "floor_operations": (service.floor_operations, ("floor", "block", "wbs_path")),
+    "floor_series": (service.floor_series, ("floor", "block", "wbs_path")),
+    "pnl": (service.pnl, ("scenario",)),
+    "cashflow": (service.cashflow, ("scenario", "opening_balance")),
+}
+
+
+@contextmanager
+def batch_scope(db: Session):
+    """Включает общий кэш промежуточных агрегатов на время пакета."""
+    owner = _BATCH_MEMO_KEY not in db.info
+    if owner:
+        db.info[_BATCH_MEMO_KEY] = {}
+    try:
+        yield
+    finally:
+        if owner:
+            db.info.pop(_BATCH_MEMO_KEY, None)
+
+
+def spec_key(spec: dict) -> str:
+    return spec.get("id") or spec["report"]
+
+
+def run_batch(
+    db: Session,
+    project_id: int,
+    date_from: dt.date,
+    date_to: dt.date,
+    specs: list[dict],
+    wbs_path: str | None = None,
+    import_run_id: int | None = None,
+) -> dict:
+    with batch_scope(db):
+        import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+        results = {}
+        for spec in specs:
+            fn, allowed = REPORTS[spec["report"]]
+            kwargs = {name: spec[name] for name in allowed if spec.get(name) is not None}
+            if "wbs_path" in allowed and "wbs_path" not in kwargs and wbs_path:
+                kwargs["wbs_path"] = wbs_path
+            results[spec_key(spec)] = fn(db, project_id, date_from, date_to, import_run_id=import_run_id, **kwargs)
+    return {"import_run_id": import_run_id, "results": results}
@@ -0,0 +1,186 @@
+"""
+Общий (Redis) кэш результатов отчётов для всех процессов API и воркеров.
+
+Ключ: report:<отчёт>:<project_id>:<data_version>:<эффективная версия импорта>:<хэш параметров>.
+Параметры берутся из сигнатуры функции сервиса (с умолчаниями), import_run_id заменяется
+эффективной версией — явный и неявный запрос одной версии попадают в одну запись.
+Изменение данных увеличивает data_version, поэтому запись не инвалидируется, а просто
+перестаёт использоваться и истекает через REPORT_CACHE_TTL_SECONDS.
+
+Недоступный Redis — промах: отчёт считается как обычно, обращения к Redis приостанавливаются
+на _BACKOFF_SECONDS.
+"""
+import datetime as dt
+import hashlib
+import inspect
+import time
+from decimal import Decimal
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import cache_lookup
+from app.db.models.project import Project
+from app.services.reports.service import _effective_import_run_id
+
+_TIMEOUT_SECONDS = 0.5
+_BACKOFF_SECONDS = 30.0
+_DUMP_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_client = None
+_aclient = None
+_down_until = 0.0
+
+
+def enabled() -> bool:
+    return settings.REPORT_CACHE_ENABLED and time.monotonic() >= _down_until
+
+
+def _unavailable(e: Exception) -> None:
+    global _client, _aclient, _down_until
+    _client = _aclient = None
+    _down_until = time.monotonic() + _BACKOFF_SECONDS
+    logger.warning("report_cache_unavailable", error=str(e))
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(type(value).__name__)
+
+
+def dumps(value) -> bytes | None:
+    """JSON записи; None — не кэшируется (несериализуемый или больше REPORT_CACHE_MAX_BYTES)."""
+    try:
+        raw = orjson.dumps(value, default=_default, option=_DUMP_OPTIONS)
+    except TypeError:
+        return None
+    return raw if len(raw) <= settings.REPORT_CACHE_MAX_BYTES else None
+
+
+def make_key(name: str, project_id: int, data_version: int, import_run_id: int | None, params: dict | None = None) -> str:
+    digest = hashlib.sha1(
+        orjson.dumps(params or {}, default=str, option=_DUMP_OPTIONS | orjson.OPT_SORT_KEYS)
+    ).hexdigest()[:16]
+    run = import_run_id if import_run_id is not None else "-"
+    return f"report:{name}:{project_id}:{data_version}:{run}:{digest}"
+
+
+def report_state(db: Session, project_id: int, import_run_id: int | None) -> tuple[int | None, int | None]:
+    """
+    (data_version проекта или None, эффективная версия импорта).
+    Запоминается до конца транзакции: ETag-проверка и ключ кэша в одном запросе читают его один раз.
+    """
+    key = (project_id, import_run_id)
+    tx, memo = db.info.get("report_state", (None, {}))
+    if tx is not None and tx is db.get_transaction() and key in memo:
+        return memo[key]
+    version = db.query(Project.data_version).filter(Project.id == project_id).scalar()
+    state = (version, _effective_import_run_id(db, project_id, import_run_id))
+    if tx is not db.get_transaction():
+        memo = {}
+    memo[key] = state
+    db.info["report_state"] = (db.get_transaction(), memo)
+    return state
+
+
+def call_key(db: Session, name: str, fn, *args, **kwargs) -> str | None:
+    """Ключ вызова fn(db, *args, **kwargs); None — проект не найден (не кэшируем)."""
+    bound = inspect.signature(fn).bind(db, *args, **kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    params.pop("db", None)
+    project_id = params.pop("project_id")
+    version, run_id = report_state(db, project_id, params.pop("import_run_id", None))
+    if version is None:
+        return None
+    # отчёты с «сегодня» (прогноз, просрочка) не должны переживать смену дня
+    params["_today"] = dt.date.today()
+    return make_key(name, project_id, version, run_id, params)
+
+
+def _sync_client():
+    global _client
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL, socket_timeout=_TIMEOUT_SECONDS, socket_connect_timeout=_TIMEOUT_SECONDS
+        )
+    return _client
+
+
+def _async_client():
+    global _aclient
+    if _aclient is None:
+        import redis.asyncio
+
+        _aclient = redis.asyncio.Redis.from_url(
+            settings.REDIS_URL, socket_timeout=_TIMEOUT_SECONDS, socket_connect_timeout=_TIMEOUT_SECONDS
+        )
+    return _aclient
+
+
+def get(key: str):
+    if not enabled():
+        return None
+    try:
+        raw = _sync_client().get(key)
+    except Exception as e:
+        _unavailable(e)
+        return None
+    cache_lookup("report", raw is not None)
+    return orjson.loads(raw) if raw is not None else None
+
+
+def put(key: str, value) -> bool:
+    if not enabled():
+        return False
+    raw = dumps(value)
+    if raw is None:
+        return False
+    try:
+        _sync_client().set(key, raw, ex=settings.REPORT_CACHE_TTL_SECONDS)
+    except Exception as e:
+        _unavailable(e)
+        return False
+    return True
+
+
+async def aget(key: str):
+    if not enabled():
+        return None
+    try:
+        raw = await _async_client().get(key)
+    except Exception as e:
+        _unavailable(e)
+        return None
+    cache_lookup("report", raw is not None)
+    return orjson.loads(raw) if raw is not None else None
+
+
+async def aput(key: str, value) -> None:
+    if not enabled():
+        return
+    raw = dumps(value)
+    if raw is None:
+        return
+    try:
+        await _async_client().set(key, raw, ex=settings.REPORT_CACHE_TTL_SECONDS)
+    except Exception as e:
+        _unavailable(e)
+
+
+def cached_call(db: Session, name: str, fn, *args, **kwargs):
+    """Синхронный вызов отчёта через кэш (Celery-прогрев, sync-эндпоинты)."""
+    key = call_key(db, name, fn, *args, **kwargs) if enabled() else None
+    if key is None:
+        return fn(db, *args, **kwargs)
+    hit = get(key)
+    if hit is not None:
+        return hit
+    value = fn(db, *args, **kwargs)
+    put(key, value)
+    return value
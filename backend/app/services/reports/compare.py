@@ -0,0 +1,221 @@
+"""
+Сравнение версий импорта: KPI и план/факт таблица для N версий одним набором
+сгруппированных запросов (`GROUP BY run_id, ...`) + дельты к опорной версии.
+Числа совпадают с kpi() / plan_fact_table_by(), посчитанными по каждой версии отдельно.
+"""
+import datetime as dt
+from typing import Literal
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.db.models.facts import FactVolumeDaily, PlanVolumeMonthly, FactResourceDaily
+from app.db.models.operation import Operation
+from app.db.models.wbs import WBS
+from app.services.reports.effective import versioned_rows
+from app.services.reports.service import (
+    _apply_wbs_fact_filter,
+    _month_days,
+    _month_overlap_days,
+    plan_fact_table_by,
+)
+
+KPI_DELTA_FIELDS = ("fact_qty", "plan_qty", "progress_pct", "manhours", "productivity")
+ROW_DELTA_FIELDS = ("fact", "plan", "variance", "progress_pct")
+
+
+def _k(v):
+    return v if v not in (None, "") else "—"
+
+
+def _plan_month_query(db: Session, project_id: int, run_ids: list[int], date_from, date_to, scenario, wbs_path, by=None):
+    pv, run_col = versioned_rows(PlanVolumeMonthly, project_id, run_ids)
+    group_col = None if by is None else (WBS.path if by == "wbs" else getattr(Operation, by))
+    cols = [run_col.label("run_id"), pv.month.label("month")]
+    if group_col is not None:
+        cols.append(group_col.label("gk"))
+    qry = (
+        db.query(*cols, func.coalesce(func.sum(pv.qty), 0.0).label("qty"))
+        .filter(
+            pv.scenario == scenario,
+            pv.month >= dt.date(date_from.year, date_from.month, 1),
+            pv.month <= dt.date(date_to.year, date_to.month, 1),
+        )
+    )
+    if group_col is not None or wbs_path:
+        qry = qry.join(
+            Operation,
+            and_(
+                Operation.project_id == pv.project_id,
+                Operation.code == pv.operation_code,
+            ),
+        )
+        if wbs_path or by == "wbs":
+            qry = qry.outerjoin(WBS, Operation.wbs_id == WBS.id)
+        if wbs_path:
+            qry = qry.filter(WBS.path.ilike(f"{wbs_path}%"))
+    group_by = [run_col, pv.month] + ([group_col] if group_col is not None else [])
+    return qry.group_by(*group_by).all()
+
+
+def compare_kpi(
+    db: Session,
+    project_id: int,
+    run_ids: list[int],
+    date_from: dt.date,
+    date_to: dt.date,
+    wbs_path: str | None = None,
+) -> dict[int, dict]:
+    fv, fv_run = versioned_rows(FactVolumeDaily, project_id, run_ids)
+    fact_q = (
+        db.query(fv_run.label("run_id"), func.coalesce(func.sum(fv.qty), 0.0).label("qty"))
+        .filter(
+            fv.date >= date_from,
+            fv.date <= date_to,
+        )
+    )
+    fact = {r.run_id: float(r.qty or 0.0) for r in _apply_wbs_fact_filter(fact_q, fv, wbs_path).group_by(fv_run).all()}
+
+    plan: dict[int, float] = {}
+    for r in _plan_month_query(db, project_id, run_ids, date_from, date_to, "plan", wbs_path):
+        days = _month_overlap_days(date_from, date_to, r.month)
+        if days > 0:
+            plan[r.run_id] = plan.get(r.run_id, 0.0) + (float(r.qty or 0.0) / _month_days(r.month)) * days
+
+    fr, fr_run = versioned_rows(FactResourceDaily, project_id, run_ids)
+    manhours = {
+        r.run_id: float(r.mh or 0.0)
+        for r in db.query(fr_run.label("run_id"), func.coalesce(func.sum(fr.manhours), 0.0).label("mh"))
+        .filter(
+            fr.date >= date_from,
+            fr.date <= date_to,
+        )
+        .group_by(fr_run)
+        .all()
+    }
+
+    out = {}
+    for rid in run_ids:
+        fact_qty = fact.get(rid, 0.0)
+        plan_qty = plan.get(rid, 0.0)
+        mh = manhours.get(rid, 0.0)
+        out[rid] = dict(
+            project_id=project_id,
+            date_from=date_from,
+            date_to=date_to,
+            fact_qty=fact_qty,
+            plan_qty=plan_qty,
+            progress_pct=(fact_qty / plan_qty * 100.0) if plan_qty > 0 else 0.0,
+            manhours=mh,
+            productivity=(fact_qty / mh) if mh > 0 else None,
+        )
+    return out
+
+
+def compare_table(
+    db: Session,
+    project_id: int,
+    run_ids: list[int],
+    date_from: dt.date,
+    date_to: dt.date,
+    by: Literal["wbs", "discipline", "block", "floor", "ugpr"] = "wbs",
+    scenario: Literal["plan", "forecast", "actual"] = "plan",
+    wbs_path: str | None = None,
+) -> dict[int, dict[str, dict]]:
+    fv, fv_run = versioned_rows(FactVolumeDaily, project_id, run_ids)
+    col = getattr(fv, by)
+    fact_q = (
+        db.query(fv_run.label("run_id"), col.label("k"), func.coalesce(func.sum(fv.qty), 0.0).label("fact"))
+        .filter(
+            fv.date >= date_from,
+            fv.date <= date_to,
+        )
+    )
+    fact_maps: dict[int, dict[str, float]] = {rid: {} for rid in run_ids}
+    for r in _apply_wbs_fact_filter(fact_q, fv, wbs_path).group_by(fv_run, col).all():
+        m = fact_maps[r.run_id]
+        m[_k(r.k)] = m.get(_k(r.k), 0.0) + float(r.fact or 0.0)
+
+    plan_maps: dict[int, dict[str, float]] = {rid: {} for rid in run_ids}
+    if scenario == "actual":
+        plan_maps = {rid: dict(m) for rid, m in fact_maps.items()}
+    else:
+        plan_scenario = "forecast" if scenario == "forecast" else "plan"
+        for r in _plan_month_query(db, project_id, run_ids, date_from, date_to, plan_scenario, wbs_path, by=by):
+            days = _month_overlap_days(date_from, date_to, r.month)
+            if days <= 0:
+                continue
+            m = plan_maps[r.run_id]
+            m[_k(r.gk)] = m.get(_k(r.gk), 0.0) + (float(r.qty or 0.0) / _month_days(r.month)) * days
+
+        if scenario == "forecast":
+            # версии без прогноза в файле: авто-прогноз по факту, как в plan_fact_table_by
+            for rid in run_ids:
+                if plan_maps[rid]:
+                    continue
+                table = plan_fact_table_by(
+                    db, project_id, date_from, date_to, by=by, scenario="forecast", wbs_path=wbs_path, import_run_id=rid
+                )
+                plan_maps[rid] = {row["key"]: row["plan"] for row in table["rows"]}
+
+    out: dict[int, dict[str, dict]] = {}
+    for rid in run_ids:
+        fact_map, plan_map = fact_maps[rid], plan_maps[rid]
+        rows = {}
+        for k in set(fact_map) | set(plan_map):
+            fact = float(fact_map.get(k, 0.0))
+            plan = float(plan_map.get(k, 0.0))
+            rows[k] = {
+                "fact": fact,
+                "plan": plan,
+                "variance": fact - plan,
+                "progress_pct": (fact / plan * 100.0) if plan > 0 else 0.0,
+            }
+        out[rid] = rows
+    return out
+
+
+def _delta(cur: dict, ref: dict, fields) -> dict:
+    return {f: float(cur.get(f) or 0.0) - float(ref.get(f) or 0.0) for f in fields}
+
+
+def compare_versions(
+    db: Session,
+    project_id: int,
+    run_ids: list[int],
+    date_from: dt.date,
+    date_to: dt.date,
+    reference_run_id: int | None = None,
+    by: Literal["wbs", "discipline", "block", "floor", "ugpr"] = "wbs",
+    scenario: Literal["plan", "forecast", "actual"] = "plan",
+    wbs_path: str | None = None,
+):
+    if reference_run_id is None:
+        reference_run_id = run_ids[0]
+    kpis = compare_kpi(db, project_id, run_ids, date_from, date_to, wbs_path=wbs_path)
+    tables = compare_table(db, project_id, run_ids, date_from, date_to, by=by, scenario=scenario, wbs_path=wbs_path)
+
+    empty_row = {"fact": 0.0, "plan": 0.0, "variance": 0.0, "progress_pct": 0.0}
+    ref_kpi = kpis[reference_run_id]
+    ref_rows = tables[reference_run_id]
+    keys = sorted(set().union(*(t.keys() for t in tables.values())))
+    rows = []
+    for key in keys:
+        ref = ref_rows.get(key, empty_row)
+        runs = []
+        for rid in run_ids:
+            cur = tables[rid].get(key, empty_row)
+            runs.append({"import_run_id": rid, **cur, "delta": _delta(cur, ref, ROW_DELTA_FIELDS)})
+        rows.append({"key": key, "runs": runs})
+
+    return {
+        "project_id": project_id,
+        "run_ids": run_ids,
+        "reference_run_id": reference_run_id,
+        "period": {"date_from": date_from.isoformat(), "date_to": date_to.isoformat()},
+        "kpi": [
+            {"import_run_id": rid, **kpis[rid], "delta": _delta(kpis[rid], ref_kpi, KPI_DELTA_FIELDS)}
+            for rid in run_ids
+        ],
+        "table": {"by": by, "scenario": scenario, "rows": rows},
+    }
@@ -0,0 +1,60 @@
+"""
+Прореживание временных рядов отчётов (параметр max_points).
+
+Largest-Triangle-Three-Buckets: первая и последняя точки сохраняются, остальные делятся
+на max_points - 2 корзины, из каждой берётся точка, образующая наибольший треугольник
+с выбранной точкой предыдущей корзины и средним следующей — пики и провалы не теряются.
+Точка, представляющая больше одной исходной, помечается aggregated=True и points=<сколько>.
+Значения не суммируются: итог по ряду считается по исходным данным, а не по прореженным.
+"""
+import datetime as dt
+
+MIN_POINTS = 3
+
+
+def _x(point: dict) -> int:
+    period = point["period"]
+    if isinstance(period, str):
+        period = dt.date.fromisoformat(period[:10])
+    return period.toordinal()
+
+
+def lttb(points: list[dict], max_points: int) -> list[dict]:
+    """Точки {"period", "value"} по возрастанию периода -> не больше max_points точек."""
+    n = len(points)
+    if max_points < MIN_POINTS or n <= max_points:
+        return points
+    xs = [_x(p) for p in points]
+    ys = [float(p["value"] or 0.0) for p in points]
+
+    every = (n - 2) / (max_points - 2)
+    out = [points[0]]
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - end
+        avg_x = sum(xs[end:next_end]) / span
+        avg_y = sum(ys[end:next_end]) / span
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            # удвоенная площадь треугольника (a, j, среднее следующей корзины)
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        picked = points[best]
+        if end - start > 1:
+            picked = {**picked, "aggregated": True, "points": end - start}
+        out.append(picked)
+        a = best
+    out.append(points[-1])
+    return out
+
+
+def downsample_series(out: dict, max_points: int | None) -> dict:
+    """Прореживает каждый ряд (список точек) ответа отчёта."""
+    if not max_points:
+        return out
+    return {key: lttb(value, max_points) if isinstance(value, list) else value for key, value in out.items()}
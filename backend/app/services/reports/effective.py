@@ -0,0 +1,69 @@
+"""
+Эффективные данные отчётов: строки одной версии импорта + ручные строки (import_run_id IS NULL).
+
+Вместо `import_run_id = :id OR import_run_id IS NULL` (bitmap-or / seq scan в PostgreSQL)
+каждый срез выбирается отдельно и склеивается UNION ALL — каждая ветка идёт
+по своему составному индексу (миграция 0005_effective_indexes).
+"""
+from sqlalchemy import literal, select, true, tuple_, union_all
+from sqlalchemy.orm import aliased
+
+
+def effective_rows(model, project_id: int, import_run_id: int | None):
+    """
+    Алиас `model` над эффективными строками проекта.
+    Используется как сама модель: `F = effective_rows(FactVolumeDaily, ...); db.query(F.qty)`.
+    """
+    manual = select(model).where(
+        model.project_id == project_id,
+        model.import_run_id.is_(None),
+    )
+    if import_run_id is None:
+        return aliased(model, manual.subquery())
+    run = select(model).where(
+        model.project_id == project_id,
+        model.import_run_id == import_run_id,
+    )
+    return aliased(model, union_all(run, manual).subquery())
+
+
+def versioned_rows(model, project_id: int, import_run_ids: list[int]):
+    """
+    Эффективные строки нескольких версий сразу: срез версии помечен её id,
+    ручные строки повторяются для каждой версии (cross join со списком версий).
+    Возвращает (алиас, колонка id версии) для запросов `GROUP BY run_id, ...`.
+    """
+    runs = union_all(*[select(literal(rid).label("run_id")) for rid in import_run_ids]).subquery("runs")
+    table = model.__table__
+    run = select(table.c.import_run_id.label("effective_run_id"), *table.c).where(
+        table.c.project_id == project_id,
+        table.c.import_run_id.in_(import_run_ids),
+    )
+    manual = (
+        select(runs.c.run_id.label("effective_run_id"), *table.c)
+        .select_from(table.join(runs, true()))
+        .where(
+            table.c.project_id == project_id,
+            table.c.import_run_id.is_(None),
+        )
+    )
+    sub = union_all(run, manual).subquery()
+    return aliased(model, sub), sub.c.effective_run_id
+
+
+def portfolio_rows(model, runs: dict[int, int | None]):
+    """
+    Эффективные строки нескольких проектов, у каждого своя версия (project_id -> id версии или None).
+    Срезы версий выбираются по парам (project_id, import_run_id), ручные строки — по списку
+    проектов; результат группируется по `project_id`.
+    """
+    table = model.__table__
+    manual = select(table).where(
+        table.c.project_id.in_(list(runs)),
+        table.c.import_run_id.is_(None),
+    )
+    pairs = [(project_id, run_id) for project_id, run_id in runs.items() if run_id is not None]
+    if not pairs:
+        return aliased(model, manual.subquery())
+    run = select(table).where(tuple_(table.c.project_id, table.c.import_run_id).in_(pairs))
+    return aliased(model, union_all(run, manual).subquery())
@@ -0,0 +1,91 @@
+"""
+Авто-прогноз по факту для отчётов (когда в файле нет сценария «прогноз»).
+
+Все группы считаются сразу: факт собирается в матрицу группа × период, модель
+применяется к матрице целиком (NumPy), без цикла по группам.
+В расчёт идут только периоды с положительным фактом.
+
+Модели:
+- linear          — МНК-прямая по наблюдениям (одно наблюдение → ровный прогноз);
+- moving_average  — среднее последних `window` наблюдений;
+- exp_smoothing   — простое экспоненциальное сглаживание с коэффициентом `alpha`.
+"""
+from typing import Literal
+
+import numpy as np
+
+ForecastModel = Literal["linear", "moving_average", "exp_smoothing"]
+FORECAST_MODELS = ("linear", "moving_average", "exp_smoothing")
+
+
+def _linear(y: np.ndarray, w: np.ndarray) -> np.ndarray:
+    x = np.arange(y.shape[1], dtype=float)
+    n = w.sum(axis=1)
+    sx = (w * x).sum(axis=1)
+    sy = (w * y).sum(axis=1)
+    sxx = (w * x * x).sum(axis=1)
+    sxy = (w * x * y).sum(axis=1)
+    denom = n * sxx - sx * sx
+    ok = denom != 0
+    safe = np.where(ok, denom, 1.0)
+    a = np.where(ok, (n * sxy - sx * sy) / safe, 0.0)
+    b = np.where(ok, (sy - a * sx) / np.where(n > 0, n, 1.0), _last_obs_value(y, w))
+    return a[:, None] * x[None, :] + b[:, None]
+
+
+def _moving_average(y: np.ndarray, w: np.ndarray, window: int) -> np.ndarray:
+    # номер наблюдения с конца: 1 — последнее наблюдение в строке
+    from_end = np.cumsum(w[:, ::-1], axis=1)[:, ::-1]
+    take = w & (from_end <= max(int(window), 1))
+    cnt = take.sum(axis=1)
+    level = (y * take).sum(axis=1) / np.where(cnt > 0, cnt, 1)
+    return np.repeat(level[:, None], y.shape[1], axis=1)
+
+
+def _exp_smoothing(y: np.ndarray, w: np.ndarray, alpha: float) -> np.ndarray:
+    level = np.zeros(y.shape[0])
+    seen = np.zeros(y.shape[0], dtype=bool)
+    for j in range(y.shape[1]):
+        obs = w[:, j]
+        level = np.where(obs & seen, alpha * y[:, j] + (1.0 - alpha) * level, level)
+        level = np.where(obs & ~seen, y[:, j], level)
+        seen |= obs
+    return np.repeat(level[:, None], y.shape[1], axis=1)
+
+
+def _last_obs_value(y: np.ndarray, w: np.ndarray) -> np.ndarray:
+    idx = last_observation_index(w)
+    return np.where(idx >= 0, y[np.arange(y.shape[0]), np.maximum(idx, 0)], 0.0)
+
+
+def last_observation_index(w: np.ndarray) -> np.ndarray:
+    """Индекс последнего периода с наблюдением по каждой строке (-1, если наблюдений нет)."""
+    p = w.shape[1]
+    rev = np.argmax(w[:, ::-1], axis=1)
+    return np.where(w.any(axis=1), p - 1 - rev, -1)
+
+
+def forecast_matrix(
+    values,
+    model: ForecastModel = "linear",
+    window: int = 3,
+    alpha: float = 0.5,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    values: матрица факта группа × период.
+    Возвращает (прогноз на все периоды, индекс последнего наблюдения по строке).
+    Для строк без наблюдений индекс = -1, прогноз не определён.
+    """
+    y = np.asarray(values, dtype=float)
+    if y.ndim == 1:
+        y = y[None, :]
+    w = y > 0
+    if model == "linear":
+        out = _linear(y, w)
+    elif model == "moving_average":
+        out = _moving_average(y, w, window)
+    elif model == "exp_smoothing":
+        out = _exp_smoothing(y, w, alpha)
+    else:
+        raise ValueError("unknown_forecast_model")
+    return out, last_observation_index(w)
@@ -0,0 +1,116 @@
+"""
+KPI портфеля (GET /reports/portfolio/kpi): те же показатели, что /reports/kpi, для всех проектов.
+
+Последняя успешная версия импорта каждого проекта — один запрос DISTINCT ON, факт, план и
+трудозатраты — по одному запросу с GROUP BY project_id (portfolio_rows), вместо
+«версия + три агрегата» на каждый проект. Сортировка по показателям, поэтому страница
+вырезается после расчёта.
+"""
+import datetime as dt
+from typing import Literal
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models.facts import FactResourceDaily, FactVolumeDaily, PlanVolumeMonthly
+from app.db.models.import_run import ImportRun
+from app.db.models.project import Project
+from app.services.reports.effective import portfolio_rows
+from app.services.reports.service import _month_days, _month_overlap_days
+
+PortfolioSort = Literal["code", "name", "fact_qty", "plan_qty", "progress_pct", "manhours", "productivity"]
+
+
+def latest_import_runs(db: Session, project_ids: list[int]) -> dict[int, int]:
+    """project_id -> последняя успешная версия (порядок как у _latest_import_run_id)."""
+    rows = (
+        db.query(ImportRun.project_id, ImportRun.id)
+        .filter(
+            ImportRun.project_id.in_(project_ids),
+            ImportRun.status.in_(("success", "success_with_errors")),
+        )
+        .distinct(ImportRun.project_id)
+        .order_by(ImportRun.project_id, ImportRun.finished_at.desc().nullslast(), ImportRun.id.desc())
+        .all()
+    )
+    return {project_id: run_id for project_id, run_id in rows}
+
+
+def _sort_key(sort: str):
+    if sort in ("code", "name"):
+        return lambda item: (item[sort] or "").lower()
+    # пустые (productivity = None) — в конце при любом направлении, см. portfolio_kpi
+    return lambda item: item[sort] if item[sort] is not None else 0.0
+
+
+def portfolio_kpi(
+    db: Session,
+    date_from: dt.date,
+    date_to: dt.date,
+    sort: PortfolioSort = "code",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = 50,
+    offset: int = 0,
+):
+    projects = db.query(Project.id, Project.code, Project.name).all()
+    if not projects:
+        return dict(date_from=date_from, date_to=date_to, total=0, items=[])
+    latest = latest_import_runs(db, [p.id for p in projects])
+    runs = {p.id: latest.get(p.id) for p in projects}
+
+    fv = portfolio_rows(FactVolumeDaily, runs)
+    fact = dict(
+        db.query(fv.project_id, func.coalesce(func.sum(fv.qty), 0.0))
+        .filter(fv.date >= date_from, fv.date <= date_to)
+        .group_by(fv.project_id)
+        .all()
+    )
+
+    pv = portfolio_rows(PlanVolumeMonthly, runs)
+    plan: dict[int, float] = {}
+    for project_id, month, qty in (
+        db.query(pv.project_id, pv.month, func.coalesce(func.sum(pv.qty), 0.0))
+        .filter(
+            pv.month >= dt.date(date_from.year, date_from.month, 1),
+            pv.month <= dt.date(date_to.year, date_to.month, 1),
+            pv.scenario == "plan",
+        )
+        .group_by(pv.project_id, pv.month)
+        .all()
+    ):
+        # план месяца делится на дни и берётся пересечение с периодом — как в service.kpi
+        overlap = _month_overlap_days(date_from, date_to, month)
+        plan[project_id] = plan.get(project_id, 0.0) + (qty or 0.0) / _month_days(month) * overlap
+
+    fr = portfolio_rows(FactResourceDaily, runs)
+    manhours = dict(
+        db.query(fr.project_id, func.coalesce(func.sum(fr.manhours), 0.0))
+        .filter(fr.date >= date_from, fr.date <= date_to)
+        .group_by(fr.project_id)
+        .all()
+    )
+
+    items = []
+    for p in projects:
+        fact_qty = float(fact.get(p.id) or 0.0)
+        plan_qty = float(plan.get(p.id, 0.0))
+        mh = float(manhours.get(p.id) or 0.0)
+        items.append(
+            dict(
+                project_id=p.id,
+                code=p.code,
+                name=p.name,
+                import_run_id=runs[p.id],
+                fact_qty=fact_qty,
+                plan_qty=plan_qty,
+                progress_pct=fact_qty / plan_qty * 100.0 if plan_qty > 0 else 0.0,
+                manhours=mh,
+                productivity=fact_qty / mh if mh > 0 else None,
+            )
+        )
+
+    items.sort(key=lambda item: item["project_id"])
+    items.sort(key=_sort_key(sort), reverse=order == "desc")
+    if sort == "productivity":
+        items.sort(key=lambda item: item["productivity"] is None)
+    return dict(date_from=date_from, date_to=date_to, total=len(items), items=items[offset : offset + limit])
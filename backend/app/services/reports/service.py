@@ -2,7 +2,7 @@ import datetime as dt
 from typing import Literal
 
 from sqlalchemy.orm import Session, aliased
-from sqlalchemy import func, Date, cast, and_, or_
+from sqlalchemy import func, Date, cast, and_
 
 from app.db.models.facts import (
     FactVolumeDaily,
@@ -16,6 +16,10 @@ from app.db.models.operation import Operation
 from app.db.models.wbs import WBS
 from app.db.models.import_run import ImportRun
 from app.db.models.sales import SalesMonthly
+from app.core.concurrency import run_cpu
+from app.services.reports.downsample import downsample_series
+from app.services.reports.effective import effective_rows
+from app.services.reports.forecast import ForecastModel, forecast_matrix
 
 Granularity = Literal["day", "week", "month"]
 
@@ -40,10 +44,10 @@ def _month_days(month_start: dt.date) -> int:
     return (next_m - month_start).days
 
 
-def _apply_wbs_fact_filter(q, wbs_path: str | None):
+def _apply_wbs_fact_filter(q, fv, wbs_path: str | None):
     if wbs_path:
         like = f"{wbs_path}%"
-        return q.filter(FactVolumeDaily.wbs.ilike(like))
+        return q.filter(fv.wbs.ilike(like))
     return q
 
 
@@ -60,14 +64,25 @@ def _latest_import_run_id(db: Session, project_id: int) -> int | None:
     return run.id if run else None
 
 
-def _effective_import_run_id(db: Session, project_id: int, import_run_id: int | None) -> int | None:
-    return import_run_id if import_run_id is not None else _latest_import_run_id(db, project_id)
+# Общий кэш промежуточных данных в рамках одного пакета отчётов (см. reports/batch.py).
+# Живёт в Session.info, поэтому существует ровно столько, сколько сессия запроса.
+_BATCH_MEMO_KEY = "reports_batch_memo"
+
 
+def _batch_memo(db: Session) -> dict | None:
+    return db.info.get(_BATCH_MEMO_KEY)
 
-def _apply_import_run_filter(q, model, import_run_id: int | None):
-    if import_run_id is None:
-        return q.filter(model.import_run_id.is_(None))
-    return q.filter(or_(model.import_run_id == import_run_id, model.import_run_id.is_(None)))
+
+def _effective_import_run_id(db: Session, project_id: int, import_run_id: int | None) -> int | None:
+    if import_run_id is not None:
+        return import_run_id
+    memo = _batch_memo(db)
+    if memo is None:
+        return _latest_import_run_id(db, project_id)
+    key = ("latest_run", project_id)
+    if key not in memo:
+        memo[key] = _latest_import_run_id(db, project_id)
+    return memo[key]
 
 
 def _month_overlap_days(date_from: dt.date, date_to: dt.date, month_start: dt.date) -> int:
@@ -80,70 +95,82 @@ def _month_overlap_days(date_from: dt.date, date_to: dt.date, month_start: dt.da
     return (overlap_end - overlap_start).days + 1
 
 
-def _plan_month_rows(
+def _period_start(d: dt.date, granularity: Granularity) -> dt.date:
+    if granularity == "week":
+        return d - dt.timedelta(days=d.weekday())  # Monday start, как date_trunc('week')
+    if granularity == "month":
+        return dt.date(d.year, d.month, 1)
+    return d
+
+
+def _fact_day_rows(
     db: Session,
     project_id: int,
     date_from: dt.date,
     date_to: dt.date,
-    scenario: str,
     import_run_id: int | None = None,
     wbs_path: str | None = None,
-):
+) -> list[tuple[dt.date, float]]:
+    """Факт объёмов по дням — общий агрегат для KPI и план/факт серий любой гранулярности."""
+    memo = _batch_memo(db)
+    key = ("fact_day_rows", project_id, date_from, date_to, import_run_id, wbs_path)
+    if memo is not None and key in memo:
+        return memo[key]
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
     qry = (
-        db.query(PlanVolumeMonthly.month.label("period"), func.coalesce(func.sum(PlanVolumeMonthly.qty), 0.0).label("value"))
+        db.query(fv.date.label("period"), func.coalesce(func.sum(fv.qty), 0.0).label("value"))
         .filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.month >= dt.date(date_from.year, date_from.month, 1),
-            PlanVolumeMonthly.month <= dt.date(date_to.year, date_to.month, 1),
-            PlanVolumeMonthly.scenario == scenario,
+            fv.date >= date_from,
+            fv.date <= date_to,
         )
     )
-    qry = _apply_import_run_filter(qry, PlanVolumeMonthly, import_run_id)
-    if wbs_path:
-        qry = (
-            qry.join(
-                Operation,
-                and_(
-                    Operation.project_id == PlanVolumeMonthly.project_id,
-                    Operation.code == PlanVolumeMonthly.operation_code,
-                ),
-            )
-            .join(WBS, Operation.wbs_id == WBS.id)
-            .filter(WBS.path.ilike(f"{wbs_path}%"))
-        )
-    return qry.group_by(PlanVolumeMonthly.month).order_by(PlanVolumeMonthly.month).all()
+    rows = [
+        (r.period, float(r.value or 0.0))
+        for r in _apply_wbs_fact_filter(qry, fv, wbs_path).group_by(fv.date).order_by(fv.date).all()
+    ]
+    if memo is not None:
+        memo[key] = rows
+    return rows
 
 
-def _plan_qty_for_month(
+def _plan_month_rows(
     db: Session,
     project_id: int,
-    month: dt.date,
+    date_from: dt.date,
+    date_to: dt.date,
     scenario: str,
     import_run_id: int | None = None,
     wbs_path: str | None = None,
 ):
+    memo = _batch_memo(db)
+    key = ("plan_month_rows", project_id, date_from, date_to, scenario, import_run_id, wbs_path)
+    if memo is not None and key in memo:
+        return memo[key]
+    pv = effective_rows(PlanVolumeMonthly, project_id, import_run_id)
     qry = (
-        db.query(func.coalesce(func.sum(PlanVolumeMonthly.qty), 0.0))
+        db.query(pv.month.label("period"), func.coalesce(func.sum(pv.qty), 0.0).label("value"))
         .filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.month == month,
-            PlanVolumeMonthly.scenario == scenario,
+            pv.month >= dt.date(date_from.year, date_from.month, 1),
+            pv.month <= dt.date(date_to.year, date_to.month, 1),
+            pv.scenario == scenario,
         )
     )
-    qry = _apply_import_run_filter(qry, PlanVolumeMonthly, import_run_id)
     if wbs_path:
         qry = (
             qry.join(
                 Operation,
                 and_(
-                    Operation.project_id == PlanVolumeMonthly.project_id,
-                    Operation.code == PlanVolumeMonthly.operation_code,
+                    Operation.project_id == pv.project_id,
+                    Operation.code == pv.operation_code,
                 ),
             )
             .join(WBS, Operation.wbs_id == WBS.id)
             .filter(WBS.path.ilike(f"{wbs_path}%"))
         )
-    return qry.scalar() or 0.0
+    rows = [(r.period, r.value) for r in qry.group_by(pv.month).order_by(pv.month).all()]
+    if memo is not None:
+        memo[key] = rows
+    return rows
 
 
 def kpi(
@@ -155,19 +182,8 @@ def kpi(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
-    fact_qty_q = (
-        db.query(func.coalesce(func.sum(FactVolumeDaily.qty), 0.0))
-        .filter(
-            FactVolumeDaily.project_id == project_id,
-            FactVolumeDaily.date >= date_from,
-            FactVolumeDaily.date <= date_to,
-        )
-    )
-    fact_qty = _apply_import_run_filter(
-        _apply_wbs_fact_filter(fact_qty_q, wbs_path),
-        FactVolumeDaily,
-        import_run_id,
-    ).scalar() or 0.0
+    fact_day_rows = _fact_day_rows(db, project_id, date_from, date_to, import_run_id=import_run_id, wbs_path=wbs_path)
+    fact_qty = sum(v for _, v in fact_day_rows)
 
     plan_rows = _plan_month_rows(
         db,
@@ -189,15 +205,16 @@ def kpi(
             overlap_days = (overlap_end - overlap_start).days + 1
             plan_qty += (qty / _month_days(m_start)) * overlap_days
 
-    manhours_q = (
-        db.query(func.coalesce(func.sum(FactResourceDaily.manhours), 0.0))
+    fr = effective_rows(FactResourceDaily, project_id, import_run_id)
+    manhours = (
+        db.query(func.coalesce(func.sum(fr.manhours), 0.0))
         .filter(
-            FactResourceDaily.project_id == project_id,
-            FactResourceDaily.date >= date_from,
-            FactResourceDaily.date <= date_to,
+            fr.date >= date_from,
+            fr.date <= date_to,
         )
+        .scalar()
+        or 0.0
     )
-    manhours = _apply_import_run_filter(manhours_q, FactResourceDaily, import_run_id).scalar() or 0.0
 
     progress_pct = (fact_qty / plan_qty * 100.0) if plan_qty > 0 else 0.0
     productivity = (fact_qty / manhours) if manhours > 0 else None
@@ -214,6 +231,131 @@ def kpi(
     )
 
 
+def _auto_forecast(rows, plan_rows, fact_rows, forecast_model: ForecastModel = "linear"):
+    """Прогноз по тренду факта, если сценария forecast в файле нет (rows пусто)."""
+    if rows:
+        return rows
+
+    periods = sorted({p for p, _ in plan_rows} | {p for p, _ in fact_rows})
+    if not periods:
+        return []
+    fact_map = {p: float(v or 0.0) for p, v in fact_rows}
+    values, last = forecast_matrix([[fact_map.get(p, 0.0) for p in periods]], model=forecast_model)
+    last_fact_idx = int(last[0])
+    # прогноз только после последнего периода с фактом
+    if last_fact_idx < 0 or last_fact_idx >= len(periods) - 1:
+        return []
+    return [(p, float(values[0, i])) for i, p in enumerate(periods) if i > last_fact_idx]
+
+
+def _prorate_plan(rows, date_from: dt.date, date_to: dt.date) -> dict[str, float]:
+    """(ключ, месяц, объём) -> объём по ключу пропорционально дням месяца внутри периода."""
+    plan_map: dict[str, float] = {}
+    for key, month, qty in rows:
+        days = _month_overlap_days(date_from, date_to, month)
+        if days <= 0:
+            continue
+        plan_map[key] = plan_map.get(key, 0.0) + (float(qty or 0.0) / _month_days(month)) * days
+    return plan_map
+
+
+def _forecast_by_group(
+    fact_by_group: dict[str, dict[dt.date, float]],
+    date_from: dt.date,
+    date_to: dt.date,
+    forecast_model: ForecastModel = "linear",
+) -> dict[str, float]:
+    """Прогноз по тренду месячного факта каждой группы, сумма по дням периода."""
+    months = _daterange_month_starts(date_from, date_to)
+    groups = list(fact_by_group.keys())
+    out: dict[str, float] = {}
+    if not groups or not months:
+        return out
+    values, last = forecast_matrix(
+        [[fact_by_group[key].get(m, 0.0) for m in months] for key in groups],
+        model=forecast_model,
+    )
+    weights = [_month_overlap_days(date_from, date_to, m) / _month_days(m) for m in months]
+    for gi, key in enumerate(groups):
+        if last[gi] < 0:
+            continue
+        out[key] = float((values[gi] * weights).sum())
+    return out
+
+
+def _plan_fact_rows(fact_map: dict[str, float], plan_map: dict[str, float]) -> list[dict]:
+    """Строки таблицы план/факт, по убыванию модуля отклонения."""
+    rows = []
+    for k in set(fact_map.keys()) | set(plan_map.keys()):
+        fact = float(fact_map.get(k, 0.0))
+        plan = float(plan_map.get(k, 0.0))
+        variance = fact - plan
+        progress = (fact / plan * 100.0) if plan > 0 else 0.0
+        rows.append({"key": k, "fact": fact, "plan": plan, "variance": variance, "progress_pct": progress})
+
+    rows.sort(key=lambda x: abs(x["variance"]), reverse=True)
+    return rows
+
+
+def _points(rows) -> list[dict]:
+    out = []
+    for p, v in rows:
+        # чтобы фронту было стабильно
+        period = p.isoformat() if hasattr(p, "isoformat") else str(p)
+        out.append({"period": period, "value": float(v or 0.0)})
+    return out
+
+
+def _spread_month_rows(month_rows, date_from: dt.date, date_to: dt.date, granularity: Granularity):
+    """Месячные объёмы -> равномерно по дням периода -> суммы по периодам гранулярности."""
+    month_qty = dict(month_rows)
+    daily: dict[dt.date, float] = {}
+    for m in _daterange_month_starts(date_from, date_to):
+        qty = month_qty.get(m, 0.0)
+        per_day = (qty / _month_days(m)) if qty else 0.0
+        for i in range(_month_days(m)):
+            d = m + dt.timedelta(days=i)
+            if date_from <= d <= date_to:
+                daily[d] = daily.get(d, 0.0) + per_day
+
+    out_map: dict[dt.date, float] = {}
+    for d, v in daily.items():
+        p = _period_start(d, granularity)
+        out_map[p] = out_map.get(p, 0.0) + v
+
+    return [(p, out_map[p]) for p in sorted(out_map.keys())]
+
+
+def _plan_fact_points(
+    fact_day_rows,
+    plan_month_rows,
+    forecast_month_rows,
+    date_from: dt.date,
+    date_to: dt.date,
+    granularity: Granularity,
+    forecast_model: ForecastModel,
+    max_points: int | None,
+) -> dict:
+    """CPU-часть plan_fact_series: свёртка факта, распределение плана, автопрогноз, LTTB."""
+    fact_map: dict[dt.date, float] = {}
+    for d, v in fact_day_rows:
+        p = _period_start(d, granularity)
+        fact_map[p] = fact_map.get(p, 0.0) + v
+    fact_rows = sorted(fact_map.items())
+
+    if granularity == "month":
+        plan_rows, forecast_rows = plan_month_rows, forecast_month_rows
+    else:
+        plan_rows = _spread_month_rows(plan_month_rows, date_from, date_to, granularity)
+        forecast_rows = _spread_month_rows(forecast_month_rows, date_from, date_to, granularity)
+
+    out = {"fact": _points(fact_rows), "plan": _points(plan_rows)}
+    forecast_rows = _auto_forecast(forecast_rows, plan_rows, fact_rows, forecast_model)
+    if forecast_rows:
+        out["forecast"] = _points(forecast_rows)
+    return downsample_series(out, max_points)
+
+
 def plan_fact_series(
     db: Session,
     project_id: int,
@@ -222,129 +364,28 @@ def plan_fact_series(
     granularity: Granularity = "month",
     wbs_path: str | None = None,
     import_run_id: int | None = None,
+    forecast_model: ForecastModel = "linear",
+    max_points: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
-    # ✅ ВАЖНО: кастим в sqlalchemy.Date
-    if granularity == "day":
-        period_expr = FactVolumeDaily.date
-    elif granularity == "week":
-        period_expr = cast(func.date_trunc("week", FactVolumeDaily.date), Date)
-    else:
-        period_expr = cast(func.date_trunc("month", FactVolumeDaily.date), Date)
-
-    fact_rows_q = (
-        db.query(period_expr.label("period"), func.coalesce(func.sum(FactVolumeDaily.qty), 0.0).label("value"))
-        .filter(
-            FactVolumeDaily.project_id == project_id,
-            FactVolumeDaily.date >= date_from,
-            FactVolumeDaily.date <= date_to,
-        )
+    fact_day_rows = _fact_day_rows(db, project_id, date_from, date_to, import_run_id=import_run_id, wbs_path=wbs_path)
+    plan_month_rows = _plan_month_rows(
+        db, project_id, date_from, date_to, "plan", import_run_id=import_run_id, wbs_path=wbs_path
     )
-    fact_rows = (
-        _apply_import_run_filter(_apply_wbs_fact_filter(fact_rows_q, wbs_path), FactVolumeDaily, import_run_id)
-        .group_by(period_expr)
-        .order_by(period_expr)
-        .all()
+    forecast_month_rows = _plan_month_rows(
+        db, project_id, date_from, date_to, "forecast", import_run_id=import_run_id, wbs_path=wbs_path
+    )
+    return run_cpu(
+        _plan_fact_points,
+        fact_day_rows,
+        plan_month_rows,
+        forecast_month_rows,
+        date_from,
+        date_to,
+        granularity,
+        forecast_model,
+        max_points,
     )
-
-    def _daily_rows_for_scenario(scenario: str):
-        months = _daterange_month_starts(date_from, date_to)
-        daily: dict[dt.date, float] = {}
-        for m in months:
-            qty = _plan_qty_for_month(db, project_id, m, scenario, import_run_id=import_run_id, wbs_path=wbs_path)
-            per_day = (qty / _month_days(m)) if qty else 0.0
-            for i in range(_month_days(m)):
-                d = m + dt.timedelta(days=i)
-                if date_from <= d <= date_to:
-                    daily[d] = daily.get(d, 0.0) + per_day
-
-        out_map: dict[dt.date, float] = {}
-        for d, v in daily.items():
-            if granularity == "week":
-                p = d - dt.timedelta(days=d.weekday())  # Monday start
-            else:
-                p = d
-            out_map[p] = out_map.get(p, 0.0) + v
-
-        return [(p, out_map[p]) for p in sorted(out_map.keys())]
-
-    if granularity == "month":
-        plan_rows = _plan_month_rows(
-            db, project_id, date_from, date_to, "plan", import_run_id=import_run_id, wbs_path=wbs_path
-        )
-        forecast_rows = _plan_month_rows(
-            db, project_id, date_from, date_to, "forecast", import_run_id=import_run_id, wbs_path=wbs_path
-        )
-    else:
-        plan_rows = _daily_rows_for_scenario("plan")
-        forecast_rows = _daily_rows_for_scenario("forecast")
-
-    def to_points(rows):
-        out = []
-        for p, v in rows:
-            # чтобы фронту было стабильно
-            period = p.isoformat() if hasattr(p, "isoformat") else str(p)
-            out.append({"period": period, "value": float(v or 0.0)})
-        return out
-
-    def _auto_forecast(rows, plan_rows, fact_rows):
-        if rows:
-            return rows
-
-        # Build full period list
-        periods = sorted({p for p, _ in plan_rows} | {p for p, _ in fact_rows})
-        if not periods:
-            return []
-
-        fact_map = {p: float(v or 0.0) for p, v in fact_rows}
-        # Use non-zero fact points for regression
-        xs = []
-        ys = []
-        last_fact_idx = None
-        for i, p in enumerate(periods):
-            v = fact_map.get(p, 0.0)
-            if v > 0:
-                xs.append(float(i))
-                ys.append(float(v))
-                last_fact_idx = i
-
-        if not xs:
-            return []
-
-        # Forecast only after last fact period
-        if last_fact_idx is None or last_fact_idx >= len(periods) - 1:
-            return []
-
-        if len(xs) == 1:
-            # flat forecast from last known fact
-            last_val = ys[0]
-            return [(p, last_val) for p in periods[last_fact_idx + 1 :]]
-
-        # simple linear regression y = a*x + b
-        n = float(len(xs))
-        sum_x = sum(xs)
-        sum_y = sum(ys)
-        sum_xx = sum(x * x for x in xs)
-        sum_xy = sum(x * y for x, y in zip(xs, ys))
-        denom = (n * sum_xx - sum_x * sum_x)
-        if denom == 0:
-            last_val = ys[-1]
-            return [(p, last_val) for p in periods[last_fact_idx + 1 :]]
-
-        a = (n * sum_xy - sum_x * sum_y) / denom
-        b = (sum_y - a * sum_x) / n
-
-        forecast = []
-        for i, p in enumerate(periods[last_fact_idx + 1 :], start=last_fact_idx + 1):
-            v = a * float(i) + b
-            forecast.append((p, float(v)))
-        return forecast
-
-    out = {"fact": to_points(fact_rows), "plan": to_points(plan_rows)}
-    forecast_rows = _auto_forecast(forecast_rows, plan_rows, fact_rows)
-    if forecast_rows:
-        out["forecast"] = to_points(forecast_rows)
-    return out
 
 
 def plan_fact_table_by(
@@ -356,31 +397,24 @@ def plan_fact_table_by(
     scenario: Literal["plan", "forecast", "actual"] = "plan",
     wbs_path: str | None = None,
     import_run_id: int | None = None,
+    forecast_model: ForecastModel = "linear",
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
-    def _month_overlap_days(month_start: dt.date) -> int:
-        m_start = month_start
-        m_end = m_start + dt.timedelta(days=_month_days(m_start) - 1)
-        overlap_start = max(date_from, m_start)
-        overlap_end = min(date_to, m_end)
-        if overlap_start > overlap_end:
-            return 0
-        return (overlap_end - overlap_start).days + 1
 
     def _k(v):
         return v if v not in (None, "") else "—"
 
-    col = getattr(FactVolumeDaily, by)
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
+    col = getattr(fv, by)
     fact_rows_q = (
-        db.query(col.label("k"), func.coalesce(func.sum(FactVolumeDaily.qty), 0.0).label("fact"))
+        db.query(col.label("k"), func.coalesce(func.sum(fv.qty), 0.0).label("fact"))
         .filter(
-            FactVolumeDaily.project_id == project_id,
-            FactVolumeDaily.date >= date_from,
-            FactVolumeDaily.date <= date_to,
+            fv.date >= date_from,
+            fv.date <= date_to,
         )
     )
     fact_rows = (
-        _apply_import_run_filter(_apply_wbs_fact_filter(fact_rows_q, wbs_path), FactVolumeDaily, import_run_id)
+        _apply_wbs_fact_filter(fact_rows_q, fv, wbs_path)
         .group_by(col)
         .all()
     )
@@ -397,112 +431,53 @@ def plan_fact_table_by(
 
         op_group_col = getattr(Operation, by) if by != "wbs" else None
 
+        pv = effective_rows(PlanVolumeMonthly, project_id, import_run_id)
         qry = db.query(
-            PlanVolumeMonthly.month.label("month"),
-            PlanVolumeMonthly.qty.label("qty"),
+            pv.month.label("month"),
+            pv.qty.label("qty"),
             (WBS.path.label("gk") if by == "wbs" else op_group_col.label("gk")),
         ).join(
             Operation,
             and_(
-                Operation.project_id == PlanVolumeMonthly.project_id,
-                Operation.code == PlanVolumeMonthly.operation_code,
+                Operation.project_id == pv.project_id,
+                Operation.code == pv.operation_code,
             ),
         )
         if by == "wbs" or wbs_path:
             qry = qry.outerjoin(WBS, Operation.wbs_id == WBS.id)
 
         qry = qry.filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.scenario == plan_scenario,
-            PlanVolumeMonthly.month >= month_from,
-            PlanVolumeMonthly.month <= month_to,
+            pv.scenario == plan_scenario,
+            pv.month >= month_from,
+            pv.month <= month_to,
         )
-        qry = _apply_import_run_filter(qry, PlanVolumeMonthly, import_run_id)
         if wbs_path:
             qry = qry.filter(WBS.path.ilike(f"{wbs_path}%"))
 
-        plan_rows = qry.all()
-        if plan_rows:
-            for r in plan_rows:
-                key = _k(r.gk)
-                days = _month_overlap_days(r.month)
-                if days <= 0:
-                    continue
-                qty = float(r.qty or 0.0)
-                plan_map[key] = plan_map.get(key, 0.0) + (qty / _month_days(r.month)) * days
+        plan_map = run_cpu(_prorate_plan, [(_k(r.gk), r.month, r.qty) for r in qry.all()], date_from, date_to)
 
         if scenario == "forecast" and not plan_map:
-            period_expr = cast(func.date_trunc("month", FactVolumeDaily.date), Date)
+            period_expr = cast(func.date_trunc("month", fv.date), Date)
             fact_month_q = (
-                db.query(period_expr.label("period"), col.label("k"), func.coalesce(func.sum(FactVolumeDaily.qty), 0.0).label("fact"))
+                db.query(period_expr.label("period"), col.label("k"), func.coalesce(func.sum(fv.qty), 0.0).label("fact"))
                 .filter(
-                    FactVolumeDaily.project_id == project_id,
-                    FactVolumeDaily.date >= date_from,
-                    FactVolumeDaily.date <= date_to,
+                    fv.date >= date_from,
+                    fv.date <= date_to,
                 )
             )
             fact_month_rows = (
-                _apply_import_run_filter(_apply_wbs_fact_filter(fact_month_q, wbs_path), FactVolumeDaily, import_run_id)
+                _apply_wbs_fact_filter(fact_month_q, fv, wbs_path)
                 .group_by(period_expr, col)
                 .all()
             )
-            months = _daterange_month_starts(date_from, date_to)
             fact_by_group: dict[str, dict[dt.date, float]] = {}
             for r in fact_month_rows:
                 key = _k(r.k)
                 fact_by_group.setdefault(key, {})
                 fact_by_group[key][r.period] = float(r.fact or 0.0)
+            plan_map = run_cpu(_forecast_by_group, fact_by_group, date_from, date_to, forecast_model)
 
-            def _auto_forecast(periods: list[dt.date], fact_map_per: dict[dt.date, float]) -> dict[dt.date, float]:
-                if not periods:
-                    return {}
-                xs = []
-                ys = []
-                for i, p in enumerate(periods):
-                    v = fact_map_per.get(p, 0.0)
-                    if v > 0:
-                        xs.append(float(i))
-                        ys.append(float(v))
-                if not xs:
-                    return {}
-                if len(xs) == 1:
-                    last_val = ys[0]
-                    return {p: last_val for p in periods}
-                n = float(len(xs))
-                sum_x = sum(xs)
-                sum_y = sum(ys)
-                sum_xx = sum(x * x for x in xs)
-                sum_xy = sum(x * y for x, y in zip(xs, ys))
-                denom = (n * sum_xx - sum_x * sum_x)
-                if denom == 0:
-                    last_val = ys[-1]
-                    return {p: last_val for p in periods}
-                a = (n * sum_xy - sum_x * sum_y) / denom
-                b = (sum_y - a * sum_x) / n
-                return {p: float(a * i + b) for i, p in enumerate(periods)}
-
-            for key, fmap in fact_by_group.items():
-                forecast_map = _auto_forecast(months, fmap)
-                if not forecast_map:
-                    continue
-                for m in months:
-                    days = _month_overlap_days(m)
-                    if days <= 0:
-                        continue
-                    qty = forecast_map.get(m, 0.0)
-                    plan_map[key] = plan_map.get(key, 0.0) + (qty / _month_days(m)) * days
-
-    keys = set(fact_map.keys()) | set(plan_map.keys())
-    rows = []
-    for k in keys:
-        fact = float(fact_map.get(k, 0.0))
-        plan = float(plan_map.get(k, 0.0))
-        variance = fact - plan
-        progress = (fact / plan * 100.0) if plan > 0 else 0.0
-        rows.append({"key": k, "fact": fact, "plan": plan, "variance": variance, "progress_pct": progress})
-
-    rows.sort(key=lambda x: abs(x["variance"]), reverse=True)
-    return {"rows": rows}
+    return {"rows": run_cpu(_plan_fact_rows, fact_map, plan_map)}
 
 
 def ugpr_series(
@@ -513,35 +488,38 @@ def ugpr_series(
     granularity: Granularity = "month",
     wbs_path: str | None = None,
     import_run_id: int | None = None,
+    max_points: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
     if granularity == "day":
-        period_expr = FactVolumeDaily.date
+        period_expr = fv.date
     elif granularity == "week":
-        period_expr = cast(func.date_trunc("week", FactVolumeDaily.date), Date)
+        period_expr = cast(func.date_trunc("week", fv.date), Date)
     else:
-        period_expr = cast(func.date_trunc("month", FactVolumeDaily.date), Date)
+        period_expr = cast(func.date_trunc("month", fv.date), Date)
 
-    baseline_exact = aliased(BaselineVolume)
-    baseline_cat_q = (
+    baseline_exact = effective_rows(BaselineVolume, project_id, import_run_id)
+    bv = effective_rows(BaselineVolume, project_id, import_run_id)
+    baseline_cat = (
         db.query(
-            BaselineVolume.project_id.label("project_id"),
-            BaselineVolume.operation_code.label("operation_code"),
-            BaselineVolume.category.label("category"),
-            func.coalesce(func.avg(BaselineVolume.price), 0.0).label("price"),
+            bv.project_id.label("project_id"),
+            bv.operation_code.label("operation_code"),
+            bv.category.label("category"),
+            func.coalesce(func.avg(bv.price), 0.0).label("price"),
         )
-        .filter(BaselineVolume.price.isnot(None))
+        .filter(bv.price.isnot(None))
+        .group_by(
+            bv.project_id,
+            bv.operation_code,
+            bv.category,
+        )
+        .subquery()
     )
-    baseline_cat_q = _apply_import_run_filter(baseline_cat_q, BaselineVolume, import_run_id)
-    baseline_cat = baseline_cat_q.group_by(
-        BaselineVolume.project_id,
-        BaselineVolume.operation_code,
-        BaselineVolume.category,
-    ).subquery()
 
     amount_expr = func.coalesce(
-        FactVolumeDaily.amount,
-        FactVolumeDaily.qty
+        fv.amount,
+        fv.qty
         * func.coalesce(
             baseline_exact.price,
             baseline_cat.c.price,
@@ -554,117 +532,93 @@ def ugpr_series(
         .outerjoin(
             baseline_exact,
             and_(
-                FactVolumeDaily.project_id == baseline_exact.project_id,
-                FactVolumeDaily.operation_code == baseline_exact.operation_code,
-                FactVolumeDaily.category == baseline_exact.category,
-                FactVolumeDaily.item_name == baseline_exact.item_name,
-                (
-                    baseline_exact.import_run_id.is_(None)
-                    if import_run_id is None
-                    else or_(
-                        baseline_exact.import_run_id == import_run_id,
-                        baseline_exact.import_run_id.is_(None),
-                    )
-                ),
+                fv.project_id == baseline_exact.project_id,
+                fv.operation_code == baseline_exact.operation_code,
+                fv.category == baseline_exact.category,
+                fv.item_name == baseline_exact.item_name,
             ),
         )
         .outerjoin(
             baseline_cat,
             and_(
-                FactVolumeDaily.project_id == baseline_cat.c.project_id,
-                FactVolumeDaily.operation_code == baseline_cat.c.operation_code,
-                FactVolumeDaily.category == baseline_cat.c.category,
+                fv.project_id == baseline_cat.c.project_id,
+                fv.operation_code == baseline_cat.c.operation_code,
+                fv.category == baseline_cat.c.category,
             ),
         )
         .filter(
-            FactVolumeDaily.project_id == project_id,
-            FactVolumeDaily.date >= date_from,
-            FactVolumeDaily.date <= date_to,
+            fv.date >= date_from,
+            fv.date <= date_to,
         )
     )
-    qry = _apply_import_run_filter(_apply_wbs_fact_filter(qry, wbs_path), FactVolumeDaily, import_run_id)
+    qry = _apply_wbs_fact_filter(qry, fv, wbs_path)
     rows = qry.group_by(period_expr).order_by(period_expr).all()
 
-    out = []
-    for p, v in rows:
-        period = p.isoformat() if hasattr(p, "isoformat") else str(p)
-        out.append({"period": period, "value": float(v or 0.0)})
-
     # Plan money series: distribute monthly plan amounts by granularity
+    bv_op = effective_rows(BaselineVolume, project_id, import_run_id)
     price_by_op = (
         db.query(
-            BaselineVolume.project_id.label("project_id"),
-            BaselineVolume.operation_code.label("operation_code"),
-            func.coalesce(func.avg(BaselineVolume.price), 0.0).label("price"),
+            bv_op.project_id.label("project_id"),
+            bv_op.operation_code.label("operation_code"),
+            func.coalesce(func.avg(bv_op.price), 0.0).label("price"),
+        )
+        .filter(bv_op.price.isnot(None))
+        .group_by(
+            bv_op.project_id,
+            bv_op.operation_code,
         )
-        .filter(BaselineVolume.price.isnot(None))
+        .subquery()
     )
-    price_by_op = _apply_import_run_filter(price_by_op, BaselineVolume, import_run_id).group_by(
-        BaselineVolume.project_id,
-        BaselineVolume.operation_code,
-    ).subquery()
 
+    pv = effective_rows(PlanVolumeMonthly, project_id, import_run_id)
     plan_month_q = (
         db.query(
-            PlanVolumeMonthly.month.label("period"),
-            func.coalesce(func.sum(PlanVolumeMonthly.qty * func.coalesce(price_by_op.c.price, 0.0)), 0.0).label("value"),
+            pv.month.label("period"),
+            func.coalesce(func.sum(pv.qty * func.coalesce(price_by_op.c.price, 0.0)), 0.0).label("value"),
         )
         .outerjoin(
             price_by_op,
             and_(
-                PlanVolumeMonthly.project_id == price_by_op.c.project_id,
-                PlanVolumeMonthly.operation_code == price_by_op.c.operation_code,
+                pv.project_id == price_by_op.c.project_id,
+                pv.operation_code == price_by_op.c.operation_code,
             ),
         )
         .filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.month >= dt.date(date_from.year, date_from.month, 1),
-            PlanVolumeMonthly.month <= dt.date(date_to.year, date_to.month, 1),
-            PlanVolumeMonthly.scenario == "plan",
+            pv.month >= dt.date(date_from.year, date_from.month, 1),
+            pv.month <= dt.date(date_to.year, date_to.month, 1),
+            pv.scenario == "plan",
         )
     )
-    plan_month_q = _apply_import_run_filter(plan_month_q, PlanVolumeMonthly, import_run_id)
     if wbs_path:
         plan_month_q = (
             plan_month_q.join(
                 Operation,
                 and_(
-                    Operation.project_id == PlanVolumeMonthly.project_id,
-                    Operation.code == PlanVolumeMonthly.operation_code,
+                    Operation.project_id == pv.project_id,
+                    Operation.code == pv.operation_code,
                 ),
             )
             .join(WBS, Operation.wbs_id == WBS.id)
             .filter(WBS.path.ilike(f"{wbs_path}%"))
         )
 
-    plan_month_rows = plan_month_q.group_by(PlanVolumeMonthly.month).order_by(PlanVolumeMonthly.month).all()
+    plan_month_rows = [(p, float(v or 0.0)) for p, v in plan_month_q.group_by(pv.month).order_by(pv.month).all()]
 
-    plan_out = []
-    if granularity == "month":
-        for p, v in plan_month_rows:
-            plan_out.append({"period": p.isoformat(), "value": float(v or 0.0)})
-    else:
-        months = _daterange_month_starts(date_from, date_to)
-        daily: dict[dt.date, float] = {}
-        plan_map = {p: float(v or 0.0) for p, v in plan_month_rows}
-        for m in months:
-            qty = plan_map.get(m, 0.0)
-            per_day = (qty / _month_days(m)) if qty else 0.0
-            for i in range(_month_days(m)):
-                d = m + dt.timedelta(days=i)
-                if date_from <= d <= date_to:
-                    daily[d] = daily.get(d, 0.0) + per_day
-        out_map: dict[dt.date, float] = {}
-        for d, v in daily.items():
-            if granularity == "week":
-                p = d - dt.timedelta(days=d.weekday())
-            else:
-                p = d
-            out_map[p] = out_map.get(p, 0.0) + v
-        for p in sorted(out_map.keys()):
-            plan_out.append({"period": p.isoformat(), "value": float(out_map[p] or 0.0)})
-
-    return {"series": out, "plan": plan_out}
+    return run_cpu(_ugpr_points, rows, plan_month_rows, date_from, date_to, granularity, max_points)
+
+
+def _ugpr_points(
+    rows,
+    plan_month_rows,
+    date_from: dt.date,
+    date_to: dt.date,
+    granularity: Granularity,
+    max_points: int | None,
+) -> dict:
+    """CPU-часть ugpr_series: точки факта, распределение денежного плана по дням, LTTB."""
+    if granularity != "month":
+        plan_month_rows = _spread_month_rows(plan_month_rows, date_from, date_to, granularity)
+    return downsample_series({"series": _points(rows), "plan": _points(plan_month_rows)}, max_points)
 
 
 def manhours_series(
@@ -674,41 +628,38 @@ def manhours_series(
     date_to: dt.date,
     granularity: Granularity = "month",
     import_run_id: int | None = None,
+    max_points: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    fr = effective_rows(FactResourceDaily, project_id, import_run_id)
     if granularity == "day":
-        period_expr = FactResourceDaily.date
+        period_expr = fr.date
     elif granularity == "week":
-        period_expr = cast(func.date_trunc("week", FactResourceDaily.date), Date)
+        period_expr = cast(func.date_trunc("week", fr.date), Date)
     else:
-        period_expr = cast(func.date_trunc("month", FactResourceDaily.date), Date)
+        period_expr = cast(func.date_trunc("month", fr.date), Date)
 
-    value_expr = func.coalesce(FactResourceDaily.manhours, FactResourceDaily.qty)
+    value_expr = func.coalesce(fr.manhours, fr.qty)
 
     def _rows_for_scenario(scenario: str):
         qry = (
             db.query(period_expr.label("period"), func.coalesce(func.sum(value_expr), 0.0).label("value"))
             .filter(
-                FactResourceDaily.project_id == project_id,
-                FactResourceDaily.date >= date_from,
-                FactResourceDaily.date <= date_to,
-                FactResourceDaily.scenario == scenario,
+                fr.date >= date_from,
+                fr.date <= date_to,
+                fr.scenario == scenario,
             )
         )
-        qry = _apply_import_run_filter(qry, FactResourceDaily, import_run_id)
         return qry.group_by(period_expr).order_by(period_expr).all()
 
     plan_rows = _rows_for_scenario("plan")
     fact_rows = _rows_for_scenario("fact")
 
-    def to_points(rows):
-        out = []
-        for p, v in rows:
-            period = p.isoformat() if hasattr(p, "isoformat") else str(p)
-            out.append({"period": period, "value": float(v or 0.0)})
-        return out
+    return run_cpu(_manhours_points, plan_rows, fact_rows, max_points)
+
 
-    return {"plan": to_points(plan_rows), "fact": to_points(fact_rows)}
+def _manhours_points(plan_rows, fact_rows, max_points: int | None) -> dict:
+    return downsample_series({"plan": _points(plan_rows), "fact": _points(fact_rows)}, max_points)
 
 
 def floor_summary(
@@ -720,96 +671,101 @@ def floor_summary(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
+    pv = effective_rows(PlanVolumeMonthly, project_id, import_run_id)
     month_from = dt.date(date_from.year, date_from.month, 1)
     month_to = dt.date(date_to.year, date_to.month, 1)
 
     baseline_floor = aliased(BaselineVolume)
     plan_q = (
         db.query(
-            PlanVolumeMonthly.operation_code.label("code"),
+            pv.operation_code.label("code"),
             func.coalesce(Operation.floor, baseline_floor.floor).label("floor"),
             func.coalesce(Operation.block, baseline_floor.block).label("block"),
-            PlanVolumeMonthly.month.label("month"),
-            func.coalesce(func.sum(PlanVolumeMonthly.qty), 0.0).label("plan"),
+            pv.month.label("month"),
+            func.coalesce(func.sum(pv.qty), 0.0).label("plan"),
         )
         .join(
             Operation,
             and_(
-                Operation.project_id == PlanVolumeMonthly.project_id,
-                Operation.code == PlanVolumeMonthly.operation_code,
+                Operation.project_id == pv.project_id,
+                Operation.code == pv.operation_code,
             ),
         )
         .outerjoin(
             baseline_floor,
             and_(
-                baseline_floor.project_id == PlanVolumeMonthly.project_id,
-                baseline_floor.operation_code == PlanVolumeMonthly.operation_code,
+                baseline_floor.project_id == pv.project_id,
+                baseline_floor.operation_code == pv.operation_code,
             ),
         )
         .filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.scenario == "plan",
-            PlanVolumeMonthly.month >= month_from,
-            PlanVolumeMonthly.month <= month_to,
+            pv.scenario == "plan",
+            pv.month >= month_from,
+            pv.month <= month_to,
         )
     )
     if wbs_path:
         plan_q = plan_q.join(WBS, Operation.wbs_id == WBS.id).filter(WBS.path.ilike(f"{wbs_path}%"))
-    plan_q = _apply_import_run_filter(plan_q, PlanVolumeMonthly, import_run_id).group_by(
-        PlanVolumeMonthly.operation_code,
+    plan_q = plan_q.group_by(
+        pv.operation_code,
         func.coalesce(Operation.floor, baseline_floor.floor),
         func.coalesce(Operation.block, baseline_floor.block),
-        PlanVolumeMonthly.month,
+        pv.month,
     )
     plan_rows = plan_q.all()
 
-    plan_by_op: dict[str, float] = {}
-    floor_by_op: dict[str, str | None] = {}
-    block_by_op: dict[str, str | None] = {}
-    for r in plan_rows:
-        days = _month_overlap_days(date_from, date_to, r.month)
-        if days <= 0:
-            continue
-        plan_by_op[r.code] = plan_by_op.get(r.code, 0.0) + (float(r.plan or 0.0) / _month_days(r.month)) * days
-        floor_by_op[r.code] = r.floor
-        block_by_op[r.code] = r.block
-
     fact_q = (
         db.query(
-            FactVolumeDaily.operation_code.label("code"),
-            func.coalesce(Operation.floor, baseline_floor.floor, FactVolumeDaily.floor).label("floor"),
-            func.coalesce(Operation.block, baseline_floor.block, FactVolumeDaily.block).label("block"),
-            func.coalesce(func.sum(FactVolumeDaily.qty), 0.0).label("fact"),
+            fv.operation_code.label("code"),
+            func.coalesce(Operation.floor, baseline_floor.floor, fv.floor).label("floor"),
+            func.coalesce(Operation.block, baseline_floor.block, fv.block).label("block"),
+            func.coalesce(func.sum(fv.qty), 0.0).label("fact"),
         )
         .join(
             Operation,
             and_(
-                Operation.project_id == FactVolumeDaily.project_id,
-                Operation.code == FactVolumeDaily.operation_code,
+                Operation.project_id == fv.project_id,
+                Operation.code == fv.operation_code,
             ),
         )
         .outerjoin(
             baseline_floor,
             and_(
-                baseline_floor.project_id == FactVolumeDaily.project_id,
-                baseline_floor.operation_code == FactVolumeDaily.operation_code,
+                baseline_floor.project_id == fv.project_id,
+                baseline_floor.operation_code == fv.operation_code,
             ),
         )
         .filter(
-            FactVolumeDaily.project_id == project_id,
-            FactVolumeDaily.date >= date_from,
-            FactVolumeDaily.date <= date_to,
+            fv.date >= date_from,
+            fv.date <= date_to,
         )
     )
     if wbs_path:
         fact_q = fact_q.join(WBS, Operation.wbs_id == WBS.id).filter(WBS.path.ilike(f"{wbs_path}%"))
-    fact_q = _apply_import_run_filter(fact_q, FactVolumeDaily, import_run_id).group_by(
-        FactVolumeDaily.operation_code,
-        func.coalesce(Operation.floor, baseline_floor.floor, FactVolumeDaily.floor),
-        func.coalesce(Operation.block, baseline_floor.block, FactVolumeDaily.block),
+    fact_q = fact_q.group_by(
+        fv.operation_code,
+        func.coalesce(Operation.floor, baseline_floor.floor, fv.floor),
+        func.coalesce(Operation.block, baseline_floor.block, fv.block),
     )
     fact_rows = fact_q.all()
 
+    return {"rows": run_cpu(_floor_rows, plan_rows, fact_rows, date_from, date_to)}
+
+
+def _floor_rows(plan_rows, fact_rows, date_from: dt.date, date_to: dt.date) -> list[dict]:
+    """CPU-часть floor_summary: план пропорционально дням периода, средний % выполнения по этажам."""
+    plan_by_op: dict[str, float] = {}
+    floor_by_op: dict[str, str | None] = {}
+    block_by_op: dict[str, str | None] = {}
+    for r in plan_rows:
+        days = _month_overlap_days(date_from, date_to, r.month)
+        if days <= 0:
+            continue
+        plan_by_op[r.code] = plan_by_op.get(r.code, 0.0) + (float(r.plan or 0.0) / _month_days(r.month)) * days
+        floor_by_op[r.code] = r.floor
+        block_by_op[r.code] = r.block
+
     fact_by_op: dict[str, float] = {}
     for r in fact_rows:
         fact_by_op[r.code] = float(r.fact or 0.0)
@@ -850,7 +806,7 @@ def floor_summary(
             }
         )
 
-    return {"rows": rows}
+    return rows
 
 
 def floor_operations(
@@ -864,35 +820,36 @@ def floor_operations(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
+    pv = effective_rows(PlanVolumeMonthly, project_id, import_run_id)
     month_from = dt.date(date_from.year, date_from.month, 1)
     month_to = dt.date(date_to.year, date_to.month, 1)
 
     baseline_floor = aliased(BaselineVolume)
     plan_q = (
         db.query(
-            PlanVolumeMonthly.operation_code.label("code"),
-            func.coalesce(func.sum(PlanVolumeMonthly.qty), 0.0).label("plan"),
-            PlanVolumeMonthly.month.label("month"),
+            pv.operation_code.label("code"),
+            func.coalesce(func.sum(pv.qty), 0.0).label("plan"),
+            pv.month.label("month"),
         )
         .join(
             Operation,
             and_(
-                Operation.project_id == PlanVolumeMonthly.project_id,
-                Operation.code == PlanVolumeMonthly.operation_code,
+                Operation.project_id == pv.project_id,
+                Operation.code == pv.operation_code,
             ),
         )
         .outerjoin(
             baseline_floor,
             and_(
-                baseline_floor.project_id == PlanVolumeMonthly.project_id,
-                baseline_floor.operation_code == PlanVolumeMonthly.operation_code,
+                baseline_floor.project_id == pv.project_id,
+                baseline_floor.operation_code == pv.operation_code,
             ),
         )
         .filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.scenario == "plan",
-            PlanVolumeMonthly.month >= month_from,
-            PlanVolumeMonthly.month <= month_to,
+            pv.scenario == "plan",
+            pv.month >= month_from,
+            pv.month <= month_to,
             func.coalesce(Operation.floor, baseline_floor.floor) == floor,
         )
     )
@@ -900,9 +857,9 @@ def floor_operations(
         plan_q = plan_q.filter(func.coalesce(Operation.block, baseline_floor.block) == block)
     if wbs_path:
         plan_q = plan_q.join(WBS, Operation.wbs_id == WBS.id).filter(WBS.path.ilike(f"{wbs_path}%"))
-    plan_q = _apply_import_run_filter(plan_q, PlanVolumeMonthly, import_run_id).group_by(
-        PlanVolumeMonthly.operation_code,
-        PlanVolumeMonthly.month,
+    plan_q = plan_q.group_by(
+        pv.operation_code,
+        pv.month,
     )
     plan_rows = plan_q.all()
 
@@ -915,36 +872,35 @@ def floor_operations(
 
     fact_q = (
         db.query(
-            FactVolumeDaily.operation_code.label("code"),
-            func.coalesce(func.sum(FactVolumeDaily.qty), 0.0).label("fact"),
+            fv.operation_code.label("code"),
+            func.coalesce(func.sum(fv.qty), 0.0).label("fact"),
         )
         .join(
             Operation,
             and_(
-                Operation.project_id == FactVolumeDaily.project_id,
-                Operation.code == FactVolumeDaily.operation_code,
+                Operation.project_id == fv.project_id,
+                Operation.code == fv.operation_code,
             ),
         )
         .outerjoin(
             baseline_floor,
             and_(
-                baseline_floor.project_id == FactVolumeDaily.project_id,
-                baseline_floor.operation_code == FactVolumeDaily.operation_code,
+                baseline_floor.project_id == fv.project_id,
+                baseline_floor.operation_code == fv.operation_code,
             ),
         )
         .filter(
-            FactVolumeDaily.project_id == project_id,
-            FactVolumeDaily.date >= date_from,
-            FactVolumeDaily.date <= date_to,
-            func.coalesce(Operation.floor, baseline_floor.floor, FactVolumeDaily.floor) == floor,
+            fv.date >= date_from,
+            fv.date <= date_to,
+            func.coalesce(Operation.floor, baseline_floor.floor, fv.floor) == floor,
         )
     )
     if block:
-        fact_q = fact_q.filter(func.coalesce(Operation.block, baseline_floor.block, FactVolumeDaily.block) == block)
+        fact_q = fact_q.filter(func.coalesce(Operation.block, baseline_floor.block, fv.block) == block)
     if wbs_path:
         fact_q = fact_q.join(WBS, Operation.wbs_id == WBS.id).filter(WBS.path.ilike(f"{wbs_path}%"))
-    fact_q = _apply_import_run_filter(fact_q, FactVolumeDaily, import_run_id).group_by(
-        FactVolumeDaily.operation_code,
+    fact_q = fact_q.group_by(
+        fv.operation_code,
     )
     fact_rows = fact_q.all()
 
@@ -994,34 +950,35 @@ def floor_series(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
+    pv = effective_rows(PlanVolumeMonthly, project_id, import_run_id)
     months = _daterange_month_starts(date_from, date_to)
 
     baseline_floor = aliased(BaselineVolume)
     plan_q = (
         db.query(
-            PlanVolumeMonthly.month.label("month"),
-            PlanVolumeMonthly.operation_code.label("code"),
-            func.coalesce(func.sum(PlanVolumeMonthly.qty), 0.0).label("plan"),
-            PlanVolumeMonthly.scenario.label("scenario"),
+            pv.month.label("month"),
+            pv.operation_code.label("code"),
+            func.coalesce(func.sum(pv.qty), 0.0).label("plan"),
+            pv.scenario.label("scenario"),
         )
         .join(
             Operation,
             and_(
-                Operation.project_id == PlanVolumeMonthly.project_id,
-                Operation.code == PlanVolumeMonthly.operation_code,
+                Operation.project_id == pv.project_id,
+                Operation.code == pv.operation_code,
             ),
         )
         .outerjoin(
             baseline_floor,
             and_(
-                baseline_floor.project_id == PlanVolumeMonthly.project_id,
-                baseline_floor.operation_code == PlanVolumeMonthly.operation_code,
+                baseline_floor.project_id == pv.project_id,
+                baseline_floor.operation_code == pv.operation_code,
             ),
         )
         .filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.month >= dt.date(date_from.year, date_from.month, 1),
-            PlanVolumeMonthly.month <= dt.date(date_to.year, date_to.month, 1),
+            pv.month >= dt.date(date_from.year, date_from.month, 1),
+            pv.month <= dt.date(date_to.year, date_to.month, 1),
             func.coalesce(Operation.floor, baseline_floor.floor) == floor,
         )
     )
@@ -1031,10 +988,10 @@ def floor_series(
         plan_q = plan_q.filter(Operation.block == block)
     if wbs_path:
         plan_q = plan_q.join(WBS, Operation.wbs_id == WBS.id).filter(WBS.path.ilike(f"{wbs_path}%"))
-    plan_q = _apply_import_run_filter(plan_q, PlanVolumeMonthly, import_run_id).group_by(
-        PlanVolumeMonthly.month,
-        PlanVolumeMonthly.operation_code,
-        PlanVolumeMonthly.scenario,
+    plan_q = plan_q.group_by(
+        pv.month,
+        pv.operation_code,
+        pv.scenario,
     )
     plan_rows = plan_q.all()
 
@@ -1048,40 +1005,39 @@ def floor_series(
 
     fact_q = (
         db.query(
-            cast(func.date_trunc("month", FactVolumeDaily.date), Date).label("month"),
-            FactVolumeDaily.operation_code.label("code"),
-            func.coalesce(func.sum(FactVolumeDaily.qty), 0.0).label("fact"),
+            cast(func.date_trunc("month", fv.date), Date).label("month"),
+            fv.operation_code.label("code"),
+            func.coalesce(func.sum(fv.qty), 0.0).label("fact"),
         )
         .join(
             Operation,
             and_(
-                Operation.project_id == FactVolumeDaily.project_id,
-                Operation.code == FactVolumeDaily.operation_code,
+                Operation.project_id == fv.project_id,
+                Operation.code == fv.operation_code,
             ),
         )
         .outerjoin(
             baseline_floor,
             and_(
-                baseline_floor.project_id == FactVolumeDaily.project_id,
-                baseline_floor.operation_code == FactVolumeDaily.operation_code,
+                baseline_floor.project_id == fv.project_id,
+                baseline_floor.operation_code == fv.operation_code,
             ),
         )
         .filter(
-            FactVolumeDaily.project_id == project_id,
-            FactVolumeDaily.date >= date_from,
-            FactVolumeDaily.date <= date_to,
-            func.coalesce(Operation.floor, baseline_floor.floor, FactVolumeDaily.floor) == floor,
+            fv.date >= date_from,
+            fv.date <= date_to,
+            func.coalesce(Operation.floor, baseline_floor.floor, fv.floor) == floor,
         )
     )
     if block:
-        fact_q = fact_q.filter(func.coalesce(Operation.block, baseline_floor.block, FactVolumeDaily.block) == block)
+        fact_q = fact_q.filter(func.coalesce(Operation.block, baseline_floor.block, fv.block) == block)
     if block:
         fact_q = fact_q.filter(Operation.block == block)
     if wbs_path:
         fact_q = fact_q.join(WBS, Operation.wbs_id == WBS.id).filter(WBS.path.ilike(f"{wbs_path}%"))
-    fact_q = _apply_import_run_filter(fact_q, FactVolumeDaily, import_run_id).group_by(
-        cast(func.date_trunc("month", FactVolumeDaily.date), Date),
-        FactVolumeDaily.operation_code,
+    fact_q = fact_q.group_by(
+        cast(func.date_trunc("month", fv.date), Date),
+        fv.operation_code,
     )
     fact_rows = fact_q.all()
 
@@ -1131,21 +1087,20 @@ def sales_series(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    sm = effective_rows(SalesMonthly, project_id, import_run_id)
     month_from = dt.date(date_from.year, date_from.month, 1)
     month_to = dt.date(date_to.year, date_to.month, 1)
 
     def _rows_for(scenario: str):
         qry = (
-            db.query(SalesMonthly.month.label("period"), func.coalesce(func.sum(SalesMonthly.area_m2), 0.0).label("value"))
+            db.query(sm.month.label("period"), func.coalesce(func.sum(sm.area_m2), 0.0).label("value"))
             .filter(
-                SalesMonthly.project_id == project_id,
-                SalesMonthly.month >= month_from,
-                SalesMonthly.month <= month_to,
-                SalesMonthly.scenario == scenario,
+                sm.month >= month_from,
+                sm.month <= month_to,
+                sm.scenario == scenario,
             )
         )
-        qry = _apply_import_run_filter(qry, SalesMonthly, import_run_id)
-        return qry.group_by(SalesMonthly.month).order_by(SalesMonthly.month).all()
+        return qry.group_by(sm.month).order_by(sm.month).all()
 
     def _to_points(rows):
         out = []
@@ -1165,20 +1120,19 @@ def sales_kpi(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    sm = effective_rows(SalesMonthly, project_id, import_run_id)
     month_from = dt.date(date_from.year, date_from.month, 1)
     month_to = dt.date(date_to.year, date_to.month, 1)
 
     def _sum_for(scenario: str) -> float:
         qry = (
-            db.query(func.coalesce(func.sum(SalesMonthly.area_m2), 0.0))
+            db.query(func.coalesce(func.sum(sm.area_m2), 0.0))
             .filter(
-                SalesMonthly.project_id == project_id,
-                SalesMonthly.month >= month_from,
-                SalesMonthly.month <= month_to,
-                SalesMonthly.scenario == scenario,
+                sm.month >= month_from,
+                sm.month <= month_to,
+                sm.scenario == scenario,
             )
         )
-        qry = _apply_import_run_filter(qry, SalesMonthly, import_run_id)
         return float(qry.scalar() or 0.0)
 
     plan_m2 = _sum_for("plan")
@@ -1209,7 +1163,68 @@ def ugpr_operation_table(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
-    today = dt.date.today()
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
+    pv = effective_rows(PlanVolumeMonthly, project_id, import_run_id)
+    bv = effective_rows(BaselineVolume, project_id, import_run_id)
+
+    price_q = (
+        db.query(
+            bv.operation_code,
+            bv.price,
+            bv.plan_qty_total,
+            bv.amount_total,
+        )
+    )
+    price_rows = price_q.all()
+
+    ops_q = db.query(Operation.code, Operation.name).filter(Operation.project_id == project_id)
+    if wbs_path:
+        ops_q = (
+            ops_q.join(WBS, Operation.wbs_id == WBS.id)
+            .filter(WBS.path.ilike(f"{wbs_path}%"))
+        )
+    ops = ops_q.all()
+
+    plan_q = (
+        db.query(pv.operation_code, pv.month, pv.qty)
+        .filter(
+            pv.scenario == "plan",
+        )
+    )
+    if wbs_path:
+        plan_q = (
+            plan_q.join(Operation, Operation.code == pv.operation_code)
+            .join(WBS, Operation.wbs_id == WBS.id)
+            .filter(WBS.path.ilike(f"{wbs_path}%"))
+        )
+    plan_rows = plan_q.all()
+
+    fact_q = (
+        db.query(
+            fv.operation_code,
+            fv.date,
+            fv.qty,
+            fv.amount,
+        )
+    )
+    if wbs_path:
+        fact_q = fact_q.filter(fv.wbs.ilike(f"{wbs_path}%"))
+    fact_rows = fact_q.all()
+
+    rows = run_cpu(_ugpr_operation_rows, price_rows, ops, plan_rows, fact_rows, date_from, date_to, dt.date.today())
+    return {"rows": rows}
+
+
+def _ugpr_operation_rows(
+    price_rows,
+    ops,
+    plan_rows,
+    fact_rows,
+    date_from: dt.date,
+    date_to: dt.date,
+    today: dt.date,
+) -> list[dict]:
+    """CPU-часть ugpr_operation_table: цены, план/факт в деньгах за ЛЦП, период, месяц, неделю и день."""
     month_start = dt.date(today.year, today.month, 1)
     month_end = month_start + dt.timedelta(days=_month_days(month_start) - 1)
     week_start = today - dt.timedelta(days=today.weekday())
@@ -1222,17 +1237,6 @@ def ugpr_operation_table(
             return 0
         return (end - start).days + 1
 
-    price_q = (
-        db.query(
-            BaselineVolume.operation_code,
-            BaselineVolume.price,
-            BaselineVolume.plan_qty_total,
-            BaselineVolume.amount_total,
-        )
-        .filter(BaselineVolume.project_id == project_id)
-    )
-    price_q = _apply_import_run_filter(price_q, BaselineVolume, import_run_id)
-    price_rows = price_q.all()
     price_map: dict[str, list[float]] = {}
     for code, price, qty_total, amount_total in price_rows:
         if not code:
@@ -1250,31 +1254,8 @@ def ugpr_operation_table(
         price_map.setdefault(code, []).append(unit_price)
     price_by_op = {k: sum(v) / len(v) for k, v in price_map.items()}
 
-    ops_q = db.query(Operation.code, Operation.name).filter(Operation.project_id == project_id)
-    if wbs_path:
-        ops_q = (
-            ops_q.join(WBS, Operation.wbs_id == WBS.id)
-            .filter(WBS.path.ilike(f"{wbs_path}%"))
-        )
-    ops = ops_q.all()
     op_name = {code: (name or code) for code, name in ops}
 
-    plan_q = (
-        db.query(PlanVolumeMonthly.operation_code, PlanVolumeMonthly.month, PlanVolumeMonthly.qty)
-        .filter(
-            PlanVolumeMonthly.project_id == project_id,
-            PlanVolumeMonthly.scenario == "plan",
-        )
-    )
-    plan_q = _apply_import_run_filter(plan_q, PlanVolumeMonthly, import_run_id)
-    if wbs_path:
-        plan_q = (
-            plan_q.join(Operation, Operation.code == PlanVolumeMonthly.operation_code)
-            .join(WBS, Operation.wbs_id == WBS.id)
-            .filter(WBS.path.ilike(f"{wbs_path}%"))
-        )
-    plan_rows = plan_q.all()
-
     plan = {}
     for code, month, qty in plan_rows:
         price = price_by_op.get(code, 0.0)
@@ -1304,20 +1285,6 @@ def ugpr_operation_table(
         if today >= m_start and today <= m_end:
             plan[code]["day"] += amount / _month_days(month)
 
-    fact_q = (
-        db.query(
-            FactVolumeDaily.operation_code,
-            FactVolumeDaily.date,
-            FactVolumeDaily.qty,
-            FactVolumeDaily.amount,
-        )
-        .filter(FactVolumeDaily.project_id == project_id)
-    )
-    fact_q = _apply_import_run_filter(fact_q, FactVolumeDaily, import_run_id)
-    if wbs_path:
-        fact_q = fact_q.filter(FactVolumeDaily.wbs.ilike(f"{wbs_path}%"))
-    fact_rows = fact_q.all()
-
     fact = {}
     for code, d, qty, amount in fact_rows:
         price = price_by_op.get(code, 0.0)
@@ -1360,7 +1327,7 @@ def ugpr_operation_table(
         })
 
     rows.sort(key=lambda r: abs(r["fact_period"]), reverse=True)
-    return {"rows": rows}
+    return rows
 
 
 def pnl(
@@ -1372,23 +1339,23 @@ def pnl(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    pl = effective_rows(FactPnLMonthly, project_id, import_run_id)
     rows_q = (
         db.query(
-            FactPnLMonthly.month,
-            FactPnLMonthly.account_name,
-            FactPnLMonthly.parent_name,
-            func.sum(FactPnLMonthly.amount),
+            pl.month,
+            pl.account_name,
+            pl.parent_name,
+            func.sum(pl.amount),
         )
         .filter(
-            FactPnLMonthly.project_id == project_id,
-            FactPnLMonthly.month >= dt.date(date_from.year, date_from.month, 1),
-            FactPnLMonthly.month <= dt.date(date_to.year, date_to.month, 1),
-            FactPnLMonthly.scenario == scenario,
+            pl.month >= dt.date(date_from.year, date_from.month, 1),
+            pl.month <= dt.date(date_to.year, date_to.month, 1),
+            pl.scenario == scenario,
         )
-        .group_by(FactPnLMonthly.month, FactPnLMonthly.account_name, FactPnLMonthly.parent_name)
-        .order_by(FactPnLMonthly.month)
+        .group_by(pl.month, pl.account_name, pl.parent_name)
+        .order_by(pl.month)
     )
-    rows = _apply_import_run_filter(rows_q, FactPnLMonthly, import_run_id).all()
+    rows = rows_q.all()
     return [
         {
             "month": m.isoformat(),
@@ -1410,18 +1377,18 @@ def cashflow(
     import_run_id: int | None = None,
 ):
     import_run_id = _effective_import_run_id(db, project_id, import_run_id)
+    cf = effective_rows(FactCashflowMonthly, project_id, import_run_id)
     rows_q = (
-        db.query(FactCashflowMonthly.month, FactCashflowMonthly.account_name, func.sum(FactCashflowMonthly.amount))
+        db.query(cf.month, cf.account_name, func.sum(cf.amount))
         .filter(
-            FactCashflowMonthly.project_id == project_id,
-            FactCashflowMonthly.month >= dt.date(date_from.year, date_from.month, 1),
-            FactCashflowMonthly.month <= dt.date(date_to.year, date_to.month, 1),
-            FactCashflowMonthly.scenario == scenario,
+            cf.month >= dt.date(date_from.year, date_from.month, 1),
+            cf.month <= dt.date(date_to.year, date_to.month, 1),
+            cf.scenario == scenario,
         )
-        .group_by(FactCashflowMonthly.month, FactCashflowMonthly.account_name)
-        .order_by(FactCashflowMonthly.month)
+        .group_by(cf.month, cf.account_name)
+        .order_by(cf.month)
     )
-    rows = _apply_import_run_filter(rows_q, FactCashflowMonthly, import_run_id).all()
+    rows = rows_q.all()
 
     month_tot = {}
     by_acc = {}
@@ -0,0 +1,62 @@
+"""
+Прогрев общего кэша отчётов после импорта (Celery reports.warm_cache).
+
+Считаются виды, которые дашборд открывает первыми, с теми же параметрами, что шлёт фронтенд:
+период — плановый диапазон проекта (/projects/{id}/plan-range, иначе с 1 января по сегодня),
+KPI ещё за текущий месяц и квартал, таблицы План/Факт по каждой группировке, УГПР,
+трудозатраты, CPM и накопленный факт для Ганта.
+"""
+import datetime as dt
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models.operation import Operation
+from app.services.reports import cache, service
+from app.services.schedule.service import fact_qty_by_code, project_schedule
+
+TABLE_GROUPINGS = ("wbs", "discipline", "block", "floor", "ugpr")
+
+
+def plan_range(db: Session, project_id: int, today: dt.date) -> tuple[dt.date, dt.date]:
+    start, finish = (
+        db.query(func.min(Operation.plan_start), func.max(Operation.plan_finish))
+        .filter(Operation.project_id == project_id)
+        .first()
+        or (None, None)
+    )
+    return start or dt.date(today.year, 1, 1), finish or today
+
+
+def current_periods(today: dt.date) -> list[tuple[dt.date, dt.date]]:
+    """Текущий месяц и текущий квартал."""
+    month_start = today.replace(day=1)
+    next_month = (month_start + dt.timedelta(days=32)).replace(day=1)
+    quarter_start = dt.date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    quarter_end = (quarter_start + dt.timedelta(days=95)).replace(day=1) - dt.timedelta(days=1)
+    return [(month_start, next_month - dt.timedelta(days=1)), (quarter_start, quarter_end)]
+
+
+def warm_reports(db: Session, project_id: int, import_run_id: int) -> list[str]:
+    """Считает отчёты в кэш (import_run_id=None — ключи совпадут с запросами без версии)."""
+    today = dt.date.today()
+    date_from, date_to = plan_range(db, project_id, today)
+    warmed = []
+
+    def _warm(name: str, fn, *args, **kwargs):
+        cache.cached_call(db, name, fn, project_id, *args, **kwargs)
+        warmed.append(name)
+
+    for start, end in [(date_from, date_to), *current_periods(today)]:
+        _warm("kpi", service.kpi, start, end)
+    _warm("plan_fact_series", service.plan_fact_series, date_from, date_to, granularity="month")
+    for by in TABLE_GROUPINGS:
+        _warm("plan_fact_table", service.plan_fact_table_by, date_from, date_to, by=by)
+    _warm("ugpr_series", service.ugpr_series, date_from, date_to, granularity="month")
+    _warm("ugpr_table", service.ugpr_operation_table, date_from, date_to)
+    _warm("manhours_series", service.manhours_series, date_from, date_to, granularity="month")
+
+    project_schedule(db, project_id)
+    fact_qty_by_code(db, project_id, import_run_id)
+    warmed.append("schedule")
+    return warmed
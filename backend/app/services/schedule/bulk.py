@@ -0,0 +1,215 @@
+"""
+Пакетная правка графика: upsert операций, создание/удаление связей — одной транзакцией.
+
+Проверка идёт по всему пакету сразу (ошибки собираются списком), связи проверяются на цикл
+в итоговом графе (существующие − удаляемые + создаваемые). Запись — многострочными
+INSERT ... ON CONFLICT / DELETE ... IN по _CHUNK_ROWS строк (лимит параметров PostgreSQL),
+без отдельных коммитов на ИСР и операции.
+Помесячный план пересчитывается для операций, у которых изменились даты или объём
+(без переноса последователей — даты в пакете задаёт сам планировщик).
+"""
+from types import SimpleNamespace
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.crud.projects import bump_data_version
+from app.db.models.operation import Operation
+from app.db.models.operation_dependency import OperationDependency
+from app.db.models.wbs import WBS
+from app.schemas.operations import ScheduleBulkIn
+from app.services.reports.service import _latest_import_run_id
+from app.services.schedule.cpm import topological_order
+from app.services.schedule.propagate import rebuild_plan_rows
+
+_OP_FIELDS = (
+    "name", "discipline", "block", "floor", "ugpr", "unit", "plan_qty_total", "plan_start", "plan_finish",
+)
+_PLAN_FIELDS = ("plan_start", "plan_finish", "plan_qty_total")
+# строк / значений IN в одном запросе: связь — 4 параметра, операция — 12; лимит PostgreSQL — 65535
+_CHUNK_ROWS = 1000
+
+
+class BulkValidationError(ValueError):
+    def __init__(self, errors: list[dict]):
+        super().__init__("bulk_validation")
+        self.errors = errors
+
+
+class BulkCycleError(ValueError):
+    def __init__(self, cycle: list[int]):
+        super().__init__("dependency_cycle")
+        self.cycle = cycle
+
+
+def _upsert_wbs(db: Session, project_id: int, paths: set[str]) -> dict[str, int]:
+    if not paths:
+        return {}
+    db.execute(
+        insert(WBS)
+        .values([dict(project_id=project_id, path=p) for p in sorted(paths)])
+        .on_conflict_do_nothing(index_elements=[WBS.project_id, WBS.path])
+    )
+    rows = db.query(WBS.path, WBS.id).filter(WBS.project_id == project_id, WBS.path.in_(paths)).all()
+    return dict(rows)
+
+
+def _validate_operations(db: Session, data: ScheduleBulkIn, errors: list[dict]):
+    items = data.operations
+    codes = [(it.code or "").strip() for it in items]
+    existing = {
+        op.code: op
+        for op in db.query(Operation).filter(Operation.project_id == data.project_id, Operation.code.in_(set(codes)))
+    }
+    seen: set[str] = set()
+    for i, (it, code) in enumerate(zip(items, codes)):
+        if not code:
+            errors.append(dict(section="operations", index=i, error="code_required"))
+        elif code in seen:
+            errors.append(dict(section="operations", index=i, error="duplicate_code"))
+        seen.add(code)
+        # у новой операции имя обязательно; у существующей — если передано (null/пустое нарушит NOT NULL)
+        if (code not in existing or "name" in it.model_fields_set) and not (it.name or "").strip():
+            errors.append(dict(section="operations", index=i, error="name_required"))
+        start = it.plan_start if "plan_start" in it.model_fields_set else getattr(existing.get(code), "plan_start", None)
+        finish = it.plan_finish if "plan_finish" in it.model_fields_set else getattr(existing.get(code), "plan_finish", None)
+        if start and finish and finish < start:
+            errors.append(dict(section="operations", index=i, error="finish_before_start"))
+    return codes, existing
+
+
+def _write_operations(db: Session, data: ScheduleBulkIn, codes: list[str], existing: dict[str, Operation]):
+    """Многострочный upsert операций. Возвращает (code -> id, результаты, операции для пересчёта плана)."""
+    paths = {it.wbs_path.strip() for it in data.operations if it.wbs_path and it.wbs_path.strip()}
+    wbs_ids = _upsert_wbs(db, data.project_id, paths)
+    rows: list[dict] = []
+    replan: list[SimpleNamespace] = []
+    for it, code in zip(data.operations, codes):
+        cur = existing.get(code)
+        row = dict(project_id=data.project_id, code=code, wbs_id=cur.wbs_id if cur else None)
+        for f in _OP_FIELDS:
+            row[f] = getattr(cur, f) if cur is not None else None
+        for f in it.model_fields_set & set(_OP_FIELDS):
+            v = getattr(it, f)
+            row[f] = v.strip() if isinstance(v, str) and f == "name" else v
+        if "wbs_path" in it.model_fields_set:
+            path = (it.wbs_path or "").strip()
+            row["wbs_id"] = wbs_ids.get(path) if path else None
+        rows.append(row)
+        if cur is None or any(row[f] != getattr(cur, f) for f in _PLAN_FIELDS):
+            replan.append(SimpleNamespace(code=code, **{f: row[f] for f in _PLAN_FIELDS}))
+    if not rows:
+        return {}, [], []
+
+    ids: dict[str, int] = {}
+    for i in range(0, len(rows), _CHUNK_ROWS):
+        stmt = insert(Operation).values(rows[i:i + _CHUNK_ROWS])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Operation.project_id, Operation.code],
+            # onupdate в ON CONFLICT не срабатывает — updated_at задаётся явно
+            set_={**{c: stmt.excluded[c] for c in ("wbs_id", *_OP_FIELDS)}, "updated_at": func.now()},
+        ).returning(Operation.id, Operation.code)
+        ids.update({code: op_id for op_id, code in db.execute(stmt)})
+    results = [dict(id=ids[code], code=code, created=code not in existing) for code in codes]
+    return ids, results, replan
+
+
+def _dependency_changes(db: Session, data: ScheduleBulkIn, op_ids: dict[str, int], errors: list[dict]):
+    items = data.create_dependencies
+    want_codes = sorted({(c or "").strip() for it in items for c in (it.predecessor_code, it.successor_code) if c})
+    want_ids = sorted({i for it in items for i in (it.predecessor_id, it.successor_id) if i is not None})
+    project_ops: dict[str, int] = {}
+    for col, wanted in ((Operation.code, want_codes), (Operation.id, want_ids)):
+        for i in range(0, len(wanted), _CHUNK_ROWS):
+            project_ops.update(
+                db.query(Operation.code, Operation.id).filter(
+                    Operation.project_id == data.project_id,
+                    col.in_(wanted[i:i + _CHUNK_ROWS]),
+                )
+            )
+    project_ops.update(op_ids)
+    valid_ids = set(project_ops.values())
+
+    current = {
+        d.id: (d.predecessor_id, d.successor_id)
+        for d in db.query(OperationDependency.id, OperationDependency.predecessor_id, OperationDependency.successor_id)
+        .filter(OperationDependency.project_id == data.project_id)
+    }
+    delete_ids = set(data.delete_dependencies)
+    for i, dep_id in enumerate(data.delete_dependencies):
+        if dep_id not in current:
+            errors.append(dict(section="delete_dependencies", index=i, error="dependency_not_found"))
+
+    def _resolve(op_id: int | None, code: str | None) -> int | None:
+        if op_id is not None:
+            return op_id if op_id in valid_ids else None
+        return project_ops.get((code or "").strip())
+
+    creates: dict[tuple[int, int], int] = {}
+    for i, it in enumerate(items):
+        p = _resolve(it.predecessor_id, it.predecessor_code)
+        s = _resolve(it.successor_id, it.successor_code)
+        if p is None or s is None:
+            errors.append(dict(section="create_dependencies", index=i, error="operation_not_found"))
+        elif p == s:
+            errors.append(dict(section="create_dependencies", index=i, error="self_dependency"))
+        elif (p, s) in creates:
+            errors.append(dict(section="create_dependencies", index=i, error="duplicate_dependency"))
+        else:
+            creates[(p, s)] = it.lag_days
+    return current, delete_ids, creates
+
+
+def apply_bulk(db: Session, data: ScheduleBulkIn) -> dict:
+    """Проверяет и записывает пакет в транзакцию db (коммит — на вызывающем)."""
+    errors: list[dict] = []
+    codes, existing = _validate_operations(db, data, errors)
+    if errors:
+        raise BulkValidationError(errors)
+
+    op_ids, results, replan = _write_operations(db, data, codes, existing)
+    current, delete_ids, creates = _dependency_changes(db, data, op_ids, errors)
+    if errors:
+        raise BulkValidationError(errors)
+
+    edges = [(p, s, 0) for dep_id, (p, s) in current.items() if dep_id not in delete_ids]
+    edges += [(p, s, 0) for p, s in creates]
+    nodes = sorted({n for p, s, _ in edges for n in (p, s)})
+    _, cycle, _, _ = topological_order(nodes, edges)
+    if cycle:
+        raise BulkCycleError(cycle)
+
+    delete_list = sorted(delete_ids)
+    for i in range(0, len(delete_list), _CHUNK_ROWS):
+        db.query(OperationDependency).filter(
+            OperationDependency.project_id == data.project_id,
+            OperationDependency.id.in_(delete_list[i:i + _CHUNK_ROWS]),
+        ).delete(synchronize_session=False)
+    dep_rows = [
+        dict(project_id=data.project_id, predecessor_id=p, successor_id=s, lag_days=lag)
+        for (p, s), lag in creates.items()
+    ]
+    for i in range(0, len(dep_rows), _CHUNK_ROWS):
+        stmt = insert(OperationDependency).values(dep_rows[i:i + _CHUNK_ROWS])
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    OperationDependency.project_id,
+                    OperationDependency.predecessor_id,
+                    OperationDependency.successor_id,
+                ],
+                set_=dict(lag_days=stmt.excluded.lag_days),
+            )
+        )
+
+    import_run_id = _latest_import_run_id(db, data.project_id)
+    plan_rows = rebuild_plan_rows(db, data.project_id, import_run_id, replan) if replan else 0
+    bump_data_version(db, data.project_id)
+    return dict(
+        operations=results,
+        dependencies_created=len(creates),
+        dependencies_deleted=len(delete_ids),
+        plan_rows=plan_rows,
+        import_run_id=import_run_id if replan else None,
+    )
@@ -0,0 +1,124 @@
+"""
+Метод критического пути (CPM) для графика операций.
+
+Вход: длительности и «не раньше» (плановое начало как смещение от базовой даты) по операциям,
+связи finish-to-start с лагом (в днях, отрицательный — опережение).
+Топологическая сортировка — алгоритм Кана на deque, прямой и обратный проход — O(V+E).
+При цикле расчёт не выполняется, возвращается один найденный цикл.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+
+
+@dataclass
+class CPMResult:
+    es: dict[int, int] = field(default_factory=dict)
+    ef: dict[int, int] = field(default_factory=dict)
+    ls: dict[int, int] = field(default_factory=dict)
+    lf: dict[int, int] = field(default_factory=dict)
+    total_float: dict[int, int] = field(default_factory=dict)
+    free_float: dict[int, int] = field(default_factory=dict)
+    critical_path: list[int] = field(default_factory=list)
+    cycle: list[int] = field(default_factory=list)
+    finish: int = 0
+
+    @property
+    def critical(self) -> set[int]:
+        return {n for n, tf in self.total_float.items() if tf == 0}
+
+
+def _find_cycle(remaining: set[int], preds: dict[int, list[tuple[int, int]]]) -> list[int]:
+    # у каждой оставшейся после Кана вершины есть оставшийся предшественник:
+    # идём по предшественникам, пока не встретим уже пройденную вершину
+    node = min(remaining)
+    seen: dict[int, int] = {}
+    path: list[int] = []
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(p for p, _ in preds[node] if p in remaining)
+    cycle = path[seen[node]:]
+    cycle.reverse()
+    return cycle
+
+
+def topological_order(
+    nodes: list[int], edges: list[tuple[int, int, int]]
+) -> tuple[list[int], list[int], dict[int, list[tuple[int, int]]], dict[int, list[tuple[int, int]]]]:
+    """(порядок, цикл, предшественники, последователи); связи с неизвестными вершинами игнорируются."""
+    known = set(nodes)
+    preds: dict[int, list[tuple[int, int]]] = {n: [] for n in nodes}
+    succs: dict[int, list[tuple[int, int]]] = {n: [] for n in nodes}
+    indeg = {n: 0 for n in nodes}
+    for p, s, lag in edges:
+        if p not in known or s not in known:
+            continue
+        preds[s].append((p, lag))
+        succs[p].append((s, lag))
+        indeg[s] += 1
+
+    queue = deque(n for n in nodes if indeg[n] == 0)
+    order: list[int] = []
+    while queue:
+        n = queue.popleft()
+        order.append(n)
+        for s, _ in succs[n]:
+            indeg[s] -= 1
+            if indeg[s] == 0:
+                queue.append(s)
+
+    cycle: list[int] = []
+    if len(order) < len(nodes):
+        cycle = _find_cycle(known - set(order), preds)
+    return order, cycle, preds, succs
+
+
+def compute_cpm(
+    durations: dict[int, int],
+    release: dict[int, int],
+    edges: list[tuple[int, int, int]],
+) -> CPMResult:
+    """
+    durations: id -> длительность в днях; release: id -> раннее начало не раньше (смещение в днях);
+    edges: (predecessor, successor, lag).
+    """
+    nodes = list(durations)
+    order, cycle, preds, succs = topological_order(nodes, edges)
+    if cycle:
+        return CPMResult(cycle=cycle)
+    if not nodes:
+        return CPMResult()
+
+    res = CPMResult()
+    es, ef, ls, lf = res.es, res.ef, res.ls, res.lf
+    for n in order:
+        start = release.get(n, 0)
+        for p, lag in preds[n]:
+            start = max(start, ef[p] + lag)
+        es[n] = start
+        ef[n] = start + durations[n]
+
+    res.finish = max(ef.values())
+    for n in reversed(order):
+        finish = res.finish
+        for s, lag in succs[n]:
+            finish = min(finish, ls[s] - lag)
+        lf[n] = finish
+        ls[n] = finish - durations[n]
+        res.total_float[n] = ls[n] - es[n]
+        free = res.finish - ef[n]
+        for s, lag in succs[n]:
+            free = min(free, es[s] - lag - ef[n])
+        res.free_float[n] = free
+
+    # критический путь: от операции с максимальным окончанием назад по «ведущим» критическим связям
+    critical = res.critical
+    end = max((n for n in order if n in critical), key=lambda n: ef[n], default=None)
+    while end is not None:
+        res.critical_path.append(end)
+        end = next(
+            (p for p, lag in preds[end] if p in critical and ef[p] + lag == es[end]),
+            None,
+        )
+    res.critical_path.reverse()
+    return res
@@ -0,0 +1,181 @@
+"""
+Инкрементальный перенос графика при правке дат операции.
+
+От изменённых операций обходится только нижележащий подграф связей (finish-to-start + лаг):
+последователь сдвигается вперёд, если нарушено ограничение
+`start >= finish(предшественника) + 1 + lag`, длительность сохраняется; раньше запланированного
+операция не переносится. Для затронутых операций пересчитываются строки plan_volume_monthly
+эффективной версии импорта (или ручные, если успешных импортов нет).
+Всё выполняется в транзакции вызывающего; коммит/откат — на нём (см. PUT /gpr/operations).
+"""
+import datetime as dt
+from collections import deque
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.models.facts import PlanVolumeMonthly
+from app.db.models.operation import Operation
+from app.db.models.operation_dependency import OperationDependency
+from app.services.etl.importer import _distribute_qty_to_months
+from app.services.reports.service import _latest_import_run_id
+
+
+def _shift(op: Operation, new_start: dt.date) -> None:
+    duration = op.plan_finish - op.plan_start
+    op.plan_start = new_start
+    op.plan_finish = new_start + duration
+
+
+def propagate_dates(
+    db: Session, project_id: int, changed_ids: list[int]
+) -> list[tuple[Operation, dt.date, dt.date]]:
+    """Сдвигает последователей изменённых операций. Возвращает [(операция, старое начало, старое окончание)]."""
+    edges = (
+        db.query(OperationDependency.predecessor_id, OperationDependency.successor_id, OperationDependency.lag_days)
+        .filter(OperationDependency.project_id == project_id)
+        .all()
+    )
+    succs: dict[int, list[int]] = {}
+    preds: dict[int, list[tuple[int, int]]] = {}
+    for p, s, lag in edges:
+        succs.setdefault(p, []).append(s)
+        preds.setdefault(s, []).append((p, lag or 0))
+
+    # нижележащий подграф: всё, что достижимо от изменённых операций
+    downstream: set[int] = set()
+    queue = deque(changed_ids)
+    while queue:
+        n = queue.popleft()
+        for s in succs.get(n, []):
+            if s not in downstream:
+                downstream.add(s)
+                queue.append(s)
+    if set(changed_ids) & downstream:
+        raise ValueError("dependency_cycle")
+    if not downstream:
+        return []
+
+    # нужны сами операции подграфа и их предшественники (даты последних не меняются)
+    need = downstream | {p for s in downstream for p, _ in preds.get(s, [])}
+    ops = {op.id: op for op in db.query(Operation).filter(Operation.id.in_(need))}
+
+    indeg = {n: sum(1 for p, _ in preds.get(n, []) if p in downstream) for n in downstream}
+    queue = deque(n for n in downstream if indeg[n] == 0)
+    moved_ids = set(changed_ids)
+    shifted: list[tuple[Operation, dt.date, dt.date]] = []
+    visited = 0
+    while queue:
+        n = queue.popleft()
+        visited += 1
+        op = ops.get(n)
+        if op is not None and op.plan_start and op.plan_finish and any(p in moved_ids for p, _ in preds[n]):
+            earliest = op.plan_start
+            for p, lag in preds[n]:
+                pred = ops.get(p)
+                if pred is not None and pred.plan_finish is not None:
+                    earliest = max(earliest, pred.plan_finish + dt.timedelta(days=1 + lag))
+            if earliest > op.plan_start:
+                shifted.append((op, op.plan_start, op.plan_finish))
+                _shift(op, earliest)
+                moved_ids.add(n)
+        for s in succs.get(n, []):
+            if s in indeg:
+                indeg[s] -= 1
+                if indeg[s] == 0:
+                    queue.append(s)
+    if visited < len(downstream):
+        raise ValueError("dependency_cycle")
+    return shifted
+
+
+def rebuild_plan_rows(
+    db: Session,
+    project_id: int,
+    import_run_id: int | None,
+    ops: list[Operation],
+    old_codes: set[str] | None = None,
+) -> int:
+    """
+    Перезаписывает помесячный план операций в версии импорта import_run_id (None — ручные строки).
+    Месяцы с ручной строкой (import_run_id IS NULL) не трогаются — как при импорте.
+    """
+    codes = {op.code for op in ops} | (old_codes or set())
+    if not codes:
+        return 0
+
+    base = db.query(PlanVolumeMonthly).filter(
+        PlanVolumeMonthly.project_id == project_id,
+        PlanVolumeMonthly.scenario == "plan",
+        PlanVolumeMonthly.operation_code.in_(codes),
+    )
+    if import_run_id is None:
+        target = base.filter(PlanVolumeMonthly.import_run_id.is_(None))
+        manual_months: set[tuple[str, dt.date]] = set()
+    else:
+        target = base.filter(PlanVolumeMonthly.import_run_id == import_run_id)
+        manual_months = {
+            (code, month)
+            for code, month in base.filter(PlanVolumeMonthly.import_run_id.is_(None))
+            .with_entities(PlanVolumeMonthly.operation_code, PlanVolumeMonthly.month)
+        }
+    target.delete(synchronize_session=False)
+
+    rows = []
+    for op in ops:
+        if not op.plan_start or not op.plan_finish or not op.plan_qty_total:
+            continue
+        for month, qty in _distribute_qty_to_months(op.plan_start, op.plan_finish, op.plan_qty_total):
+            if (op.code, month) in manual_months:
+                continue
+            rows.append(
+                dict(
+                    project_id=project_id,
+                    import_run_id=import_run_id,
+                    operation_code=op.code,
+                    month=month,
+                    scenario="plan",
+                    qty=float(qty),
+                )
+            )
+    if rows:
+        db.execute(insert(PlanVolumeMonthly), rows)
+    return len(rows)
+
+
+def apply_operation_change(
+    db: Session,
+    op: Operation,
+    old_code: str,
+    old_dates: tuple[dt.date | None, dt.date | None],
+    old_qty: float | None,
+) -> dict:
+    """
+    После правки операции (ещё не закоммиченной): перенос последователей и пересчёт плана.
+    Возвращает набор изменений: сдвинутые операции и число записанных строк плана.
+    """
+    dates_changed = (op.plan_start, op.plan_finish) != old_dates
+    shifted = propagate_dates(db, op.project_id, [op.id]) if dates_changed and op.plan_start and op.plan_finish else []
+    before = {o.id: (start, finish) for o, start, finish in shifted}
+    touched = [o for o, _, _ in shifted]
+    if dates_changed or op.plan_qty_total != old_qty or op.code != old_code:
+        touched.insert(0, op)
+        before[op.id] = old_dates
+
+    import_run_id = _latest_import_run_id(db, op.project_id)
+    plan_rows = 0
+    if touched:
+        old_codes = {old_code} if op.code != old_code else None
+        plan_rows = rebuild_plan_rows(db, op.project_id, import_run_id, touched, old_codes=old_codes)
+    changes = [
+        dict(
+            id=o.id,
+            code=o.code,
+            old_start=before[o.id][0],
+            old_finish=before[o.id][1],
+            plan_start=o.plan_start,
+            plan_finish=o.plan_finish,
+        )
+        for o in touched
+    ]
+    return dict(changes=changes, plan_rows=plan_rows, import_run_id=import_run_id)
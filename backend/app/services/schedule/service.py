@@ -0,0 +1,179 @@
+"""
+График проекта: CPM по всем датированным операциям проекта и накопленный факт по операциям
+(для прогресса в Ганте) + кэш в памяти процесса.
+
+Запись кэша сверяется с project.data_version: счётчик увеличивают CRUD операций и связей,
+ручной ввод и завершение импорта, поэтому устаревший результат не отдаётся и в других
+процессах. CRUD дополнительно сбрасывает записи проекта в этом процессе.
+Второй уровень — общий кэш отчётов в Redis (services/reports/cache.py): график, посчитанный
+другим процессом API или прогревом после импорта, не пересчитывается.
+"""
+import datetime as dt
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import cache_lookup
+from app.db.models.facts import FactVolumeDaily
+from app.db.models.operation import Operation
+from app.db.models.operation_dependency import OperationDependency
+from app.db.models.project import Project
+from app.db.models.wbs import WBS
+from app.services.reports import cache as report_cache
+from app.services.reports.effective import effective_rows
+from app.services.schedule.cpm import CPMResult, compute_cpm
+
+
+@dataclass
+class ProjectSchedule:
+    base_start: dt.date | None
+    cpm: CPMResult
+
+    def _date(self, offset: int) -> dt.date:
+        return self.base_start + dt.timedelta(days=offset)
+
+    def operation_fields(self, op_id: int) -> dict:
+        """Поля CPM для операции в ответе Ганта (пусто, если операция вне расчёта)."""
+        if op_id not in self.cpm.es:
+            return {}
+        es, ef = self.cpm.es[op_id], self.cpm.ef[op_id]
+        ls, lf = self.cpm.ls[op_id], self.cpm.lf[op_id]
+        return dict(
+            early_start=self._date(es),
+            early_finish=self._date(max(ef - 1, es)),
+            late_start=self._date(ls),
+            late_finish=self._date(max(lf - 1, ls)),
+            total_float=self.cpm.total_float[op_id],
+            free_float=self.cpm.free_float[op_id],
+        )
+
+
+def is_valid_wbs(wbs_path: str | None, name: str | None) -> bool:
+    """Строки-заголовки ИСР и операции без ИСР в график не входят."""
+    if not wbs_path or not wbs_path.strip():
+        return False
+    nm = (name or "").strip().lower()
+    if nm.startswith("иср"):
+        return False
+    return True
+
+
+# ключ: (вид, project_id, ...) -> (data_version, значение)
+_cache: OrderedDict[tuple, tuple[int, object]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def invalidate(project_id: int) -> None:
+    with _lock:
+        for key in [k for k in _cache if k[1] == project_id]:
+            del _cache[key]
+
+
+def _shared(key: tuple, version: int, build, codec):
+    kind, project_id, *rest = key
+    shared_key = report_cache.make_key(f"schedule_{kind}", project_id, version, rest[0] if rest else None)
+    payload = report_cache.get(shared_key)
+    if payload is not None:
+        return codec[1](payload)
+    value = build()
+    report_cache.put(shared_key, codec[0](value))
+    return value
+
+
+def _cached(key: tuple, version: int, build, codec=None):
+    """codec=(в JSON, из JSON) — при промахе в процессе смотреть общий кэш."""
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == version:
+            _cache.move_to_end(key)
+            cache_lookup(f"schedule_{key[0]}", True)
+            return hit[1]
+    cache_lookup(f"schedule_{key[0]}", False)
+
+    value = _shared(key, version, build, codec) if codec is not None else build()
+    with _lock:
+        _cache[key] = (version, value)
+        _cache.move_to_end(key)
+        while len(_cache) > settings.SCHEDULE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+
+def _data_version(db: Session, project_id: int) -> int:
+    return db.query(Project.data_version).filter(Project.id == project_id).scalar() or 0
+
+
+def build_schedule(db: Session, project_id: int) -> ProjectSchedule:
+    rows = (
+        db.query(Operation.id, Operation.name, Operation.plan_start, Operation.plan_finish, WBS.path)
+        .outerjoin(WBS, Operation.wbs_id == WBS.id)
+        .filter(
+            Operation.project_id == project_id,
+            Operation.plan_start.isnot(None),
+            Operation.plan_finish.isnot(None),
+        )
+        .order_by(Operation.plan_start, Operation.id)
+        .all()
+    )
+    rows = [r for r in rows if is_valid_wbs(r.path, r.name)]
+    if not rows:
+        return ProjectSchedule(base_start=None, cpm=CPMResult())
+
+    base_start = min(r.plan_start for r in rows)
+    durations = {r.id: max((r.plan_finish - r.plan_start).days + 1, 0) for r in rows}
+    release = {r.id: (r.plan_start - base_start).days for r in rows}
+    edges = [
+        (p, s, lag or 0)
+        for p, s, lag in db.query(
+            OperationDependency.predecessor_id,
+            OperationDependency.successor_id,
+            OperationDependency.lag_days,
+        ).filter(OperationDependency.project_id == project_id)
+    ]
+    return ProjectSchedule(base_start=base_start, cpm=compute_cpm(durations, release, edges))
+
+
+def _schedule_dump(schedule: ProjectSchedule) -> dict:
+    return {"base_start": schedule.base_start, "cpm": asdict(schedule.cpm)}
+
+
+def _schedule_load(payload: dict) -> ProjectSchedule:
+    cpm = payload["cpm"]
+    # JSON-ключи — строки, CPM адресуется id операций
+    by_op = {name: {int(k): v for k, v in cpm[name].items()} for name in ("es", "ef", "ls", "lf", "total_float", "free_float")}
+    base_start = payload["base_start"]
+    return ProjectSchedule(
+        base_start=dt.date.fromisoformat(base_start) if base_start else None,
+        cpm=CPMResult(**by_op, critical_path=cpm["critical_path"], cycle=cpm["cycle"], finish=cpm["finish"]),
+    )
+
+
+def project_schedule(db: Session, project_id: int) -> ProjectSchedule:
+    version = _data_version(db, project_id)
+    return _cached(
+        ("cpm", project_id),
+        version,
+        lambda: build_schedule(db, project_id),
+        codec=(_schedule_dump, _schedule_load),
+    )
+
+
+def _fact_qty_by_code(db: Session, project_id: int, import_run_id: int | None) -> dict[str, float]:
+    fv = effective_rows(FactVolumeDaily, project_id, import_run_id)
+    rows = db.query(fv.operation_code, func.coalesce(func.sum(fv.qty), 0.0)).group_by(fv.operation_code).all()
+    return {code: float(qty or 0.0) for code, qty in rows}
+
+
+def fact_qty_by_code(db: Session, project_id: int, import_run_id: int | None) -> dict[str, float]:
+    """Накопленный факт (qty) по коду операции в эффективной версии импорта."""
+    version = _data_version(db, project_id)
+    return _cached(
+        ("fact_qty", project_id, import_run_id),
+        version,
+        lambda: _fact_qty_by_code(db, project_id, import_run_id),
+        codec=(dict, dict),
+    )
@@ -12,4 +12,9 @@ celery_app.conf.update(
     task_track_started=True,
     timezone=settings.TZ,
     enable_utc=True,
+    beat_schedule={
+        "exports-cleanup": {"task": "exports.cleanup", "schedule": 3600.0},
+    },
 )
+
+import app.worker.monitoring  # noqa: E402,F401  (сигналы метрик Celery)
@@ -0,0 +1,44 @@
+"""
+Метрики Celery: длительность задач (в т.ч. imports.run_import) и учёт SQL на задачу (N+1 — в лог).
+
+Воркер отдаёт метрики на WORKER_METRICS_PORT (главный процесс); для prefork-пула нужен
+PROMETHEUS_MULTIPROC_DIR, общий для процессов воркера, — иначе видны только метрики главного процесса.
+"""
+import time
+
+from celery.signals import task_postrun, task_prerun, worker_ready
+from prometheus_client import start_http_server
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import CELERY_TASK_SECONDS, registry
+from app.db import instrument
+
+# task_id -> (начало, токен contextvar учёта SQL)
+_running: dict[str, tuple[float, object]] = {}
+
+
+@task_prerun.connect
+def _task_started(task_id=None, task=None, **_):
+    _running[task_id] = (time.perf_counter(), instrument.begin())
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, state=None, **_):
+    started = _running.pop(task_id, None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started[0]
+    stats = instrument.current()
+    instrument.end(started[1])
+    CELERY_TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(seconds)
+    if stats is not None:
+        logger.info("task_db", task=task.name, task_id=task_id, statements=stats.count, db_seconds=round(stats.seconds, 3))
+        instrument.report(stats, task=task.name, task_id=task_id)
+
+
+@worker_ready.connect
+def _serve_metrics(**_):
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT, registry=registry())
+        logger.info("worker_metrics_started", port=settings.WORKER_METRICS_PORT)
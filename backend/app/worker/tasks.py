@@ -1,16 +1,102 @@
 import datetime as dt
+from dataclasses import asdict
+from pathlib import Path
+
+from celery import chord, group
 from sqlalchemy.orm import Session
 
 from app.worker.celery_app import celery_app
+from app.core.config import settings
 from app.core.logging import logger
-from app.db.session import SessionLocal
+from app.db.session import ImportSessionLocal, ReportSessionLocal, SessionLocal
 from app.crud.imports import set_import_status, add_import_errors, get_import_run
-from app.services.etl.importer import run_import
+from app.services.etl.importer import (
+    SHEET_PARSERS,
+    ImportStageError,
+    _file_path,
+    load_frames,
+    parse_sheet,
+    run_import,
+)
+from app.services.etl.staging import drop_staging, read_frames, write_frames
+from app.services.etl.validators import ValidationError
+from app.services.exports.jobs import build_export, cleanup_exports, export_file, ready_file
+from app.services.reports.service import _latest_import_run_id
+from app.services.reports.warmup import warm_reports
+
+
+def _finish_import(db: Session, import_run_id: int, errors: list[ValidationError], rows_loaded: int) -> str:
+    # Ошибки импорта (если есть)
+    if errors:
+        add_import_errors(db, import_run_id, errors)
+
+    status = "success" if not errors else "success_with_errors"
+    set_import_status(
+        db,
+        import_run_id,
+        status,
+        finished_at=dt.datetime.utcnow(),
+        rows_loaded=rows_loaded,
+    )
+
+    logger.info(
+        "import_finished",
+        import_run_id=import_run_id,
+        status=status,
+        rows_loaded=rows_loaded,
+        errors=len(errors) if errors else 0,
+    )
+    if settings.REPORT_WARMUP_ENABLED and settings.REPORT_CACHE_ENABLED:
+        run = get_import_run(db, import_run_id)
+        try:
+            warm_report_cache_task.delay(run.project_id, import_run_id)
+        except Exception as e:
+            # прогрев — оптимизация, импорт уже завершён
+            logger.warning("report_warmup_enqueue_failed", import_run_id=import_run_id, error=str(e))
+    return status
+
+
+def _fail_import(db: Session, import_run_id: int, errors: list[ValidationError] | None = None) -> None:
+    # ВАЖНО: транзакция могла быть в aborted state -> сначала rollback
+    try:
+        db.rollback()
+        if errors:
+            add_import_errors(db, import_run_id, errors)
+        set_import_status(db, import_run_id, "failed", finished_at=dt.datetime.utcnow())
+    except Exception as e2:
+        logger.exception(
+            "import_failed_status_update_failed",
+            import_run_id=import_run_id,
+            error=str(e2),
+        )
+        # Фоллбек: пробуем другой сессией (на случай, если db полностью "сломана")
+        try:
+            db2: Session = SessionLocal()
+            try:
+                set_import_status(db2, import_run_id, "failed", finished_at=dt.datetime.utcnow())
+            finally:
+                db2.close()
+        except Exception as e3:
+            logger.exception(
+                "import_failed_status_update_failed_second_attempt",
+                import_run_id=import_run_id,
+                error=str(e3),
+            )
+
+
+def _stage_error(e: Exception) -> list[ValidationError]:
+    if isinstance(e, ImportStageError):
+        return [ValidationError(f"Ошибка этапа загрузки {e}")]
+    return []
 
 
 @celery_app.task(name="imports.run_import", bind=True)
 def run_import_task(self, import_run_id: int):
-    db: Session = SessionLocal()
+    """
+    Старт импорта. При IMPORT_PARALLEL_PARSE — chord: листы разбираются параллельными задачами
+    imports.parse_sheet (Parquet в IMPORT_STAGING_DIR), загрузка — imports.load по готовности всех.
+    """
+    db: Session = ImportSessionLocal()
     try:
         run = get_import_run(db, import_run_id)
         if not run:
@@ -20,58 +106,146 @@ def run_import_task(self, import_run_id: int):
         # Старт
         set_import_status(db, import_run_id, "running", started_at=dt.datetime.utcnow())
 
-        # Основной импорт
+        path = _file_path(run)
+        if settings.IMPORT_PARALLEL_PARSE and path.exists():
+            drop_staging(import_run_id)
+            header = group(parse_sheet_task.s(import_run_id, str(path), sheet) for sheet in SHEET_PARSERS)
+            body = load_import_task.s(import_run_id).on_error(import_failed_task.s(import_run_id))
+            chord(header)(body)
+            logger.info("import_pipeline_started", import_run_id=import_run_id, sheets=list(SHEET_PARSERS))
+            return
+
+        # Основной импорт (в одном процессе)
         errors, rows_loaded = run_import(db, run)
+        _finish_import(db, import_run_id, errors, rows_loaded)
 
-        # Ошибки импорта (если есть)
-        if errors:
-            add_import_errors(db, import_run_id, errors)
+    except Exception as e:
+        logger.exception("import_failed", import_run_id=import_run_id, error=str(e))
+        _fail_import(db, import_run_id, _stage_error(e))
+        raise
 
-        status = "success" if not errors else "success_with_errors"
-        set_import_status(
-            db,
-            import_run_id,
-            status,
-            finished_at=dt.datetime.utcnow(),
-            rows_loaded=rows_loaded,
-        )
+    finally:
+        db.close()
 
-        logger.info(
-            "import_finished",
-            import_run_id=import_run_id,
-            status=status,
-            rows_loaded=rows_loaded,
-            errors=len(errors) if errors else 0,
-        )
 
+@celery_app.task(name="imports.parse_sheet")
+def parse_sheet_task(import_run_id: int, path: str, sheet: str) -> dict:
+    """Разбор одного листа. Не бросает: сбой разбора возвращается в failed и обрабатывается в imports.load."""
+    started = dt.datetime.utcnow()
+    try:
+        frames, errors = parse_sheet(Path(path), sheet)
+        manifest = write_frames(import_run_id, frames)
     except Exception as e:
-        logger.exception("import_failed", import_run_id=import_run_id, error=str(e))
+        logger.exception("import_parse_failed", import_run_id=import_run_id, sheet=sheet, error=str(e))
+        return {"sheet": sheet, "frames": {}, "errors": [], "failed": str(e)}
+    logger.info(
+        "import_sheet_parsed",
+        import_run_id=import_run_id,
+        sheet=sheet,
+        rows={name: len(df) for name, df in frames.items()},
+        seconds=(dt.datetime.utcnow() - started).total_seconds(),
+    )
+    return {"sheet": sheet, "frames": manifest, "errors": [asdict(er) for er in errors], "failed": None}
 
-        # ВАЖНО: транзакция могла быть в aborted state -> сначала rollback
-        try:
-            db.rollback()
-            set_import_status(db, import_run_id, "failed", finished_at=dt.datetime.utcnow())
-        except Exception as e2:
-            logger.exception(
-                "import_failed_status_update_failed",
-                import_run_id=import_run_id,
-                error=str(e2),
+
+@celery_app.task(name="imports.load")
+def load_import_task(results: list[dict], import_run_id: int):
+    """Колбэк chord: загрузка разобранных листов по этапам (справочники -> факты/план -> финансы)."""
+    db: Session = ImportSessionLocal()
+    try:
+        errors = [ValidationError(**er) for r in results for er in r["errors"]]
+        failed = [r for r in results if r.get("failed")]
+        if failed:
+            logger.error("import_failed", import_run_id=import_run_id, stage="parse", sheets=[r["sheet"] for r in failed])
+            _fail_import(
+                db,
+                import_run_id,
+                errors + [ValidationError(f"Ошибка разбора листа: {r['failed']}", sheet=r["sheet"]) for r in failed],
             )
-            # Фоллбек: пробуем другой сессией (на случай, если db полностью "сломана")
-            try:
-                db2: Session = SessionLocal()
-                try:
-                    set_import_status(db2, import_run_id, "failed", finished_at=dt.datetime.utcnow())
-                finally:
-                    db2.close()
-            except Exception as e3:
-                logger.exception(
-                    "import_failed_status_update_failed_second_attempt",
-                    import_run_id=import_run_id,
-                    error=str(e3),
-                )
+            return
+
+        run = get_import_run(db, import_run_id)
+        if not run:
+            logger.error("import_run_missing", import_run_id=import_run_id)
+            return
+        frames = {}
+        for r in results:
+            frames.update(read_frames(import_run_id, r["frames"]))
+        rows_loaded = load_frames(db, run, frames)
+        _finish_import(db, import_run_id, errors, rows_loaded)
 
+    except Exception as e:
+        logger.exception("import_failed", import_run_id=import_run_id, error=str(e))
+        _fail_import(db, import_run_id, _stage_error(e))
         raise
 
+    finally:
+        drop_staging(import_run_id)
+        db.close()
+
+
+@celery_app.task(name="imports.failed")
+def import_failed_task(request, exc, traceback, import_run_id: int):
+    """errback chord (потерянный воркер, сбой брокера): run, оставшийся в running, помечается failed."""
+    db: Session = SessionLocal()
+    try:
+        run = get_import_run(db, import_run_id)
+        if run and run.status == "running":
+            logger.error("import_failed", import_run_id=import_run_id, error=str(exc))
+            _fail_import(db, import_run_id)
+    finally:
+        drop_staging(import_run_id)
+        db.close()
+
+
+@celery_app.task(name="reports.warm_cache")
+def warm_report_cache_task(project_id: int, import_run_id: int):
+    """Прогрев кэша отчётов новой версией; пропускается, если версия уже не последняя."""
+    db: Session = ReportSessionLocal()
+    try:
+        latest = _latest_import_run_id(db, project_id)
+        if latest != import_run_id:
+            logger.info("report_warmup_skipped", project_id=project_id, import_run_id=import_run_id, latest=latest)
+            return []
+        started = dt.datetime.utcnow()
+        warmed = warm_reports(db, project_id, import_run_id)
+        logger.info(
+            "report_warmup_finished",
+            project_id=project_id,
+            import_run_id=import_run_id,
+            reports=len(warmed),
+            seconds=(dt.datetime.utcnow() - started).total_seconds(),
+        )
+        return warmed
     finally:
         db.close()
+
+
+@celery_app.task(name="exports.build", bind=True)
+def build_export_task(self, job_id: str, params: dict):
+    # тот же job_id мог быть поставлен дважды — второй раз просто отдаём готовый файл
+    if ready_file(job_id):
+        return {"job_id": job_id, "file": export_file(job_id).name}
+    db: Session = ReportSessionLocal()
+    try:
+        started = dt.datetime.utcnow()
+        out = build_export(db, params, export_file(job_id))
+        logger.info(
+            "export_finished",
+            job_id=job_id,
+            sheets=params.get("sheets"),
+            seconds=(dt.datetime.utcnow() - started).total_seconds(),
+        )
+        return {"job_id": job_id, "file": out.name}
+    except Exception as e:
+        logger.exception("export_failed", job_id=job_id, error=str(e))
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="exports.cleanup")
+def cleanup_exports_task():
+    removed = cleanup_exports()
+    logger.info("exports_cleanup", removed=removed)
+    return removed
@@ -0,0 +1,8 @@
+"""
+Нагрузочные замеры отчётов на синтетических данных (см. docs/BENCHMARKS.md).
+
+    python -m benchmarks seed --operations 2000 --days 365 --versions 3
+    python -m benchmarks run --base-url http://localhost:8000 --concurrency 8 --out results/run.json
+    python -m benchmarks compare results/before.json results/run.json
+    python -m pytest benchmarks/micro
+"""
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import datetime as dt
+import json
+import sys
+from pathlib import Path
+
+from benchmarks import load
+
+
+def _seed(args) -> None:
+    from app.db.session import ImportSessionLocal
+    from benchmarks.seed import SeedConfig, ensure_user, seed
+
+    cfg = SeedConfig(
+        projects=args.projects,
+        operations=args.operations,
+        days=args.days,
+        versions=args.versions,
+        start=dt.date.fromisoformat(args.start),
+        seed=args.seed,
+    )
+    db = ImportSessionLocal()
+    try:
+        ensure_user(db, args.user, args.password)
+        for info in seed(db, cfg):
+            print(json.dumps(info, ensure_ascii=False))
+    finally:
+        db.close()
+
+
+def _run(args) -> None:
+    result = asyncio.run(
+        load.run(
+            args.base_url,
+            args.user,
+            args.password,
+            args.project,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            only=args.only,
+            timeout=args.timeout,
+        )
+    )
+    out = Path(args.out or f"benchmarks/results/{dt.datetime.now():%Y%m%d-%H%M%S}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"saved {out}")
+
+
+def _compare(args) -> None:
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    rows = load.compare(before, after, metric=args.metric)
+    for r in sorted(rows, key=lambda r: -r["delta_pct"]):
+        print(f"{r['endpoint']:48s} {r['before']:>10.1f} -> {r['after']:>10.1f} {r['delta_pct']:>+7.1f}%")
+    if args.fail_over is not None and any(r["delta_pct"] > args.fail_over for r in rows):
+        sys.exit(1)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("seed", help="synthetic projects BENCH-<n> in DATABASE_URL")
+    p.add_argument("--projects", type=int, default=1)
+    p.add_argument("--operations", type=int, default=2000)
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--versions", type=int, default=3)
+    p.add_argument("--start", default="2024-01-01")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--user", default="bench")
+    p.add_argument("--password", default="bench-password")
+    p.set_defaults(func=_seed)
+
+    p = sub.add_parser("run", help="HTTP load against a running API")
+    p.add_argument("--base-url", default="http://localhost:8000")
+    p.add_argument("--project", default="BENCH-1", help="project code")
+    p.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--warmup", type=int, default=2)
+    p.add_argument("--only", nargs="*", help="endpoint name prefixes, e.g. reports.kpi gpr.")
+    p.add_argument("--timeout", type=float, default=120.0)
+    p.add_argument("--user", default="bench")
+    p.add_argument("--password", default="bench-password")
+    p.add_argument("--out", help="JSON result path (default benchmarks/results/<timestamp>.json)")
+    p.set_defaults(func=_run)
+
+    p = sub.add_parser("compare", help="compare two result files")
+    p.add_argument("before")
+    p.add_argument("after")
+    p.add_argument("--metric", default="p95_ms", choices=("p50_ms", "p95_ms", "p99_ms", "mean_ms", "rps"))
+    p.add_argument("--fail-over", type=float, help="exit 1 if any endpoint is slower by more than this %%")
+    p.set_defaults(func=_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
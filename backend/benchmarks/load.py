@@ -0,0 +1,227 @@
+"""
+HTTP-нагрузка на API: каждый эндпоинт /reports/*, /gpr/* и /imports/compare отдельно,
+`requests` запросов при `concurrency` одновременных (httpx.AsyncClient).
+
+Результат — JSON: параметры прогона и по эндпоинту p50/p95/p99/mean/max (мс), пропускная
+способность (запросов/с за время прогона эндпоинта), коды ответов. ETag не отправляется —
+каждый запрос считается полностью (кроме попаданий в кэш отчётов на сервере).
+"""
+import asyncio
+import datetime as dt
+import statistics
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class Endpoint:
+    name: str
+    path: str
+    params: dict = field(default_factory=dict)
+    method: str = "GET"
+    json: dict | None = None
+
+
+@dataclass
+class Target:
+    project_id: int
+    import_run_ids: list[int]
+    date_from: dt.date
+    date_to: dt.date
+
+
+def endpoints(t: Target) -> list[Endpoint]:
+    period = {"project_id": t.project_id, "date_from": t.date_from.isoformat(), "date_to": t.date_to.isoformat()}
+    year = {**period, "date_from": (t.date_to - dt.timedelta(days=365)).isoformat()}
+    out = [
+        Endpoint("reports.kpi", "/reports/kpi", period),
+        Endpoint("reports.portfolio_kpi", "/reports/portfolio/kpi", {k: period[k] for k in ("date_from", "date_to")}),
+        Endpoint("reports.plan_fact_series.month", "/reports/plan-fact/series", {**period, "granularity": "month"}),
+        Endpoint("reports.plan_fact_series.day", "/reports/plan-fact/series", {**year, "granularity": "day"}),
+        Endpoint(
+            "reports.plan_fact_series.day_max_points",
+            "/reports/plan-fact/series",
+            {**year, "granularity": "day", "max_points": 200},
+        ),
+        Endpoint("reports.pnl", "/reports/pnl", period),
+        Endpoint("reports.cashflow", "/reports/cashflow", period),
+        Endpoint("reports.ugpr_series", "/reports/ugpr/series", {**period, "granularity": "month"}),
+        Endpoint("reports.ugpr_table", "/reports/ugpr/table", period),
+        Endpoint("reports.manhours_series", "/reports/manhours/series", {**period, "granularity": "day"}),
+        Endpoint("reports.sales_kpi", "/reports/sales/kpi", period),
+        Endpoint("reports.sales_series", "/reports/sales/series", period),
+        Endpoint("reports.floors_summary", "/reports/floors/summary", period),
+        Endpoint("reports.floors_operations", "/reports/floors/operations", {**period, "floor": "1"}),
+        Endpoint("reports.floors_series", "/reports/floors/series", {**period, "floor": "1"}),
+        Endpoint(
+            "reports.batch",
+            "/reports/batch",
+            method="POST",
+            json={
+                **period,
+                "reports": [
+                    {"report": "kpi"},
+                    {"report": "plan_fact_series", "granularity": "month"},
+                    {"report": "plan_fact_table", "by": "discipline"},
+                    {"report": "manhours_series"},
+                ],
+            },
+        ),
+        Endpoint("reports.export_plan_fact_xlsx", "/reports/export/plan-fact.xlsx", period),
+        Endpoint("reports.export_kpi_pdf", "/reports/export/kpi.pdf", period),
+        Endpoint("gpr.operations", "/gpr/operations", {"project_id": t.project_id, "limit": 500}),
+        Endpoint("gpr.operations.search", "/gpr/operations", {"project_id": t.project_id, "q": "Операция 12", "limit": 50}),
+        Endpoint("gpr.search", "/gpr/search", {"project_id": t.project_id, "q": "Операция 1"}),
+        Endpoint("gpr.dependencies", "/gpr/dependencies", {"project_id": t.project_id}),
+        Endpoint("gpr.gantt", "/gpr/gantt", {**period, "limit": 500}),
+    ]
+    for by in ("wbs", "discipline", "block", "floor", "ugpr"):
+        out.append(Endpoint(f"reports.plan_fact_table.{by}", "/reports/plan-fact/table", {**period, "by": by}))
+    if len(t.import_run_ids) >= 2:
+        run_a, run_b = t.import_run_ids[-2], t.import_run_ids[-1]
+        out.append(Endpoint("imports.compare", "/imports/compare", {**period, "run_a": run_a, "run_b": run_b}))
+        out.append(
+            Endpoint(
+                "imports.compare_versions",
+                "/imports/compare/versions",
+                {**period, "run_ids": t.import_run_ids, "by": "discipline"},
+            )
+        )
+    return out
+
+
+def percentile(sorted_ms: list[float], q: float) -> float:
+    """Перцентиль с линейной интерполяцией (как numpy.percentile по умолчанию)."""
+    if not sorted_ms:
+        return 0.0
+    pos = (len(sorted_ms) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_ms) - 1)
+    return sorted_ms[lo] + (sorted_ms[hi] - sorted_ms[lo]) * (pos - lo)
+
+
+def summarize(latencies_ms: list[float], statuses: dict[int, int], wall_seconds: float) -> dict:
+    ms = sorted(latencies_ms)
+    errors = sum(n for code, n in statuses.items() if code >= 400 or code == 0)
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "status": {str(code): n for code, n in sorted(statuses.items())},
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "max_ms": round(ms[-1], 2) if ms else 0.0,
+        "rps": round(len(ms) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+    }
+
+
+async def _request(client: httpx.AsyncClient, ep: Endpoint) -> tuple[int, float]:
+    started = time.perf_counter()
+    try:
+        r = await client.request(ep.method, ep.path, params=ep.params or None, json=ep.json)
+        await r.aread()
+        status = r.status_code
+    except httpx.HTTPError:
+        status = 0  # таймаут / обрыв соединения
+    return status, (time.perf_counter() - started) * 1000.0
+
+
+async def bench_endpoint(client: httpx.AsyncClient, ep: Endpoint, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await _request(client, ep)
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            status, ms = await _request(client, ep)
+            latencies.append(ms)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def login(client: httpx.AsyncClient, user: str, password: str) -> str:
+    r = await client.post("/auth/login", json={"login": user, "password": password})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def resolve_target(client: httpx.AsyncClient, project_code: str) -> Target:
+    """Проект по коду, его успешные версии импорта (по возрастанию) и плановый диапазон — через API."""
+    projects = (await client.get("/projects")).raise_for_status().json()
+    project = next((p for p in projects if p["code"] == project_code), None)
+    if project is None:
+        raise SystemExit(f"project {project_code} not found (python -m benchmarks seed)")
+    runs = (await client.get("/imports", params={"project_id": project["id"]})).raise_for_status().json()
+    run_ids = sorted(r["id"] for r in runs if r["status"] in ("success", "success_with_errors"))
+    plan = (await client.get(f"/projects/{project['id']}/plan-range")).raise_for_status().json()
+    today = dt.date.today()
+    return Target(
+        project_id=project["id"],
+        import_run_ids=run_ids,
+        date_from=dt.date.fromisoformat(str(plan["plan_start"])[:10]) if plan["plan_start"] else today.replace(month=1, day=1),
+        date_to=dt.date.fromisoformat(str(plan["plan_finish"])[:10]) if plan["plan_finish"] else today,
+    )
+
+
+async def run(
+    base_url: str,
+    user: str,
+    password: str,
+    project_code: str,
+    requests: int = 100,
+    concurrency: int = 8,
+    warmup: int = 2,
+    only: list[str] | None = None,
+    timeout: float = 120.0,
+) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        client.headers["Authorization"] = f"Bearer {await login(client, user, password)}"
+        target = await resolve_target(client, project_code)
+        results = {}
+        for ep in endpoints(target):
+            if only and not any(ep.name.startswith(prefix) for prefix in only):
+                continue
+            results[ep.name] = await bench_endpoint(client, ep, requests, concurrency, warmup)
+            print(f"{ep.name:48s} p50={results[ep.name]['p50_ms']:>9.1f}ms "
+                  f"p95={results[ep.name]['p95_ms']:>9.1f}ms rps={results[ep.name]['rps']:>8.1f}")
+    return {
+        "meta": {
+            "started_at": dt.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "base_url": base_url,
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "project_code": project_code,
+            "project_id": target.project_id,
+            "import_run_ids": target.import_run_ids,
+            "date_from": target.date_from.isoformat(),
+            "date_to": target.date_to.isoformat(),
+        },
+        "endpoints": results,
+    }
+
+
+def compare(before: dict, after: dict, metric: str = "p95_ms") -> list[dict]:
+    """Изменение metric по эндпоинтам, присутствующим в обоих прогонах (delta_pct > 0 — хуже)."""
+    rows = []
+    for name, b in after["endpoints"].items():
+        a = before["endpoints"].get(name)
+        if a is None:
+            continue
+        delta = (b[metric] - a[metric]) / a[metric] * 100.0 if a[metric] else 0.0
+        if metric == "rps":
+            delta = -delta
+        rows.append({"endpoint": name, "before": a[metric], "after": b[metric], "delta_pct": round(delta, 1)})
+    return rows
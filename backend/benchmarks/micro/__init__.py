@@ -0,0 +1,6 @@
+"""
+Микробенчмарки чистых функций отчётов и ETL (см. docs/BENCHMARKS.md).
+
+    python -m pytest benchmarks/micro
+    python -m pytest benchmarks/micro --bench-save
+"""
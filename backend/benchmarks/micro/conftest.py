@@ -0,0 +1,120 @@
+"""
+Фикстура bench — микробенчмарк в духе pytest-benchmark без внешних зависимостей.
+
+Число вызовов в повторе удваивается, пока повтор не займёт MIN_REPEAT_SECONDS. Повторы
+чередуются с эталонным циклом: время повтора делится на среднее соседних эталонных замеров,
+берётся медиана по REPEAT повторам. Так отношение не зависит ни от машины, ни от того, что
+соседние процессы замедлили её посреди прогона. Бенчмарк падает, если отношение больше
+сохранённого в baseline.json более чем на tolerance.
+"""
+import datetime as dt
+import json
+import statistics
+import timeit
+from pathlib import Path
+
+import pytest
+
+BASELINE = Path(__file__).with_name("baseline.json")
+RESULTS = Path(__file__).resolve().parents[1] / "results" / "micro.json"
+REPEAT = 7
+MIN_REPEAT_SECONDS = 0.05
+DEFAULT_TOLERANCE = 0.5
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "micro-benchmarks")
+    group.addoption("--bench-save", action="store_true", help="write measured times to benchmarks/micro/baseline.json")
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=None,
+        help="allowed slowdown vs baseline, 0.5 = +50%% (default: tolerance from baseline.json)",
+    )
+
+
+def _calibration_loop() -> dict:
+    # эталон: те же dict/float/str/date операции, из которых состоят ETL и отчёты
+    acc: dict[str, float] = {}
+    d = dt.date(2024, 1, 1)
+    for i in range(2000):
+        k = str(i % 97)
+        acc[k] = acc.get(k, 0.0) + float(i) * 0.5
+        d += dt.timedelta(days=1)
+    return acc
+
+
+def _autorange(timer: timeit.Timer) -> int:
+    number = 1
+    while timer.timeit(number) < MIN_REPEAT_SECONDS:
+        number *= 2
+    return number
+
+
+def measure(fn, *args, **kwargs) -> tuple[float, float]:
+    """(секунды на вызов fn(*args, **kwargs), отношение к эталонному циклу) — медианы по повторам."""
+    timer = timeit.Timer(lambda: fn(*args, **kwargs))
+    reference = timeit.Timer(_calibration_loop)
+    number, ref_number = _autorange(timer), _autorange(reference)
+
+    ref = reference.timeit(ref_number) / ref_number
+    seconds, ratios = [], []
+    for _ in range(REPEAT):
+        t = timer.timeit(number) / number
+        ref_next = reference.timeit(ref_number) / ref_number
+        seconds.append(t)
+        ratios.append(t / ((ref + ref_next) / 2))
+        ref = ref_next
+    return statistics.median(seconds), statistics.median(ratios)
+
+
+@pytest.fixture(scope="session")
+def bench_session(request):
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    state = {
+        "tolerance": baseline.get("tolerance", DEFAULT_TOLERANCE),
+        "baseline": baseline.get("results", {}),
+        "results": {},
+    }
+    yield state
+
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS.write_text(
+        json.dumps(
+            {"results": state["results"]},
+            ensure_ascii=False,
+            indent=2,
+            sort_keys=True,
+        )
+    )
+    if request.config.getoption("bench_save") and state["results"]:
+        merged = {**state["baseline"], **{k: v["relative"] for k, v in state["results"].items()}}
+        BASELINE.write_text(
+            json.dumps({"tolerance": state["tolerance"], "results": merged}, indent=2, sort_keys=True) + "\n"
+        )
+
+
+@pytest.fixture
+def bench(request, bench_session):
+    """bench(fn, *args, **kwargs) -> результат fn; замер сравнивается с baseline.json."""
+    name = f"{request.node.module.__name__.rsplit('.', 1)[-1]}::{request.node.name}"
+    tolerance = request.config.getoption("bench_tolerance")
+    if tolerance is None:
+        tolerance = bench_session["tolerance"]
+    check = not request.config.getoption("bench_save")
+
+    def run(fn, *args, **kwargs):
+        result = fn(*args, **kwargs)  # прогрев; результат — для проверок в тесте
+        seconds, ratio = measure(fn, *args, **kwargs)
+        relative = float(f"{ratio:.4g}")
+        bench_session["results"][name] = {"seconds": seconds, "relative": relative}
+
+        expected = bench_session["baseline"].get(name)
+        if check and expected and relative > expected * (1 + tolerance):
+            pytest.fail(
+                f"{name}: {relative:.3f} vs baseline {expected:.3f} "
+                f"(+{(relative / expected - 1) * 100:.0f}%, tolerance {tolerance * 100:.0f}%)"
+            )
+        return result
+
+    return run
@@ -0,0 +1,67 @@
+import datetime as dt
+import random
+
+import pytest
+
+from app.services.etl.importer import _distribute_qty_to_months, _to_float, normalize_date, normalize_unit
+from app.services.etl.utils import to_date
+
+SIZES = [1_000, 10_000]
+
+UNITS = ["м3", "М3", "м³", "м2", "тонна", "т", "пог.м", "шт", "чел.-ч", "Устройство фундаментной плиты", None, ""]
+DATES = [
+    dt.datetime(2025, 3, 14, 8, 30),
+    dt.date(2025, 3, 14),
+    "2025-03-14",
+    "2025-03-14 00:00:00",
+    "14.03.2025",
+    0,
+    None,
+    float("nan"),
+    dt.date(1970, 1, 1),
+]
+NUMBERS = [12, 12.5, "1 234,5", "  42 ", "—", "nan", None, "abc", float("nan")]
+EXCEL_DATES = [dt.datetime(2025, 3, 14), dt.date(2025, 3, 14), 45730, 45730.5, "2025-03-14", "14.03.2025", "март", None]
+
+
+def _sample(values: list, n: int) -> list:
+    rnd = random.Random(n)
+    return [rnd.choice(values) for _ in range(n)]
+
+
+def _map(fn):
+    def run(values):
+        return [fn(v) for v in values]
+
+    return run
+
+
+@pytest.mark.parametrize("days", [31, 365, 1825])
+def test_distribute_qty_to_months(bench, days):
+    start = dt.date(2024, 1, 15)
+    rows = bench(_distribute_qty_to_months, start, start + dt.timedelta(days=days - 1), float(days))
+    assert abs(sum(q for _, q in rows) - days) < 1e-6
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_normalize_unit(bench, n):
+    out = bench(_map(normalize_unit), _sample(UNITS, n))
+    assert len(out) == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_normalize_date(bench, n):
+    out = bench(_map(normalize_date), _sample(DATES, n))
+    assert len(out) == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_to_float(bench, n):
+    out = bench(_map(_to_float), _sample(NUMBERS, n))
+    assert len(out) == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_utils_to_date(bench, n):
+    out = bench(_map(to_date), _sample(EXCEL_DATES, n))
+    assert len(out) == n
@@ -0,0 +1,28 @@
+import openpyxl
+import pytest
+
+from app.services.etl.parsers import finance, sales
+
+
+def _sheet(header_row: int, cols: int, header: str):
+    """Лист: шапка отчёта над таблицей, строка с header в первой колонке на header_row."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for r in range(1, header_row):
+        ws.append([f"Отчёт {r}"] + [r * 1000 + c for c in range(1, cols)])
+    ws.append([header] + [2025] * (cols - 1))
+    return ws
+
+
+@pytest.mark.parametrize("header_row", [5, 30])
+def test_finance_find_header_row(bench, header_row):
+    ws = _sheet(header_row, 20, "Статья БДР")
+    assert bench(finance._find_header_row, ws, "Статья БДР") == header_row
+
+
+@pytest.mark.parametrize("cols", [50, 400])
+@pytest.mark.parametrize("header_row", [5, 30])
+def test_sales_find_header_row(bench, header_row, cols):
+    ws = _sheet(header_row, cols, "Наименование")
+    keywords = ("наименование", "название", "позиция", "объект", "продукт", "площад")
+    assert bench(sales._find_header_row, ws, keywords, max_rows=30, max_cols=cols) == header_row
@@ -0,0 +1,56 @@
+import datetime as dt
+import random
+
+import pytest
+
+from app.services.reports.service import (
+    _auto_forecast,
+    _daterange_month_starts,
+    _month_overlap_days,
+    _plan_fact_rows,
+    _prorate_plan,
+)
+
+DATE_FROM = dt.date(2024, 1, 10)
+DATE_TO = dt.date(2025, 12, 20)
+
+
+@pytest.mark.parametrize("years", [1, 10])
+def test_month_overlap_days(bench, years):
+    months = _daterange_month_starts(dt.date(2024, 1, 1), dt.date(2024 + years - 1, 12, 1))
+
+    def run():
+        return [_month_overlap_days(DATE_FROM, DATE_TO, m) for m in months]
+
+    days = bench(run)
+    assert sum(days) == (min(DATE_TO, dt.date(2024 + years - 1, 12, 31)) - DATE_FROM).days + 1
+
+
+@pytest.mark.parametrize("groups", [100, 1_000])
+def test_prorate_plan(bench, groups):
+    rnd = random.Random(groups)
+    months = _daterange_month_starts(DATE_FROM, DATE_TO)
+    rows = [(f"Группа {g}", m, rnd.uniform(0, 500)) for g in range(groups) for m in months]
+    plan = bench(_prorate_plan, rows, DATE_FROM, DATE_TO)
+    assert len(plan) == groups
+
+
+@pytest.mark.parametrize("groups", [100, 1_000, 10_000])
+def test_plan_fact_rows(bench, groups):
+    rnd = random.Random(groups)
+    fact = {f"Группа {g}": rnd.uniform(0, 1000) for g in range(groups)}
+    plan = {f"Группа {g}": rnd.uniform(0, 1000) for g in range(0, groups, 2)}
+    rows = bench(_plan_fact_rows, fact, plan)
+    assert len(rows) == groups
+
+
+@pytest.mark.parametrize("model", ["linear", "moving_average", "exp_smoothing"])
+@pytest.mark.parametrize("periods", [24, 730])
+def test_auto_forecast(bench, periods, model):
+    rnd = random.Random(periods)
+    start = dt.date(2024, 1, 1)
+    days = [start + dt.timedelta(days=i) for i in range(periods)]
+    plan_rows = [(d, rnd.uniform(5, 15)) for d in days]
+    fact_rows = [(d, rnd.uniform(4, 16)) for d in days[: periods * 3 // 5]]
+    out = bench(_auto_forecast, [], plan_rows, fact_rows, model)
+    assert len(out) == periods - len(fact_rows)
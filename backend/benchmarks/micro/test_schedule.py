@@ -0,0 +1,25 @@
+import random
+
+import pytest
+
+from app.services.schedule.cpm import compute_cpm
+
+
+def _network(n: int) -> tuple[dict[int, int], dict[int, int], list[tuple[int, int, int]]]:
+    # как в seed: связи вперёд в окне 50 операций, ~1.3 связи на операцию, без циклов
+    rnd = random.Random(n)
+    durations = {i: rnd.randint(5, 90) for i in range(n)}
+    release = {i: rnd.randrange(365) for i in range(n)}
+    edges = set()
+    for i in range(1, n):
+        for _ in range(rnd.choice((1, 1, 2))):
+            edges.add((rnd.randrange(max(0, i - 50), i), i, rnd.choice((0, 0, 0, 2, -1))))
+    return durations, release, sorted(edges)
+
+
+@pytest.mark.parametrize("operations", [1_000, 10_000])
+def test_compute_cpm(bench, operations):
+    durations, release, edges = _network(operations)
+    res = bench(compute_cpm, durations, release, edges)
+    assert not res.cycle
+    assert res.critical_path
@@ -0,0 +1,235 @@
+"""
+Синтетические проекты в PostgreSQL (DATABASE_URL): N операций, M дней факта, K версий импорта.
+
+Проекты BENCH-<n> пересоздаются целиком; каждая версия импорта — полный набор строк
+(как после реального импорта), плюс немного ручных строк (import_run_id IS NULL), чтобы
+отчёты шли через обе ветки effective_rows. Вставка — пачками через Core insert.
+"""
+import datetime as dt
+import random
+from dataclasses import dataclass
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.crud.users import create_user, get_user_by_login
+from app.db.models.baseline import BaselineVolume
+from app.db.models.facts import (
+    FactCashflowMonthly,
+    FactPnLMonthly,
+    FactResourceDaily,
+    FactVolumeDaily,
+    PlanVolumeMonthly,
+)
+from app.db.models.import_run import ImportRun
+from app.db.models.operation import Operation
+from app.db.models.operation_dependency import OperationDependency
+from app.db.models.project import Project
+from app.db.models.sales import SalesMonthly
+from app.db.models.user import Role
+from app.db.models.wbs import WBS
+from app.schemas.admin import UserCreateIn
+from app.services.reports.service import _daterange_month_starts
+
+CODE_PREFIX = "BENCH-"
+_CHUNK = 5000
+
+DISCIPLINES = ("АР", "КЖ", "ОВ", "ВК", "ЭОМ", "СС")
+UGPR = ("Подготовка", "Каркас", "Фасад", "Инженерия", "Отделка")
+RESOURCES = ("Бетонщик", "Арматурщик", "Монтажник", "Электрик", "Кран", "Экскаватор")
+ACCOUNTS = ("Выручка", "Материалы", "Субподряд", "ФОТ", "Накладные")
+
+
+@dataclass
+class SeedConfig:
+    projects: int = 1
+    operations: int = 2000
+    days: int = 365
+    versions: int = 3
+    start: dt.date = dt.date(2024, 1, 1)
+    seed: int = 42
+
+
+def _bulk(db: Session, model, rows: list[dict]) -> int:
+    for i in range(0, len(rows), _CHUNK):
+        db.execute(insert(model), rows[i : i + _CHUNK])
+    return len(rows)
+
+
+def ensure_user(db: Session, login: str, password: str) -> None:
+    if not get_user_by_login(db, login):
+        create_user(db, UserCreateIn(login=login, password=password, role=Role.admin.value, full_name="Benchmark"))
+
+
+def _operations(db: Session, project_id: int, cfg: SeedConfig, rnd: random.Random) -> list[dict]:
+    blocks = max(1, cfg.operations // 400)
+    wbs_rows = [
+        {"project_id": project_id, "path": f"Блок {b + 1}/Этаж {f + 1}"} for b in range(blocks) for f in range(10)
+    ]
+    _bulk(db, WBS, wbs_rows)
+    wbs_ids = [w.id for w in db.query(WBS.id).filter(WBS.project_id == project_id).order_by(WBS.id)]
+
+    ops = []
+    for i in range(cfg.operations):
+        start = cfg.start + dt.timedelta(days=rnd.randrange(cfg.days))
+        finish = start + dt.timedelta(days=rnd.randint(5, 90))
+        wbs_idx = i % len(wbs_ids)
+        ops.append(
+            {
+                "project_id": project_id,
+                "wbs_id": wbs_ids[wbs_idx],
+                "code": f"OP-{i + 1:05d}",
+                "name": f"Операция {i + 1} {rnd.choice(DISCIPLINES)}",
+                "discipline": rnd.choice(DISCIPLINES),
+                "block": f"Блок {wbs_idx // 10 + 1}",
+                "floor": str(wbs_idx % 10 + 1),
+                "ugpr": rnd.choice(UGPR),
+                "plan_qty_total": float(rnd.randint(10, 1000)),
+                "unit": "м3",
+                "plan_start": start,
+                "plan_finish": finish,
+            }
+        )
+    _bulk(db, Operation, ops)
+    ids = {code: id_ for id_, code in db.query(Operation.id, Operation.code).filter(Operation.project_id == project_id)}
+
+    # связи вперёд по плановому началу — граф без циклов, ~1.5 связи на операцию
+    by_start = sorted(ops, key=lambda o: o["plan_start"])
+    deps = set()
+    for i, op in enumerate(by_start[1:], start=1):
+        for _ in range(rnd.choice((1, 1, 2))):
+            pred = by_start[rnd.randrange(max(0, i - 50), i)]
+            deps.add((ids[pred["code"]], ids[op["code"]]))
+    _bulk(
+        db,
+        OperationDependency,
+        [{"project_id": project_id, "predecessor_id": p, "successor_id": s, "lag_days": 0} for p, s in deps],
+    )
+    return ops
+
+
+def _version_rows(project_id: int, run_id: int | None, ops: list[dict], cfg: SeedConfig, rnd: random.Random) -> dict:
+    last_day = cfg.start + dt.timedelta(days=cfg.days - 1)
+    fact, plan, baseline = [], [], []
+    for op in ops:
+        dims = {k: op[k] for k in ("discipline", "block", "floor", "ugpr")}
+        wbs = f"{op['block']}/Этаж {op['floor']}"
+        duration = (op["plan_finish"] - op["plan_start"]).days + 1
+        daily = op["plan_qty_total"] / duration
+        price = round(rnd.uniform(500, 5000), 2)
+        baseline.append(
+            {
+                "project_id": project_id, "import_run_id": run_id, "operation_code": op["code"],
+                "operation_name": op["name"], "wbs": wbs, "category": "Работы", "item_name": op["name"],
+                "unit": "м3", "plan_qty_total": op["plan_qty_total"], "price": price,
+                "amount_total": op["plan_qty_total"] * price, **dims,
+            }
+        )
+        for month in _daterange_month_starts(op["plan_start"], op["plan_finish"]):
+            for scenario in ("plan", "forecast"):
+                plan.append(
+                    {
+                        "project_id": project_id, "import_run_id": run_id, "operation_code": op["code"],
+                        "operation_name": op["name"], "month": month, "scenario": scenario, "unit": "м3",
+                        "qty": op["plan_qty_total"] / max(1, duration / 30) * rnd.uniform(0.8, 1.2),
+                    }
+                )
+        day = op["plan_start"]
+        while day <= min(op["plan_finish"], last_day):
+            fact.append(
+                {
+                    "project_id": project_id, "import_run_id": run_id, "operation_code": op["code"],
+                    "operation_name": op["name"], "wbs": wbs, "category": "Работы", "item_name": op["name"],
+                    "unit": "м3", "date": day, "qty": daily * rnd.uniform(0.5, 1.5), "amount": None, **dims,
+                }
+            )
+            day += dt.timedelta(days=1)
+
+    resources = []
+    for d in range(cfg.days):
+        day = cfg.start + dt.timedelta(days=d)
+        for name in RESOURCES:
+            for scenario in ("plan", "fact"):
+                qty = float(rnd.randint(1, 20))
+                resources.append(
+                    {
+                        "project_id": project_id, "import_run_id": run_id, "resource_name": name,
+                        "category": "Manpower", "date": day, "scenario": scenario, "qty": qty,
+                        "manhours": qty * 8,
+                    }
+                )
+
+    pnl, cashflow, sales = [], [], []
+    for month in _daterange_month_starts(cfg.start, last_day):
+        for scenario in ("plan", "fact"):
+            for account in ACCOUNTS:
+                amount = rnd.uniform(1e5, 1e7)
+                pnl.append(
+                    {"project_id": project_id, "import_run_id": run_id, "account_name": account,
+                     "month": month, "scenario": scenario, "amount": amount}
+                )
+                cashflow.append(
+                    {"project_id": project_id, "import_run_id": run_id, "account_name": account,
+                     "month": month, "scenario": scenario, "amount": amount * 0.9,
+                     "direction": "in" if account == "Выручка" else "out"}
+                )
+            sales.append(
+                {"project_id": project_id, "import_run_id": run_id, "item_name": "Квартиры",
+                 "month": month, "scenario": scenario, "area_m2": rnd.uniform(100, 2000)}
+            )
+    return {
+        FactVolumeDaily: fact,
+        PlanVolumeMonthly: plan,
+        BaselineVolume: baseline,
+        FactResourceDaily: resources,
+        FactPnLMonthly: pnl,
+        FactCashflowMonthly: cashflow,
+        SalesMonthly: sales,
+    }
+
+
+def seed_project(db: Session, index: int, cfg: SeedConfig) -> dict:
+    rnd = random.Random(cfg.seed + index)
+    code = f"{CODE_PREFIX}{index}"
+    db.query(Project).filter(Project.code == code).delete(synchronize_session=False)
+    db.flush()
+    project = Project(code=code, name=f"Benchmark {index}", description="Synthetic benchmark data")
+    db.add(project)
+    db.flush()
+
+    ops = _operations(db, project.id, cfg, rnd)
+    run_ids, rows = [], 0
+    for k in range(cfg.versions):
+        run = ImportRun(
+            project_id=project.id,
+            file_name=f"bench_v{k + 1}.xlsx",
+            file_hash=f"bench-{code}-{k + 1}",
+            status="success",
+            started_at=dt.datetime(2025, 1, 1) + dt.timedelta(hours=k),
+            finished_at=dt.datetime(2025, 1, 1) + dt.timedelta(hours=k, minutes=5),
+        )
+        db.add(run)
+        db.flush()
+        run_ids.append(run.id)
+        for model, data in _version_rows(project.id, run.id, ops, cfg, rnd).items():
+            rows += _bulk(db, model, data)
+
+    # ручные строки поверх версий: каждая 20-я операция, первые три дня работ
+    manual = [
+        {
+            "project_id": project.id, "import_run_id": None, "operation_code": op["code"],
+            "operation_name": op["name"], "wbs": f"{op['block']}/Этаж {op['floor']}", "category": "Работы",
+            "item_name": "Ручной ввод", "unit": "м3", "date": op["plan_start"] + dt.timedelta(days=d),
+            "qty": rnd.uniform(1, 10), "amount": None,
+            **{k: op[k] for k in ("discipline", "block", "floor", "ugpr")},
+        }
+        for op in ops[::20]
+        for d in range(3)
+    ]
+    rows += _bulk(db, FactVolumeDaily, manual)
+    db.commit()
+    return {"project_id": project.id, "code": code, "import_run_ids": run_ids, "operations": len(ops), "rows": rows}
+
+
+def seed(db: Session, cfg: SeedConfig) -> list[dict]:
+    return [seed_project(db, i + 1, cfg) for i in range(cfg.projects)]
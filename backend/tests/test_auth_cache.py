@@ -0,0 +1,37 @@
+from app.core import auth_cache
+from app.core.auth_cache import Principal
+from app.core.config import settings
+
+
+def _p(login: str, role: str = "Admin") -> Principal:
+    return Principal(id=1, login=login, full_name=None, role=role, is_active=True)
+
+
+def test_cache_keyed_by_login_and_iat(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_CACHE_TTL_SECONDS", 60.0)
+    auth_cache.clear()
+    auth_cache.put(100, _p("a"))
+    assert auth_cache.get("a", 100) == _p("a")
+    assert auth_cache.get("a", 101) is None
+    auth_cache.invalidate("a")
+    assert auth_cache.get("a", 100) is None
+
+
+def test_cache_ttl_and_lru(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_CACHE_SIZE", 2)
+    monkeypatch.setattr(settings, "AUTH_CACHE_TTL_SECONDS", 60.0)
+    auth_cache.clear()
+    auth_cache.put(1, _p("a"))
+    auth_cache.put(1, _p("b"))
+    auth_cache.get("a", 1)
+    auth_cache.put(1, _p("c"))
+    assert auth_cache.get("b", 1) is None
+    assert auth_cache.get("a", 1) is not None
+
+    now = auth_cache.time.monotonic()
+    monkeypatch.setattr(auth_cache.time, "monotonic", lambda: now + 61)
+    assert auth_cache.get("a", 1) is None
+
+    monkeypatch.setattr(settings, "AUTH_CACHE_TTL_SECONDS", 0)
+    auth_cache.put(2, _p("d"))
+    assert auth_cache.get("d", 2) is None
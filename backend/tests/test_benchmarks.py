@@ -0,0 +1,33 @@
+import datetime as dt
+
+from benchmarks.load import Target, compare, endpoints, percentile, summarize
+
+
+def test_percentile_interpolates():
+    ms = [float(i) for i in range(1, 101)]
+    assert percentile(ms, 50) == 50.5
+    assert percentile(ms, 99) == 99.01
+    assert percentile([7.0], 95) == 7.0
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_counts_errors_and_throughput():
+    s = summarize([10.0, 20.0, 30.0, 40.0], {200: 3, 503: 1}, wall_seconds=2.0)
+    assert s["requests"] == 4 and s["errors"] == 1
+    assert s["status"] == {"200": 3, "503": 1}
+    assert s["rps"] == 2.0 and s["max_ms"] == 40.0
+
+
+def test_compare_reports_regressions_as_positive():
+    before = {"endpoints": {"a": {"p95_ms": 100.0, "rps": 50.0}, "gone": {"p95_ms": 1.0, "rps": 1.0}}}
+    after = {"endpoints": {"a": {"p95_ms": 120.0, "rps": 40.0}, "new": {"p95_ms": 1.0, "rps": 1.0}}}
+    assert compare(before, after) == [{"endpoint": "a", "before": 100.0, "after": 120.0, "delta_pct": 20.0}]
+    assert compare(before, after, metric="rps")[0]["delta_pct"] == 20.0
+
+
+def test_compare_endpoints_only_with_two_runs():
+    target = Target(project_id=1, import_run_ids=[5], date_from=dt.date(2024, 1, 1), date_to=dt.date(2024, 12, 31))
+    names = {ep.name for ep in endpoints(target)}
+    assert "imports.compare" not in names and "gpr.gantt" in names
+    target.import_run_ids = [5, 6]
+    assert {"imports.compare", "imports.compare_versions"} <= {ep.name for ep in endpoints(target)}
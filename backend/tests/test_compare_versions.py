@@ -0,0 +1,161 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import Date, create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import Cast
+
+from app.db.base import Base
+from app.db.models.facts import FactResourceDaily, FactVolumeDaily, PlanVolumeMonthly
+from app.db.models.operation import Operation
+from app.db.models.project import Project
+from app.db.models.wbs import WBS
+from app.services.reports.compare import KPI_DELTA_FIELDS, ROW_DELTA_FIELDS, compare_versions
+from app.services.reports.service import kpi, plan_fact_table_by
+
+D = dt.date
+RUNS = [1, 2]
+DATE_FROM, DATE_TO = D(2025, 1, 10), D(2025, 3, 20)
+
+
+@compiles(Cast, "sqlite")
+def _sqlite_cast(element, compiler, **kw):
+    # в sqlite CAST(... AS DATE) даёт число; date_trunc ниже уже возвращает ISO-дату
+    if isinstance(element.type, Date):
+        return compiler.process(element.clause, **kw)
+    return compiler.visit_cast(element, **kw)
+
+
+def _date_trunc(unit, value):
+    d = D.fromisoformat(value[:10])
+    return (d.replace(day=1) if unit == "month" else d - dt.timedelta(days=d.weekday())).isoformat()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _functions(conn, _):
+        conn.create_function("date_trunc", 2, _date_trunc)
+
+    tables = [Project, WBS, Operation, FactVolumeDaily, PlanVolumeMonthly, FactResourceDaily]
+    Base.metadata.create_all(engine, tables=[t.__table__ for t in tables])
+    with engine.begin() as conn:
+        # частичные уникальные индексы в sqlite стали бы полными: ручные строки и строки версий
+        # с одним ключом — нормальная ситуация
+        for t in tables:
+            for ix in t.__table__.indexes:
+                if ix.unique and ix.dialect_options["postgresql"]["where"] is not None:
+                    conn.exec_driver_sql(f"DROP INDEX {ix.name}")
+
+    db = Session(engine)
+    db.add(Project(id=1, code="P", name="P"))
+    db.add(WBS(id=1, project_id=1, path="Block/Concrete"))
+    db.add(WBS(id=2, project_id=1, path="Block/Roof"))
+    ops = [("OP-1", 1, "D1", "B1"), ("OP-2", 2, "D2", "B2"), ("OP-3", None, None, "B1")]
+    for code, wbs_id, discipline, block in ops:
+        db.add(Operation(project_id=1, code=code, name=code, wbs_id=wbs_id, discipline=discipline, block=block))
+
+    wbs_path = {"OP-1": "Block/Concrete", "OP-2": "Block/Roof", "OP-3": None}
+    # 3 — чужая версия: её строки не должны попасть в сравнение; None — ручные строки
+    for run in (1, 2, 3, None):
+        scale = {1: 1.0, 2: 1.5, 3: 100.0, None: 0.5}[run]
+        for i, (code, _, discipline, block) in enumerate(ops):
+            if run is None and code == "OP-2":
+                continue
+            for k in range(0, 90, 4 + i):
+                db.add(
+                    FactVolumeDaily(
+                        project_id=1,
+                        import_run_id=run,
+                        operation_code=code,
+                        wbs=wbs_path[code],
+                        discipline=discipline,
+                        block=block,
+                        category="C",
+                        item_name=f"I{k}",
+                        date=D(2025, 1, 1) + dt.timedelta(days=k),
+                        qty=scale * (k % 7 + 1 + i),
+                    )
+                )
+            for m in (1, 2, 3, 4):
+                db.add(
+                    PlanVolumeMonthly(
+                        project_id=1, import_run_id=run, operation_code=code, month=D(2025, m, 1),
+                        scenario="plan", qty=scale * (10 * m + i),
+                    )
+                )
+                if run == 1:
+                    # прогноз из файла только у версии 1 — у версии 2 авто-прогноз по факту
+                    db.add(
+                        PlanVolumeMonthly(
+                            project_id=1, import_run_id=run, operation_code=code, month=D(2025, m, 1),
+                            scenario="forecast", qty=12.0 * m + i,
+                        )
+                    )
+        for d in range(0, 80, 3):
+            db.add(
+                FactResourceDaily(
+                    project_id=1, import_run_id=run, resource_name="R", category="Manpower", scenario="fact",
+                    date=D(2025, 1, 1) + dt.timedelta(days=d), qty=5.0, manhours=scale * 8.0,
+                )
+            )
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _without(row: dict, *keys) -> dict:
+    return {k: v for k, v in row.items() if k not in keys}
+
+
+def test_compare_kpi_matches_kpi_per_run(db):
+    out = compare_versions(db, 1, RUNS, DATE_FROM, DATE_TO, reference_run_id=2)
+    expected = {rid: kpi(db, 1, DATE_FROM, DATE_TO, import_run_id=rid) for rid in RUNS}
+
+    assert [r["import_run_id"] for r in out["kpi"]] == RUNS
+    for row in out["kpi"]:
+        rid = row["import_run_id"]
+        assert _without(row, "import_run_id", "delta") == pytest.approx(expected[rid])
+        assert row["delta"] == pytest.approx(
+            {f: (expected[rid][f] or 0.0) - (expected[2][f] or 0.0) for f in KPI_DELTA_FIELDS}
+        )
+    # ручные строки учтены в каждой версии, чужая версия 3 — нет
+    assert 0 < expected[1]["fact_qty"] < expected[2]["fact_qty"] < 100 * expected[1]["fact_qty"]
+
+
+@pytest.mark.parametrize(
+    "by, scenario",
+    [("wbs", "plan"), ("discipline", "plan"), ("block", "forecast"), ("wbs", "actual")],
+)
+def test_compare_table_matches_plan_fact_table_per_run(db, by, scenario):
+    out = compare_versions(db, 1, RUNS, DATE_FROM, DATE_TO, reference_run_id=2, by=by, scenario=scenario)
+    expected = {
+        rid: {
+            r["key"]: _without(r, "key")
+            for r in plan_fact_table_by(db, 1, DATE_FROM, DATE_TO, by=by, scenario=scenario, import_run_id=rid)["rows"]
+        }
+        for rid in RUNS
+    }
+    zero = dict.fromkeys(ROW_DELTA_FIELDS, 0.0)
+
+    rows = {r["key"]: r["runs"] for r in out["table"]["rows"]}
+    assert set(rows) == set(expected[1]) | set(expected[2])
+    for key, runs in rows.items():
+        assert [r["import_run_id"] for r in runs] == RUNS
+        for r in runs:
+            want = expected[r["import_run_id"]].get(key, zero)
+            assert _without(r, "import_run_id", "delta") == pytest.approx(want)
+            ref = expected[2].get(key, zero)
+            assert r["delta"] == pytest.approx({f: want[f] - ref[f] for f in ROW_DELTA_FIELDS})
+
+
+def test_forecast_fallback_is_per_run(db):
+    out = compare_versions(db, 1, RUNS, DATE_FROM, DATE_TO, by="block", scenario="forecast")
+    plans = {r["import_run_id"]: r["plan"] for row in out["table"]["rows"] for r in row["runs"] if row["key"] == "B2"}
+    # версия 1 — прогноз из файла, версия 2 — авто-прогноз по её факту (не прогноз версии 1)
+    assert plans[1] > 0 and plans[2] > 0 and plans[1] != pytest.approx(plans[2])
+    assert out["reference_run_id"] == 1
@@ -0,0 +1,14 @@
+import gzip
+
+from app.core.compression import choose_encoding, compress
+
+
+def test_choose_encoding_prefers_brotli():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0") == "gzip"
+    assert choose_encoding("identity") is None
+
+
+def test_gzip_roundtrip():
+    body = b'{"rows":[' + b",".join(b"1" for _ in range(1000)) + b"]}"
+    assert gzip.decompress(compress(body, "gzip")) == body
@@ -0,0 +1,39 @@
+from app.services.schedule.cpm import compute_cpm, topological_order
+
+
+def test_forward_backward_pass_and_floats():
+    # 1 -> 2 -> 4, 1 -> 3 -> 4; ветка через 3 короче на 2 дня
+    durations = {1: 3, 2: 5, 3: 3, 4: 2}
+    edges = [(1, 2, 0), (1, 3, 0), (2, 4, 0), (3, 4, 0)]
+    res = compute_cpm(durations, {}, edges)
+    assert res.es == {1: 0, 2: 3, 3: 3, 4: 8}
+    assert res.finish == 10
+    assert res.total_float[3] == 2
+    assert res.free_float[3] == 2
+    assert res.critical_path == [1, 2, 4]
+    assert res.critical == {1, 2, 4}
+
+
+def test_lag_and_release():
+    res = compute_cpm({1: 2, 2: 2, 3: 1}, {3: 10}, [(1, 2, 3)])
+    assert res.es[2] == 5
+    assert res.es[3] == 10
+    assert res.total_float[1] == 4
+    assert res.critical_path == [3]
+
+
+def test_free_float_differs_from_total_float():
+    # 1 -> 2 -> 4 (длинная ветка), 1 -> 3 -> 5 -> 4
+    res = compute_cpm({1: 1, 2: 10, 3: 1, 4: 1, 5: 1}, {}, [(1, 2, 0), (1, 3, 0), (3, 5, 0), (5, 4, 0), (2, 4, 0)])
+    assert res.total_float[3] == 8
+    assert res.free_float[3] == 0
+    assert res.free_float[5] == 8
+
+
+def test_cycle_is_reported():
+    order, cycle, _, _ = topological_order([1, 2, 3, 4], [(1, 2, 0), (2, 3, 0), (3, 2, 0), (3, 4, 0)])
+    assert order == [1]
+    assert sorted(cycle) == [2, 3]
+    res = compute_cpm({1: 1, 2: 1, 3: 1}, {}, [(1, 2, 0), (2, 3, 0), (3, 1, 0)])
+    assert sorted(res.cycle) == [1, 2, 3]
+    assert res.critical_path == []
@@ -0,0 +1,40 @@
+import datetime as dt
+
+from app.services.reports.downsample import downsample_series, lttb
+
+
+def _series(values):
+    start = dt.date(2024, 1, 1)
+    return [{"period": (start + dt.timedelta(days=i)).isoformat(), "value": v} for i, v in enumerate(values)]
+
+
+def test_short_series_unchanged():
+    points = _series([1.0, 2.0, 3.0])
+    assert lttb(points, 10) is points
+    assert downsample_series({"fact": points}, None) == {"fact": points}
+
+
+def test_lttb_keeps_ends_and_peaks():
+    values = [0.0] * 1000
+    values[321] = 50.0
+    values[700] = -40.0
+    out = lttb(_series(values), 50)
+    assert len(out) == 50
+    assert out[0]["period"] == "2024-01-01" and out[-1]["value"] == 0.0
+    assert max(p["value"] for p in out) == 50.0
+    assert min(p["value"] for p in out) == -40.0
+    periods = [p["period"] for p in out]
+    assert periods == sorted(periods)
+
+
+def test_aggregated_points_are_marked():
+    out = lttb(_series([float(i % 7) for i in range(100)]), 10)
+    assert "aggregated" not in out[0] and "aggregated" not in out[-1]
+    inner = out[1:-1]
+    assert all(p["aggregated"] and p["points"] > 1 for p in inner)
+    assert sum(p["points"] for p in inner) == 98
+
+
+def test_downsample_series_applies_to_every_list():
+    out = downsample_series({"plan": _series([1.0] * 30), "fact": _series([2.0] * 5), "meta": 1}, 10)
+    assert len(out["plan"]) == 10 and len(out["fact"]) == 5 and out["meta"] == 1
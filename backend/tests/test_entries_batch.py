@@ -0,0 +1,52 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.routers.entries import _apply_batch
+from app.crud.entries import FACT_VOLUME
+from app.db.base import Base
+from app.db.models.facts import FactVolumeDaily
+from app.db.models.project import Project
+from app.schemas.entries import FactVolumeIn
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Project.__table__, FactVolumeDaily.__table__])
+    db = Session(engine)
+    db.add(Project(id=1, code="P", name="P"))
+    db.add(
+        FactVolumeDaily(project_id=1, operation_code="A", category="C", item_name="I", date=dt.date(2025, 1, 1), qty=1.0)
+    )
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _row(code, qty):
+    return {"project_id": 1, "date": "2025-01-01", "operation_code": code, "category": "C", "item_name": "I", "qty": qty}
+
+
+def test_batch_outcomes_follow_on_conflict_semantics(db):
+    items = [
+        _row("A", 2.0),
+        _row(None, 3.0),
+        "bad",
+        _row("B", 4.0),
+        _row(None, 5.0),  # NULL в ключе: не дубль предыдущей строки, а ещё одна новая
+        _row("B", 6.0),
+        {"project_id": 1},
+    ]
+    out = _apply_batch(db, FACT_VOLUME, FactVolumeIn, items, atomic=False)
+
+    assert [r.status for r in out.results] == [
+        "updated", "created", "error", "superseded", "created", "created", "error",
+    ]
+    assert (out.created, out.updated, out.superseded, out.errors) == (3, 1, 1, 2)
+    assert sorted(
+        (r.operation_code or "", r.qty) for r in db.query(FactVolumeDaily.operation_code, FactVolumeDaily.qty)
+    ) == [("", 3.0), ("", 5.0), ("A", 2.0), ("B", 6.0)]
@@ -0,0 +1,32 @@
+import datetime as dt
+
+from app.core.etag import compute_etag, if_none_match
+
+DAY = dt.date(2025, 3, 10)
+
+
+def test_etag_depends_on_params_run_and_version():
+    base = compute_etag("/reports/kpi", [("project_id", "1"), ("date_from", "2025-01-01")], 3, 10, DAY)
+    assert base == compute_etag("/reports/kpi", [("date_from", "2025-01-01"), ("project_id", "1")], 3, 10, DAY)
+    assert base != compute_etag("/reports/kpi", [("project_id", "1"), ("date_from", "2025-02-01")], 3, 10, DAY)
+    assert base != compute_etag("/reports/kpi", [("project_id", "1"), ("date_from", "2025-01-01")], 4, 10, DAY)
+    assert base != compute_etag("/reports/kpi", [("project_id", "1"), ("date_from", "2025-01-01")], 3, 11, DAY)
+    assert base.startswith('"') and base.endswith('"')
+
+
+def test_etag_changes_with_the_day():
+    # колонки «сегодня / неделя / месяц» таблицы УГПР считаются от текущей даты
+    query = [("project_id", "1"), ("date_from", "2025-01-01"), ("date_to", "2025-12-31")]
+    assert compute_etag("/reports/ugpr/table", query, 3, 10, DAY) != compute_etag(
+        "/reports/ugpr/table", query, 3, 10, DAY + dt.timedelta(days=1)
+    )
+
+
+def test_if_none_match():
+    etag = '"abc"'
+    assert if_none_match('"abc"', etag)
+    assert if_none_match('"x", W/"abc"', etag)
+    assert if_none_match('"abc-gzip"', etag)
+    assert if_none_match("*", etag)
+    assert not if_none_match('"abd"', etag)
+    assert not if_none_match(None, etag)
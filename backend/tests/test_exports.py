@@ -0,0 +1,114 @@
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routers import reports
+from app.core.auth_cache import Principal
+from app.core.config import settings
+from app.core.deps import get_current_user, get_report_db
+from app.db.models.user import Role
+from app.main import app
+from app.services.exports.jobs import cleanup_exports, export_file, params_hash, write_export_meta
+
+
+def test_params_hash_ignores_key_order():
+    a = {"project_id": 1, "sheets": ["plan_fact"], "import_run_id": 3}
+    b = {"import_run_id": 3, "sheets": ["plan_fact"], "project_id": 1}
+    assert params_hash(a) == params_hash(b)
+    assert params_hash(a) != params_hash({**a, "import_run_id": 4})
+
+
+def test_cleanup_removes_only_expired(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+    old = tmp_path / "old.xlsx"
+    new = tmp_path / "new.xlsx"
+    old.write_bytes(b"x")
+    new.write_bytes(b"x")
+    past = time.time() - 3 * 3600
+    os.utime(old, (past, past))
+    assert cleanup_exports(max_age_hours=1) == 1
+    assert not old.exists() and new.exists()
+
+
+@pytest.fixture
+def client_as(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+    queued = []
+    state = {"value": "PENDING"}
+
+    class _Result:
+        def __init__(self, task_id):
+            self.state = state["value"]
+
+        def forget(self):
+            state["value"] = "PENDING"
+
+    monkeypatch.setattr(reports.build_export_task, "AsyncResult", _Result)
+    monkeypatch.setattr(reports.build_export_task, "apply_async", lambda args, task_id: queued.append(args[0]))
+
+    def _client(role: Role) -> TestClient:
+        principal = Principal(id=1, login="u", full_name=None, role=role.value, is_active=True)
+        app.dependency_overrides[get_current_user] = lambda: principal
+        app.dependency_overrides[get_report_db] = lambda: None
+        return TestClient(app)
+
+    _client.queued = queued
+    _client.state = state
+    yield _client
+    app.dependency_overrides.clear()
+
+
+def test_finance_export_is_hidden_from_pto(client_as):
+    params = {"project_id": 1, "sheets": ["plan_fact", "pnl"], "import_run_id": 3, "data_version": 2}
+    job_id = params_hash(params)
+    write_export_meta(job_id, params)
+    export_file(job_id).write_bytes(b"xlsx")
+
+    pto = client_as(Role.pto)
+    assert pto.get(f"/reports/exports/{job_id}").status_code == 403
+    assert pto.get(f"/reports/exports/{job_id}/download").status_code == 403
+    finance = client_as(Role.finance)
+    assert finance.get(f"/reports/exports/{job_id}").json()["status"] == "ready"
+    assert finance.get(f"/reports/exports/{job_id}/download").content == b"xlsx"
+    assert finance.get(f"/reports/exports/{'0' * 32}/download").status_code == 404
+
+
+def test_plan_fact_xlsx_is_enqueued_then_served(client_as, monkeypatch):
+    params = {"project_id": 1, "sheets": ["plan_fact"], "import_run_id": 3, "data_version": 2}
+    monkeypatch.setattr(reports, "export_params", lambda *a, **kw: params)
+    client = client_as(Role.pto)
+    query = {"project_id": 1, "date_from": "2025-01-01", "date_to": "2025-03-31"}
+
+    job_id = params_hash(params)
+    for _ in range(2):
+        # задача ждёт воркера (PENDING) — повторный запрос её не дублирует
+        r = client.get("/reports/export/plan-fact.xlsx", params=query)
+        assert r.status_code == 202 and r.json()["status"] == "queued"
+        assert r.json()["job_id"] == job_id and r.headers["location"] == f"/reports/exports/{job_id}"
+    assert client_as.queued == [job_id]
+
+    export_file(job_id).write_bytes(b"xlsx")
+    r = client.get("/reports/export/plan-fact.xlsx", params=query)
+    assert r.status_code == 200 and r.content == b"xlsx"
+    assert client_as.queued == [job_id]
+
+
+def test_export_is_requeued_after_failure_or_stale_stamp(client_as, monkeypatch):
+    params = {"project_id": 1, "sheets": ["plan_fact"], "import_run_id": 3, "data_version": 2}
+    monkeypatch.setattr(reports, "export_params", lambda *a, **kw: params)
+    client = client_as(Role.pto)
+    query = {"project_id": 1, "date_from": "2025-01-01", "date_to": "2025-03-31"}
+    job_id = params_hash(params)
+
+    client.get("/reports/export/plan-fact.xlsx", params=query)
+    client_as.state["value"] = "FAILURE"
+    client.get("/reports/export/plan-fact.xlsx", params=query)
+    client.get("/reports/export/plan-fact.xlsx", params=query)
+    assert client_as.queued == [job_id, job_id]
+
+    # задача потерялась (PENDING без файла дольше EXPORT_REQUEUE_MINUTES)
+    monkeypatch.setattr(settings, "EXPORT_REQUEUE_MINUTES", -1)
+    client.get("/reports/export/plan-fact.xlsx", params=query)
+    assert client_as.queued == [job_id, job_id, job_id]
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from app.services.reports.forecast import forecast_matrix
+
+
+def test_linear_extends_trend_after_last_fact():
+    values, last = forecast_matrix([[1.0, 2.0, 3.0, 0.0, 0.0]])
+    assert last[0] == 2
+    assert np.allclose(values[0, 3:], [4.0, 5.0])
+
+
+def test_linear_single_point_is_flat():
+    values, last = forecast_matrix([[0.0, 5.0, 0.0]])
+    assert last[0] == 1
+    assert np.allclose(values[0], [5.0, 5.0, 5.0])
+
+
+def test_rows_without_fact_are_marked():
+    _, last = forecast_matrix([[0.0, 0.0], [0.0, 1.0]])
+    assert list(last) == [-1, 1]
+
+
+def test_groups_are_fitted_independently():
+    rows = [[1.0, 0.0, 3.0, 0.0], [4.0, 3.0, 0.0, 0.0], [0.0, 2.0, 0.0, 0.0]]
+    stacked, _ = forecast_matrix(rows)
+    for i, row in enumerate(rows):
+        single, _ = forecast_matrix([row])
+        assert np.allclose(stacked[i], single[0])
+
+
+def test_moving_average_uses_last_window_points():
+    values, _ = forecast_matrix([[1.0, 2.0, 0.0, 3.0, 4.0, 0.0]], model="moving_average", window=2)
+    assert np.allclose(values[0], 3.5)
+
+
+def test_exp_smoothing_level():
+    values, _ = forecast_matrix([[2.0, 0.0, 4.0]], model="exp_smoothing", alpha=0.5)
+    assert np.allclose(values[0], 3.0)
+
+
+def test_unknown_model():
+    with pytest.raises(ValueError):
+        forecast_matrix([[1.0]], model="arima")
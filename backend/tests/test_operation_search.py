@@ -0,0 +1,57 @@
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.api.routers.gpr import _encode_cursor, _parse_rank_cursor
+from app.crud.operations import operation_rank, search_operations
+from app.db.base import Base
+from app.db.models.operation import Operation
+from app.db.models.project import Project
+from app.db.models.wbs import WBS
+
+
+def _word_similarity(q, s):
+    # как pg_trgm: результат real (float4), одинаковый у всех совпадений -> ничьи
+    if s is None:
+        return None
+    return float(np.float32(0.4 if q.lower() in s.lower() else 0.1))
+
+
+def _db() -> Session:
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _functions(conn, _):
+        conn.create_function("word_similarity", 2, _word_similarity)
+        conn.create_function("greatest", -1, max)
+
+    Base.metadata.create_all(engine, tables=[Project.__table__, WBS.__table__, Operation.__table__])
+    db = Session(engine)
+    db.add(Project(id=1, code="P", name="P"))
+    db.add(WBS(id=1, project_id=1, path="Block/Concrete"))
+    db.add(WBS(id=2, project_id=1, path="Block/Roof"))
+    for i in range(7):
+        # concrete в названии, в пути ИСР или нигде
+        name = "Concrete pour" if i % 3 == 0 else "Assembly"
+        db.add(Operation(project_id=1, wbs_id=1 if i % 3 == 1 else 2, code=f"OP-{i}", name=name))
+    db.add(Operation(project_id=2, code="OP-X", name="Concrete elsewhere"))
+    db.commit()
+    return db
+
+
+def test_rank_cursor_pages_through_ties():
+    db = _db()
+    seen, after = [], None
+    while True:
+        rows = search_operations(db, project_id=1, q="concrete", limit=2, after=after)
+        seen += [op.code for op, _, _ in rows]
+        if len(rows) < 2:
+            break
+        after = _parse_rank_cursor(_encode_cursor(r=float(rows[-1][2]), c=rows[-1][0].code))
+    assert seen == ["OP-0", "OP-1", "OP-3", "OP-4", "OP-6"]
+
+
+def test_rank_is_double_in_order_and_keyset():
+    sql = str(operation_rank("x").compile(dialect=postgresql.dialect()))
+    assert sql.startswith("CAST(greatest(") and sql.endswith("AS FLOAT(53))")
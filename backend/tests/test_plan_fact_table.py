@@ -0,0 +1,25 @@
+import datetime as dt
+
+from app.services.reports.service import _auto_forecast, _plan_fact_rows, _prorate_plan
+
+
+def test_prorate_plan_counts_only_days_inside_period():
+    rows = [("A", dt.date(2025, 1, 1), 31.0), ("A", dt.date(2025, 2, 1), 28.0), ("B", dt.date(2025, 3, 1), None)]
+    plan = _prorate_plan(rows, dt.date(2025, 1, 22), dt.date(2025, 2, 7))
+    assert plan == {"A": 17.0}
+
+
+def test_plan_fact_rows_sorted_by_abs_variance():
+    rows = _plan_fact_rows({"A": 5.0, "B": 20.0}, {"A": 10.0, "C": 3.0})
+    assert [r["key"] for r in rows] == ["B", "A", "C"]
+    assert rows[1] == {"key": "A", "fact": 5.0, "plan": 10.0, "variance": -5.0, "progress_pct": 50.0}
+    assert rows[0]["progress_pct"] == 0.0
+
+
+def test_auto_forecast_keeps_file_forecast_and_extends_fact():
+    months = [dt.date(2025, m, 1) for m in (1, 2, 3, 4)]
+    plan = [(m, 10.0) for m in months]
+    assert _auto_forecast([(months[0], 7.0)], plan, []) == [(months[0], 7.0)]
+    out = _auto_forecast([], plan, [(months[0], 1.0), (months[1], 2.0)])
+    assert [p for p, _ in out] == months[2:]
+    assert [round(v, 6) for _, v in out] == [3.0, 4.0]
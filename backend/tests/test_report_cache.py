@@ -0,0 +1,46 @@
+import datetime as dt
+from decimal import Decimal
+
+import orjson
+
+from app.core.config import settings
+from app.services.reports import cache
+from app.services.reports.warmup import current_periods
+from app.services.schedule.cpm import CPMResult
+from app.services.schedule.service import ProjectSchedule, _schedule_dump, _schedule_load
+
+
+def test_key_depends_on_version_run_and_params():
+    params = {"date_from": dt.date(2025, 1, 1), "by": "wbs"}
+    key = cache.make_key("plan_fact_table", 1, 5, 7, params)
+    assert key.startswith("report:plan_fact_table:1:5:7:")
+    assert key == cache.make_key("plan_fact_table", 1, 5, 7, {"by": "wbs", "date_from": dt.date(2025, 1, 1)})
+    assert key != cache.make_key("plan_fact_table", 1, 6, 7, params)
+    assert key != cache.make_key("plan_fact_table", 1, 5, None, params)
+    assert key != cache.make_key("plan_fact_table", 1, 5, 7, {**params, "by": "floor"})
+
+
+def test_dumps_decimal_and_size_limit(monkeypatch):
+    assert orjson.loads(cache.dumps({"v": Decimal("1.5")})) == {"v": 1.5}
+    assert cache.dumps({"v": object()}) is None
+    monkeypatch.setattr(settings, "REPORT_CACHE_MAX_BYTES", 10)
+    assert cache.dumps({"rows": list(range(100))}) is None
+
+
+def test_current_month_and_quarter():
+    assert current_periods(dt.date(2025, 11, 14)) == [
+        (dt.date(2025, 11, 1), dt.date(2025, 11, 30)),
+        (dt.date(2025, 10, 1), dt.date(2025, 12, 31)),
+    ]
+    assert current_periods(dt.date(2024, 2, 29))[1] == (dt.date(2024, 1, 1), dt.date(2024, 3, 31))
+
+
+def test_schedule_roundtrip_through_json():
+    schedule = ProjectSchedule(
+        base_start=dt.date(2025, 1, 1),
+        cpm=CPMResult(es={1: 0, 2: 5}, ef={1: 5, 2: 8}, ls={1: 0, 2: 5}, lf={1: 5, 2: 8},
+                      total_float={1: 0, 2: 0}, free_float={1: 0, 2: 0}, critical_path=[1, 2], finish=8),
+    )
+    restored = _schedule_load(orjson.loads(cache.dumps(_schedule_dump(schedule))))
+    assert restored == schedule
+    assert restored.operation_fields(2) == schedule.operation_fields(2)
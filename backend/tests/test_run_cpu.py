@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy.util import greenlet_spawn
+
+from app.core.concurrency import run_cpu
+
+
+def _thread_name():
+    return threading.current_thread().name
+
+
+def test_run_cpu_inline_outside_greenlet():
+    assert run_cpu(_thread_name) == threading.current_thread().name
+
+
+def test_run_cpu_offloads_under_run_sync_and_keeps_loop_free():
+    async def main():
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(_thread_name())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        # как AsyncSession.run_sync: синхронный код в greenlet на потоке цикла
+        name = await greenlet_spawn(lambda: run_cpu(lambda: time.sleep(0.1) or _thread_name()))
+        ticked_meanwhile = len(ticks)
+        await task
+        return name, ticked_meanwhile
+
+    name, ticked_meanwhile = asyncio.run(main())
+    assert name != threading.current_thread().name
+    # пока fn спала в потоке, цикл продолжал обслуживать другие задачи
+    assert ticked_meanwhile == 5
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models.facts import PlanVolumeMonthly
+from app.db.models.import_run import ImportRun
+from app.db.models.operation import Operation
+from app.db.models.operation_dependency import OperationDependency
+from app.db.models.project import Project
+from app.db.models.wbs import WBS
+from app.schemas.operations import ScheduleBulkIn
+from app.services.schedule.bulk import BulkValidationError, apply_bulk
+
+PG_MAX_PARAMS = 65535
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    tables = [Project, WBS, Operation, OperationDependency, ImportRun, PlanVolumeMonthly]
+    Base.metadata.create_all(engine, tables=[t.__table__ for t in tables])
+    params: list[int] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            params.append(len(parameters))
+
+    db = Session(engine)
+    db.info["params"] = params
+    db.add(Project(id=1, code="P", name="P"))
+    db.add(Operation(project_id=1, code="A", name="Concrete"))
+    db.add(Operation(project_id=1, code="B", name="Roof"))
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def test_bulk_rejects_null_or_blank_name_for_existing_operation(db):
+    data = ScheduleBulkIn(
+        project_id=1,
+        operations=[
+            {"code": "A", "name": None},
+            {"code": "B", "name": "  "},
+            {"code": "C"},
+        ],
+    )
+    with pytest.raises(BulkValidationError) as exc:
+        apply_bulk(db, data)
+    assert exc.value.errors == [
+        dict(section="operations", index=i, error="name_required") for i in range(3)
+    ]
+
+
+def test_bulk_allows_omitting_name_for_existing_operation(db):
+    data = ScheduleBulkIn(project_id=1, operations=[{"code": "A", "plan_qty_total": 5.0}, {"code": "C", "name": ""}])
+    with pytest.raises(BulkValidationError) as exc:
+        apply_bulk(db, data)
+    assert exc.value.errors == [dict(section="operations", index=1, error="name_required")]
+
+
+def test_bulk_max_payload_stays_under_parameter_limit(db):
+    # 5000 новых операций и 20000 связей между ними (i -> i + 1..5): максимум схемы
+    n = 5000
+    deps = [
+        {"predecessor_code": f"OP-{i}", "successor_code": f"OP-{i + step}", "lag_days": step}
+        for step in range(1, 6)
+        for i in range(n - step)
+    ][:20000]
+    data = ScheduleBulkIn(
+        project_id=1,
+        operations=[{"code": f"OP-{i}", "name": f"Operation {i}"} for i in range(n)],
+        create_dependencies=deps,
+    )
+    out = apply_bulk(db, data)
+
+    assert out["dependencies_created"] == 20000
+    assert len(out["operations"]) == n and all(r["created"] for r in out["operations"])
+    assert db.query(OperationDependency).count() == 20000
+    assert max(db.info["params"]) < PG_MAX_PARAMS
@@ -0,0 +1,120 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.crud.operations import update_operation
+from app.db.base import Base
+from app.db.models.facts import PlanVolumeMonthly
+from app.db.models.operation import Operation
+from app.db.models.operation_dependency import OperationDependency
+from app.db.models.project import Project
+from app.db.models.wbs import WBS
+from app.schemas.operations import OperationUpdate
+from app.services.schedule.propagate import propagate_dates, rebuild_plan_rows
+
+D = dt.date
+
+
+def _db() -> Session:
+    engine = create_engine("sqlite://")
+    tables = [Project, WBS, Operation, OperationDependency, PlanVolumeMonthly]
+    Base.metadata.create_all(engine, tables=[t.__table__ for t in tables])
+    with engine.begin() as conn:
+        # частичный уникальный индекс в sqlite стал бы полным: ручная строка и строка версии
+        # за один месяц — нормальная ситуация
+        conn.exec_driver_sql("DROP INDEX uq_plan_volume_month_manual")
+    db = Session(engine)
+    db.add(Project(id=1, code="P", name="P"))
+    db.commit()
+    return db
+
+
+def _op(db: Session, code: str, start: dt.date, finish: dt.date, qty: float | None = None) -> Operation:
+    op = Operation(project_id=1, code=code, name=code, plan_start=start, plan_finish=finish, plan_qty_total=qty)
+    db.add(op)
+    db.flush()
+    return op
+
+
+def _link(db: Session, pred: Operation, succ: Operation, lag: int = 0) -> None:
+    db.add(OperationDependency(project_id=1, predecessor_id=pred.id, successor_id=succ.id, lag_days=lag))
+    db.flush()
+
+
+def test_propagate_dates_shifts_only_violated_successors():
+    db = _db()
+    a = _op(db, "A", D(2025, 1, 1), D(2025, 1, 10))
+    b = _op(db, "B", D(2025, 1, 11), D(2025, 1, 15))
+    c = _op(db, "C", D(2025, 1, 18), D(2025, 1, 20))
+    slack = _op(db, "S", D(2025, 3, 1), D(2025, 3, 5))
+    other = _op(db, "X", D(2025, 1, 11), D(2025, 1, 12))
+    _link(db, a, b)
+    _link(db, b, c, lag=2)
+    _link(db, a, slack)
+
+    a.plan_finish = D(2025, 1, 20)
+    shifted = propagate_dates(db, 1, [a.id])
+
+    assert [(op.code, start, finish) for op, start, finish in shifted] == [
+        ("B", D(2025, 1, 11), D(2025, 1, 15)),
+        ("C", D(2025, 1, 18), D(2025, 1, 20)),
+    ]
+    # длительность сохраняется, лаг учитывается
+    assert (b.plan_start, b.plan_finish) == (D(2025, 1, 21), D(2025, 1, 25))
+    assert (c.plan_start, c.plan_finish) == (D(2025, 1, 28), D(2025, 1, 30))
+    assert slack.plan_start == D(2025, 3, 1)
+    assert other.plan_start == D(2025, 1, 11)
+
+
+def test_propagate_dates_rejects_cycle():
+    db = _db()
+    a = _op(db, "A", D(2025, 1, 1), D(2025, 1, 10))
+    b = _op(db, "B", D(2025, 1, 11), D(2025, 1, 15))
+    _link(db, a, b)
+    _link(db, b, a)
+    with pytest.raises(ValueError, match="dependency_cycle"):
+        propagate_dates(db, 1, [a.id])
+
+
+def _plan(db: Session, run_id: int | None, code: str, month: dt.date, qty: float) -> None:
+    db.add(PlanVolumeMonthly(project_id=1, import_run_id=run_id, operation_code=code, month=month, scenario="plan", qty=qty))
+
+
+def _plan_rows(db: Session) -> set[tuple]:
+    return {
+        (r.import_run_id, r.operation_code, r.month, round(r.qty, 6))
+        for r in db.query(PlanVolumeMonthly).filter(PlanVolumeMonthly.scenario == "plan")
+    }
+
+
+def test_rebuild_plan_rows_replaces_version_rows_and_keeps_manual_months():
+    db = _db()
+    op = _op(db, "A", D(2025, 1, 22), D(2025, 2, 9), qty=19.0)
+    _plan(db, 7, "A", D(2024, 12, 1), 5.0)
+    _plan(db, 7, "OLD", D(2025, 1, 1), 3.0)
+    _plan(db, None, "A", D(2025, 2, 1), 100.0)
+    _plan(db, 7, "B", D(2025, 1, 1), 4.0)
+    db.flush()
+
+    assert rebuild_plan_rows(db, 1, 7, [op], old_codes={"OLD"}) == 1
+
+    assert _plan_rows(db) == {
+        (7, "A", D(2025, 1, 1), 10.0),  # февраль — ручная строка, версия его не перекрывает
+        (None, "A", D(2025, 2, 1), 100.0),
+        (7, "B", D(2025, 1, 1), 4.0),
+    }
+
+
+def test_update_operation_without_commit_keeps_new_wbs_in_transaction():
+    db = _db()
+    op = _op(db, "A", D(2025, 1, 1), D(2025, 1, 10))
+    db.commit()
+
+    update_operation(db, op, OperationUpdate(wbs_path="Block/Roof"), commit=False)
+    assert op.wbs_id is not None
+    db.rollback()  # dry_run
+
+    assert db.query(WBS).count() == 0
+    assert db.get(Operation, op.id).wbs_id is None
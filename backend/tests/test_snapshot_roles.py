@@ -0,0 +1,51 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routers import imports
+from app.core.auth_cache import Principal
+from app.core.deps import get_current_user, get_db
+from app.db.models.user import Role
+from app.main import app
+from app.services.exports.snapshot import FINANCE_TABLES, snapshot_tables, snapshot_zip_name
+
+
+@pytest.fixture
+def client_as(tmp_path, monkeypatch):
+    for include_finance in (True, False):
+        (tmp_path / snapshot_zip_name(include_finance)).write_bytes(b"zip")
+    (tmp_path / "fact_pnl_monthly.parquet").write_bytes(b"parquet")
+    monkeypatch.setattr(imports, "_snapshot_run", lambda db, run_id: type("Run", (), {"id": run_id})())
+    monkeypatch.setattr(imports, "build_snapshot", lambda db, run: tmp_path)
+
+    def _client(role: Role) -> TestClient:
+        principal = Principal(id=1, login="u", full_name=None, role=role.value, is_active=True)
+        app.dependency_overrides[get_current_user] = lambda: principal
+        app.dependency_overrides[get_db] = lambda: None
+        return TestClient(app)
+
+    yield _client
+    app.dependency_overrides.clear()
+
+
+def test_snapshot_tables_without_finance():
+    tables = snapshot_tables(include_finance=False)
+    assert not set(tables) & set(FINANCE_TABLES)
+    assert set(snapshot_tables(include_finance=True)) - set(tables) == set(FINANCE_TABLES)
+
+
+def test_pto_gets_zip_without_finance_and_403_for_finance_tables(client_as):
+    client = client_as(Role.pto)
+    r = client.get("/imports/7/snapshot.zip")
+    assert r.status_code == 200
+    assert r.headers["content-disposition"].endswith('"import_7_snapshot.zip"')
+    for table in FINANCE_TABLES:
+        assert client.get(f"/imports/7/snapshot/{table}.parquet").status_code == 403
+
+
+def test_finance_roles_get_full_snapshot(client_as, monkeypatch):
+    served = []
+    monkeypatch.setattr(imports, "FileResponse", lambda path, **kw: served.append(path.rsplit("/", 1)[-1]) or "")
+    client_as(Role.finance).get("/imports/7/snapshot.zip")
+    client_as(Role.pto).get("/imports/7/snapshot.zip")
+    assert served == [snapshot_zip_name(True), snapshot_zip_name(False)]
+    assert client_as(Role.viewer).get("/imports/7/snapshot/fact_pnl_monthly.parquet").status_code == 200
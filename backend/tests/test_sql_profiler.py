@@ -0,0 +1,27 @@
+from app.core.config import settings
+from app.db.instrument import QueryStats, fingerprint, normalize_sql
+
+
+def test_normalize_strips_literals_and_params():
+    sql = "SELECT a.id FROM t a WHERE a.x = %(x_1)s AND a.code IN (%(c_1)s, %(c_2)s) AND d::date > '2025-01-01' LIMIT 10"
+    assert normalize_sql(sql) == "select a.id from t a where a.x = ? and a.code in (?+) and d::date > ? limit ?"
+    assert normalize_sql("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)") == "insert into t (a, b) values (?+)"
+
+
+def test_fingerprint_groups_same_shape():
+    assert fingerprint("select * from op where id = 5") == fingerprint("SELECT *  FROM op\nWHERE id = 7")
+    assert fingerprint("select * from op where id = 5") != fingerprint("select * from wbs where id = 5")
+    assert fingerprint("select * from op where id in (1, 2)") == fingerprint("select * from op where id in (1, 2, 3)")
+
+
+def test_repeated_statements(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_PROFILER_ENABLED", True)
+    stats = QueryStats()
+    for i in range(5):
+        stats.record(f"select * from op where id = {i}", 0.001)
+    stats.record("select count(*) from op", 0.002)
+    assert stats.count == 6
+    [(fp, group)] = stats.repeated(3)
+    assert fp == fingerprint("select * from op where id = 1")
+    assert group.count == 5
+    assert stats.repeated(5) == []
@@ -83,9 +83,19 @@ export default function GprPage() {
         include_undated: String(undated),
       });
       if (qValue.trim()) params.set("q", qValue.trim());
-      const data = await apiFetch(`/gpr/gantt?${params.toString()}`);
-      setOps(data?.operations || []);
-      setDeps(data?.dependencies || []);
+      params.set("limit", "2000");
+      // Гант отдаётся страницами: идём по next_cursor до конца окна
+      const allOps: Operation[] = [];
+      const depsById = new Map<number, Dependency>();
+      let data: any = null;
+      do {
+        data = await apiFetch(`/gpr/gantt?${params.toString()}`);
+        allOps.push(...(data?.operations || []));
+        for (const d of data?.dependencies || []) depsById.set(d.id, d);
+        if (data?.next_cursor) params.set("cursor", data.next_cursor);
+      } while (data?.next_cursor);
+      setOps(allOps);
+      setDeps(Array.from(depsById.values()));
       setCriticalPath(data?.critical_path || []);
     } catch (e: any) {
       setError(e?.message || "Ошибка загрузки операций");